@@ -0,0 +1,87 @@
+# Evaluates a stream of character profiles in one long-lived process.  Each
+# input line is a JSON profile, as described in
+# calcs/rogue/Aldriana/profiles.py, optionally with an "id" (copied to the
+# output untouched) and a "what" ("dps", "ep" or "breakdown") overriding
+# --what for that line.  Each output line is written and flushed as soon as
+# its input is done:
+#
+#     {"id": 7, "dps": 22728.7370707}
+#     {"id": 8, "error": "Invalid glyph mutliate"}
+#
+# Usage: python batch.py [--what dps|ep|breakdown] [--output FILE]
+#                        [--cache FILE] [INPUT]
+# Reads stdin when INPUT is missing or -.  With --cache, results are kept in
+# (and served from) an sqlite database, so repeated profiles are only
+# evaluated once, across runs.
+
+import json
+import optparse
+import sys
+
+from calcs.rogue.Aldriana import profiles
+from core import i18n
+from core import result_cache
+
+def evaluate_line(line, default_what, cache=None):
+    result = {}
+    try:
+        request_id, profile, what = profiles.parse_request(line, default_what)
+        if request_id is not None:
+            result['id'] = request_id
+        calculator = profiles.build_calculator(profile)
+        if cache is None:
+            result[what] = profiles.evaluate(calculator, what)
+        else:
+            result[what] = profiles.evaluate_cached(calculator, what, cache)
+    except Exception as e:
+        # Report it and keep the stream going.
+        result['error'] = profiles.describe_error(e)
+    return result
+
+def main(argv=None):
+    i18n.set_language('local')
+
+    parser = optparse.OptionParser(usage='python batch.py [options] [INPUT]')
+    parser.add_option('-w', '--what', default='dps', choices=list(profiles.EVALUATIONS),
+                      help=_('what to compute for each profile: dps, ep or breakdown [default: %default]'))
+    parser.add_option('-o', '--output',
+                      help=_('write results here instead of to stdout'))
+    parser.add_option('-c', '--cache',
+                      help=_('sqlite file to cache results in'))
+    parser.add_option('--cache-size', type='int', default=64,
+                      help=_('most megabytes the cache may take up [default: %default]'))
+    options, args = parser.parse_args(argv)
+
+    if args and args[0] != '-':
+        input_file = open(args[0])
+    else:
+        input_file = sys.stdin
+    if options.output:
+        output_file = open(options.output, 'w')
+    else:
+        output_file = sys.stdout
+    cache = None
+    if options.cache:
+        cache = result_cache.ResultCache(options.cache, options.cache_size * 1024 * 1024)
+
+    try:
+        # readline rather than iterating over the file, which reads ahead and
+        # would hold back results when input arrives through a pipe.
+        for line in iter(input_file.readline, ''):
+            if not line.strip():
+                continue
+            output_file.write(json.dumps(evaluate_line(line, options.what, cache), sort_keys=True) + '\n')
+            output_file.flush()
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+        if cache is not None:
+            cache.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
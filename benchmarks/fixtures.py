@@ -0,0 +1,88 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+from calcs.rogue.Aldriana import AldrianasRogueDamageCalculator
+from calcs.rogue.Aldriana import settings
+from core import exceptions
+from objects import buffs
+from objects import procs
+from objects import race
+from objects import stats
+from objects.rogue import rogue_glyphs
+from objects.rogue import rogue_talents
+
+# Fixed characters for the benchmarks.  Each spec comes in four variants:
+# the default is a typical raiding setup (the gear from test.py/combat.py);
+# proc_heavy adds every trinket proc the model handles, no_procs drops all
+# of them (weapon enchants included), and all_buffs turns on every raid
+# buff and activated gear boost there is.  Don't change these once results
+# have been recorded against them, or old baselines stop being comparable;
+# add a new fixture instead.
+
+RAID_BUFFS = (
+    'short_term_haste_buff',
+    'stat_multiplier_buff',
+    'crit_chance_buff',
+    'all_damage_buff',
+    'melee_haste_buff',
+    'attack_power_buff',
+    'str_and_agi_buff',
+    'armor_debuff',
+    'physical_vulnerability_debuff',
+    'spell_damage_debuff',
+    'spell_crit_debuff',
+    'bleed_damage_debuff'
+)
+
+DEFAULT_PROCS = ('heroic_prestors_talisman_of_machination', 'fluid_death')
+PROC_HEAVY_PROCS = ('heroic_prestors_talisman_of_machination', 'fluid_death', 'heroic_left_eye_of_rajh',
+                    'heroic_key_to_the_endless_chamber', 'essence_of_the_cyclone', 'unheeded_warning')
+
+DEFAULT_GEAR_BUFFS = ('rogue_t11_2pc', 'leather_specialization', 'potion_of_the_tolvir')
+ALL_GEAR_BUFFS = ('rogue_t11_2pc', 'leather_specialization', 'potion_of_the_tolvir', 'chaotic_metagem',
+                  'engineer_glove_enchant', 'unsolvable_riddle', 'demon_panther')
+
+def assassination(proc_names=DEFAULT_PROCS, enchant='landslide', buff_names=RAID_BUFFS, gear_buff_names=DEFAULT_GEAR_BUFFS):
+    test_mh = stats.Weapon(939.5, 1.8, 'dagger', enchant)
+    test_oh = stats.Weapon(730.5, 1.4, 'dagger', enchant)
+    test_ranged = stats.Weapon(1371.5, 2.2, 'thrown')
+    test_procs = procs.ProcsList(*proc_names)
+    test_gear_buffs = stats.GearBuffs(*gear_buff_names)
+    test_stats = stats.Stats(20, 4755, 190, 1034, 1333, 778, 1447, 936, test_mh, test_oh, test_ranged, test_procs, test_gear_buffs)
+    test_talents = rogue_talents.RogueTalents('0333230113022110321', '0020000000000000000', '2030030000000000000')
+    test_glyphs = rogue_glyphs.RogueGlyphs('backstab', 'mutilate', 'rupture')
+    test_settings = settings.Settings(settings.AssassinationCycle(), response_time=1)
+    return AldrianasRogueDamageCalculator(test_stats, test_talents, test_glyphs, buffs.Buffs(*buff_names), race.Race('night_elf'), test_settings)
+
+def combat(proc_names=DEFAULT_PROCS, enchant='landslide', buff_names=RAID_BUFFS, gear_buff_names=DEFAULT_GEAR_BUFFS):
+    test_mh = stats.Weapon(1356.5, 2.6, '1h_axe', enchant)
+    test_oh = stats.Weapon(730.5, 1.4, 'dagger', enchant)
+    test_ranged = stats.Weapon(1371.5, 2.2, 'thrown')
+    test_procs = procs.ProcsList(*proc_names)
+    test_gear_buffs = stats.GearBuffs(*gear_buff_names)
+    test_stats = stats.Stats(20, 4745, 190, 1100, 782, 754, 2116, 776, test_mh, test_oh, test_ranged, test_procs, test_gear_buffs)
+    test_talents = rogue_talents.RogueTalents('0232000000000000000', '0332230310032012321', '0030000000000000000')
+    test_glyphs = rogue_glyphs.RogueGlyphs('sinister_strike', 'adrenaline_rush', 'rupture')
+    test_settings = settings.Settings(settings.CombatCycle(), response_time=1)
+    return AldrianasRogueDamageCalculator(test_stats, test_talents, test_glyphs, buffs.Buffs(*buff_names), race.Race('night_elf'), test_settings)
+
+def variants(build):
+    return {
+        'default': lambda: build(),
+        'proc_heavy': lambda: build(proc_names=PROC_HEAVY_PROCS),
+        'no_procs': lambda: build(proc_names=(), enchant=None),
+        'all_buffs': lambda: build(buff_names=sorted(buffs.Buffs.allowed_buffs), gear_buff_names=ALL_GEAR_BUFFS)
+    }
+
+# Fixture name -> (spec, function building a fresh calculator).
+FIXTURES = {}
+for spec, build in (('assassination', assassination), ('combat', combat)):
+    for variant, builder in variants(build).items():
+        FIXTURES[spec + '_' + variant] = (spec, builder)
+
+def get_fixture(name):
+    if name not in FIXTURES:
+        raise exceptions.InvalidInputException(_('No benchmark fixture named {name}').format(name=name))
+    return FIXTURES[name]
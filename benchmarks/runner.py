@@ -0,0 +1,206 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import json
+import optparse
+import platform
+import sys
+import timeit
+
+from benchmarks import fixtures
+from core import exceptions
+
+# Times the engine's entry points against the fixtures in
+# benchmarks.fixtures.  Run it from the top of the repository:
+#
+#     python -m benchmarks.runner --output results.json
+#     python -m benchmarks.runner --baseline results.json
+#
+# The first writes the timings as JSON; the second times the current tree
+# and compares it against those saved results, exiting with status 1 if
+# anything got slower by more than the threshold.  Each operation is called
+# once before timing starts, so shared caches are as warm as they'd be in a
+# long running process; after that, each of the samples times repetitions
+# back to back calls on the same calculator.
+
+def assassination_dps_breakdown(calculator):
+    calculator.init_assassination()
+    return calculator.assassination_dps_breakdown()
+
+def combat_dps_breakdown(calculator):
+    return calculator.combat_dps_breakdown()
+
+def get_dps(calculator):
+    return calculator.get_dps()
+
+def get_ep(calculator):
+    return calculator.get_ep()
+
+# Operation name -> (specs it applies to, function taking a calculator).
+OPERATIONS = {
+    'get_dps': (('assassination', 'combat'), get_dps),
+    'get_ep': (('assassination', 'combat'), get_ep),
+    'assassination_dps_breakdown': (('assassination',), assassination_dps_breakdown),
+    'combat_dps_breakdown': (('combat',), combat_dps_breakdown)
+}
+
+FORMAT_VERSION = 1
+
+def time_operation(function, calculator, repetitions, samples):
+    # Returns the time per call, in seconds, for each sample.
+    function(calculator)
+    timings = []
+    for sample in xrange(samples):
+        start = timeit.default_timer()
+        for repetition in xrange(repetitions):
+            function(calculator)
+        timings.append((timeit.default_timer() - start) / repetitions)
+    return timings
+
+def summarize(timings):
+    ordered = sorted(timings)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2
+    return {
+        'best': ordered[0],
+        'median': median,
+        'mean': sum(ordered) / len(ordered),
+        'samples': timings
+    }
+
+def run(fixture_names=None, operation_names=None, repetitions=20, samples=5):
+    # Returns the JSON-ready results: for each fixture, the DPS it produces
+    # (so comparisons can tell when a change also changed the numbers) and
+    # the timing summary of each operation that applies to its spec.
+    if fixture_names is None:
+        fixture_names = sorted(fixtures.FIXTURES)
+    if operation_names is None:
+        operation_names = sorted(OPERATIONS)
+    for name in operation_names:
+        if name not in OPERATIONS:
+            raise exceptions.InvalidInputException(_('No benchmark operation named {name}').format(name=name))
+
+    results = {}
+    for fixture_name in fixture_names:
+        spec, build = fixtures.get_fixture(fixture_name)
+        fixture_results = {'dps': build().get_dps(), 'operations': {}}
+        for operation_name in operation_names:
+            specs, function = OPERATIONS[operation_name]
+            if spec in specs:
+                timings = time_operation(function, build(), repetitions, samples)
+                fixture_results['operations'][operation_name] = summarize(timings)
+        results[fixture_name] = fixture_results
+
+    return {
+        'format_version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repetitions': repetitions,
+        'samples': samples,
+        'results': results
+    }
+
+def compare(current, baseline, threshold=.05):
+    # Lines up the best times of every fixture and operation present in
+    # both runs.  Returns a list of (fixture, operation, baseline time,
+    # current time, ratio, status) where status is 'slower' or 'faster' if
+    # the ratio is beyond threshold either way and 'same' otherwise, plus a
+    # list of the fixtures whose DPS changed.
+    rows = []
+    changed_dps = []
+    for fixture_name in sorted(current['results']):
+        if fixture_name not in baseline['results']:
+            continue
+        current_fixture = current['results'][fixture_name]
+        baseline_fixture = baseline['results'][fixture_name]
+        if abs(current_fixture['dps'] - baseline_fixture['dps']) > 10 ** -6 * abs(baseline_fixture['dps']):
+            changed_dps.append(fixture_name)
+        for operation_name in sorted(current_fixture['operations']):
+            if operation_name not in baseline_fixture['operations']:
+                continue
+            baseline_time = baseline_fixture['operations'][operation_name]['best']
+            current_time = current_fixture['operations'][operation_name]['best']
+            ratio = current_time / baseline_time
+            if ratio > 1 + threshold:
+                status = 'slower'
+            elif ratio < 1 - threshold:
+                status = 'faster'
+            else:
+                status = 'same'
+            rows.append((fixture_name, operation_name, baseline_time, current_time, ratio, status))
+    return rows, changed_dps
+
+def format_results(results):
+    lines = []
+    for fixture_name in sorted(results['results']):
+        operations = results['results'][fixture_name]['operations']
+        for operation_name in sorted(operations):
+            summary = operations[operation_name]
+            lines.append('%-26s %-29s %10.3f ms %10.3f ms' % (fixture_name, operation_name, summary['best'] * 1000, summary['median'] * 1000))
+    return '\n'.join(lines)
+
+def format_comparison(rows, changed_dps):
+    lines = []
+    for fixture_name, operation_name, baseline_time, current_time, ratio, status in rows:
+        lines.append('%-26s %-29s %10.3f ms -> %10.3f ms %7.3fx  %s' % (fixture_name, operation_name, baseline_time * 1000, current_time * 1000, ratio, status))
+    for fixture_name in changed_dps:
+        lines.append(_('DPS changed for {fixture}').format(fixture=fixture_name))
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = optparse.OptionParser(usage='python -m benchmarks.runner [options]')
+    parser.add_option('-f', '--fixture', action='append', dest='fixtures',
+                      help=_('fixture to run (repeatable; default all): {names}').format(names=', '.join(sorted(fixtures.FIXTURES))))
+    parser.add_option('-p', '--operation', action='append', dest='operations',
+                      help=_('operation to time (repeatable; default all): {names}').format(names=', '.join(sorted(OPERATIONS))))
+    parser.add_option('-n', '--repetitions', type='int', default=20,
+                      help=_('calls per sample [default: %default]'))
+    parser.add_option('-s', '--samples', type='int', default=5,
+                      help=_('samples per operation [default: %default]'))
+    parser.add_option('-o', '--output',
+                      help=_('write the JSON results here instead of to stdout'))
+    parser.add_option('-b', '--baseline',
+                      help=_('saved JSON results to compare against'))
+    parser.add_option('-t', '--threshold', type='float', default=.05,
+                      help=_('relative change treated as noise when comparing [default: %default]'))
+    options, args = parser.parse_args(argv)
+
+    try:
+        results = run(options.fixtures, options.operations, options.repetitions, options.samples)
+    except exceptions.InvalidInputException as e:
+        parser.error(str(e))
+
+    if options.output:
+        output = open(options.output, 'w')
+        try:
+            json.dump(results, output, indent=2, sort_keys=True)
+        finally:
+            output.close()
+    elif not options.baseline:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+
+    if not options.baseline:
+        sys.stderr.write(format_results(results) + '\n')
+        return 0
+
+    baseline_file = open(options.baseline)
+    try:
+        baseline = json.load(baseline_file)
+    finally:
+        baseline_file.close()
+    rows, changed_dps = compare(results, baseline, options.threshold)
+    print format_comparison(rows, changed_dps)
+    for row in rows:
+        if row[-1] == 'slower':
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,13 @@ import __builtin__
 
 __builtin__._ = gettext.gettext
 
-from core import exceptions
+import copy
+
 from calcs import armor_mitigation
+from core import dual_number
+from core import exceptions
+from core import executors
+from objects import race
 
 class DamageCalculator(object):
     # This method holds the general interface for a damage calculator - the
@@ -27,45 +32,90 @@ class DamageCalculator(object):
     GLANCE_RATE = .24
     GLANCE_MULTIPLIER = .75
 
+    # The inputs a calculator is built from.  They can't be reassigned once
+    # it's built: with_ gives a calculator with some of them replaced,
+    # sharing the rest - and the level-derived constants - with this one.
+    # Stats, talents, glyphs and buffs are read-only too, so nothing that
+    # evaluates a calculator (EP, curves, optimizers, sweeps, pool workers)
+    # changes it, and none of them need to copy it first.  Settings are
+    # still a plain object, but change them through with_ as well, never in
+    # place.  What a calculator works out from its inputs (the rogue
+    # modifier plans, for one) is kept from one evaluation to the next, and
+    # with_ keeps whatever the changed inputs don't affect.
+    inputs = ('stats', 'talents', 'glyphs', 'buffs', 'race', 'settings', 'level')
+
     def __init__(self, stats, talents, glyphs, buffs, race, settings=None, level=85):
-        self.stats = stats
-        self.talents = talents
-        self.glyphs = glyphs
-        self.buffs = buffs
-        self.race = race
-        self.settings = settings
-        self.level = level
-    
+        self._set_inputs(stats=stats, talents=talents, glyphs=glyphs, buffs=buffs, race=race, settings=settings, level=level)
+        self._set_constants_for_level()
+
     def __setattr__(self, name, value):
+        if name in self.inputs:
+            raise AttributeError(_('Calculator inputs are read-only; use with_ to change {input}').format(input=name))
         object.__setattr__(self, name, value)
-        if name == 'level':
-            self._set_constants_for_level()
 
     def __getattr__(self, name):
         # Any status we haven't assigned a value to, we don't have.
         if name == 'calculating_ep':
             return False
         object.__getattribute__(self, name)
-   
+
+    def with_(self, **changes):
+        # A copy of this calculator with the given inputs replaced.  Any
+        # other keyword is a stats field, so with_(haste=1500, crit=1200) is
+        # short for with_(stats=self.stats.with_(haste=1500, crit=1200)).
+        # Whatever state the last evaluation left behind comes along, but
+        # get_dps starts over from the inputs anyway.
+        stat_changes = {}
+        for name in changes.keys():
+            if name not in self.inputs:
+                stat_changes[name] = changes.pop(name)
+        if stat_changes:
+            changes['stats'] = changes.get('stats', self.stats).with_(**stat_changes)
+        calculator = copy.copy(self)
+        calculator._set_inputs(**changes)
+        if changes.get('level', self.level) != self.level:
+            calculator._set_constants_for_level()
+        return calculator
+
+    def _set_inputs(self, **inputs):
+        for name, value in inputs.items():
+            object.__setattr__(self, name, value)
+        # The calculator's level is everyone's.
+        if self.stats.level != self.level:
+            object.__setattr__(self, 'stats', self.stats.with_(level=self.level))
+        if self.buffs.level != self.level:
+            object.__setattr__(self, 'buffs', self.buffs.with_(level=self.level))
+        if self.race.level != self.level:
+            object.__setattr__(self, 'race', race.Race(self.race.race_name, self.race.character_class, self.level))
+
     def _set_constants_for_level(self):
-        self.buffs.level = self.level
-        self.stats.level = self.level
-        self.race.level = self.level
         # calculate and cache the level-dependent armor mitigation parameter
         self.armor_mitigation_parameter = armor_mitigation.parameter(self.level)
 
+    # On the calculators dps_curve and ep_curve build for each point of a
+    # curve, warm_starts holds whatever a calculator wants to carry from one
+    # point to the next (see AldrianasRogueDamageCalculator.compute_damage) -
+    # it's one dict, shared by all of them - and warm_start_track the EP
+    # perturbation being evaluated, if any, so that each perturbation
+    # follows the curve separately.  Both are None otherwise.
+    warm_starts = None
+    warm_start_track = None
+
     def ep_helper(self,stat):
         if stat not in ('dodge_exp', 'white_hit', 'spell_hit', 'yellow_hit', 'parry_exp'):
-            setattr(self.stats, stat, getattr(self.stats, stat) + 1.)
-        else:
-            setattr(self, 'calculating_ep', stat)
-        dps = self.get_dps()
-        if stat not in ('dodge_exp', 'white_hit', 'spell_hit', 'yellow_hit', 'parry_exp'):
-            setattr(self.stats, stat, getattr(self.stats, stat) - 1.)
+            calculator = self.with_(**{stat: getattr(self.stats, stat) + 1.})
         else:
-            setattr(self, 'calculating_ep', False)
+            calculator = self.with_()
+            calculator.calculating_ep = {stat: 1.}
+        calculator.warm_start_track = stat
+        return calculator.get_dps()
 
-        return dps
+    def get_ep_rating_offset(self, *categories):
+        # While computing EP for the hit and expertise categories, the attacks
+        # in question act as if they'd lost (for hit) or the target had gained
+        # (for dodge and parry) some rating.  calculating_ep maps the category
+        # being evaluated to that amount of rating.
+        return sum([self.calculating_ep.get(category, 0) for category in categories])
 
     def get_ep(self):
         ep_values = {'white_hit':0, 'spell_hit':0, 'yellow_hit':0,
@@ -80,6 +130,90 @@ class DamageCalculator(object):
 
         return ep_values
 
+    def get_ep_parallel(self, executor=None):
+        # Same values as get_ep, but the baseline and each perturbed get_dps
+        # call go through executor, one of core.executors (or anything with
+        # their map).  With a ProcessPoolExecutor on enough cores this takes
+        # about as long as a single get_dps.  Pass the same executor to every
+        # call so they share its pool; without one, each call starts and
+        # closes a pool of its own.
+        ep_stats = ('white_hit', 'spell_hit', 'yellow_hit', 'str', 'agi', 'haste', 'crit', 'mastery', 'dodge_exp', 'parry_exp')
+        perturbations = (None, 'ap') + ep_stats
+        tasks = [(self, stat) for stat in perturbations]
+
+        if executor is None:
+            with executors.ProcessPoolExecutor() as own_executor:
+                dps_values = list(own_executor.map(_perturbed_dps, tasks))
+        else:
+            dps_values = list(executor.map(_perturbed_dps, tasks))
+
+        baseline_dps = dps_values[0]
+        ap_dps_difference = dps_values[1] - baseline_dps
+        ep_values = {}
+        for stat, dps in zip(ep_stats, dps_values[2:]):
+            ep_values[stat] = abs(dps - baseline_dps) / ap_dps_difference
+
+        return ep_values
+
+    def get_exact_ep(self):
+        # Same values as get_ep, but from exact partial derivatives computed
+        # in a single get_dps call rather than one call per stat: each stat
+        # (and each hit/expertise category) is seeded as its own dual number
+        # variable, and the derivatives are carried through the whole model.
+        rating_stats = ('ap', 'str', 'agi', 'haste', 'crit', 'mastery')
+        hit_categories = ('white_hit', 'spell_hit', 'yellow_hit', 'dodge_exp', 'parry_exp')
+        names = rating_stats + hit_categories
+
+        seeds = dual_number.variables([0.] * len(names))
+        seeded_ratings = dict([(stat, seed + getattr(self.stats, stat)) for stat, seed in zip(rating_stats, seeds)])
+        calculator = self.with_(**seeded_ratings)
+        calculator.calculating_ep = dict(zip(hit_categories, seeds[len(rating_stats):]))
+        dps = calculator.get_dps()
+
+        partials = dict(zip(names, dual_number.get_partials(dps, len(names))))
+        ep_values = {}
+        for stat in names[1:]:
+            ep_values[stat] = abs(partials[stat]) / partials['ap']
+
+        return ep_values
+
+    def get_curve_ratings(self, start, stop, step):
+        # start, start + step, ... up to but not including stop, as range
+        # does.
+        if step <= 0:
+            raise exceptions.InvalidInputException(_('Curve steps must be positive'))
+        ratings = []
+        rating = start
+        while rating < stop:
+            ratings.append(rating)
+            rating = start + len(ratings) * step
+        return ratings
+
+    def get_curve(self, stat, start, stop, step, method):
+        # [(rating, calculator.method())] for a calculator with stat at each
+        # rating of the curve in turn, and warm starts carried from each
+        # rating to the next.
+        warm_starts = {}
+        curve = []
+        for rating in self.get_curve_ratings(start, stop, step):
+            calculator = self.with_(**{stat: float(rating)})
+            calculator.warm_starts = warm_starts
+            curve.append((rating, getattr(calculator, method)()))
+        return curve
+
+    def dps_curve(self, stat, start, stop, step):
+        # DPS along a range of one rating, e.g. dps_curve('hit', 0, 2000, 10);
+        # returns a list of (rating, DPS) pairs.  The results agree with
+        # get_dps at each rating to within the precision of the model's
+        # convergence, but each point starts from where its neighbour ended
+        # up, which takes fewer steps.
+        return self.get_curve(stat, start, stop, step, 'get_dps')
+
+    def ep_curve(self, stat, start, stop, step):
+        # get_ep along a range of one rating, as dps_curve; returns a list of
+        # (rating, EP values) pairs.
+        return self.get_curve(stat, start, stop, step, 'get_ep')
+
     def get_dps(self):
         # Overwrite this function with your calculations/simulations/whatever;
         # this is what callers will (initially) be looking at.
@@ -110,15 +244,15 @@ class DamageCalculator(object):
 
         if dodgeable:
             dodge_chance = max(self.BASE_DODGE_CHANCE - expertise, 0)
-            if self.calculating_ep == 'dodge_exp':
-                dodge_chance += self.stats.get_expertise_from_rating(1)
+            if self.calculating_ep:
+                dodge_chance += self.stats.get_expertise_from_rating(self.get_ep_rating_offset('dodge_exp'))
         else:
             dodge_chance = 0
 
         if parryable:
             parry_chance = max(self.BASE_PARRY_CHANCE - expertise, 0)
-            if self.calculating_ep in ('parry_exp', 'dodge_exp'):
-                parry_chance += self.stats.get_expertise_from_rating(1)
+            if self.calculating_ep:
+                parry_chance += self.stats.get_expertise_from_rating(self.get_ep_rating_offset('parry_exp', 'dodge_exp'))
         else:
             parry_chance = 0
 
@@ -131,8 +265,8 @@ class DamageCalculator(object):
         if weapon == None:
             weapon = self.stats.mh
         hit_chance = self.melee_hit_chance(self.BASE_ONE_HAND_MISS_RATE, dodgeable, parryable, weapon.type)
-        if self.calculating_ep == 'yellow_hit':
-            hit_chance -= self.stats.get_melee_hit_from_rating(1)
+        if self.calculating_ep:
+            hit_chance -= self.stats.get_melee_hit_from_rating(self.get_ep_rating_offset('yellow_hit'))
         return hit_chance
 
     def off_hand_melee_hit_chance(self, dodgeable=True, parryable=False, weapon=None):
@@ -142,8 +276,8 @@ class DamageCalculator(object):
         if weapon == None:
             weapon = self.stats.oh
         hit_chance = self.melee_hit_chance(self.BASE_ONE_HAND_MISS_RATE, dodgeable, parryable, weapon.type)
-        if self.calculating_ep == 'yellow_hit':
-            hit_chance -= self.stats.get_melee_hit_from_rating(1)
+        if self.calculating_ep:
+            hit_chance -= self.stats.get_melee_hit_from_rating(self.get_ep_rating_offset('yellow_hit'))
         return hit_chance
 
     def dual_wield_mh_hit_chance(self, dodgeable=True, parryable=False):
@@ -160,14 +294,14 @@ class DamageCalculator(object):
 
     def dual_wield_hit_chance(self, dodgeable, parryable, weapon_type):
         hit_chance = self.melee_hit_chance(self.BASE_DW_MISS_RATE, dodgeable, parryable, weapon_type)
-        if self.calculating_ep in ('yellow_hit','spell_hit','white_hit'):
-            hit_chance -= self.stats.get_melee_hit_from_rating(1)
+        if self.calculating_ep:
+            hit_chance -= self.stats.get_melee_hit_from_rating(self.get_ep_rating_offset('yellow_hit', 'spell_hit', 'white_hit'))
         return hit_chance
 
     def spell_hit_chance(self):
         hit_chance = 1 - max(self.BASE_SPELL_MISS_RATE - self.stats.get_spell_hit_from_rating() - self.get_spell_hit_from_talents(), 0)
-        if self.calculating_ep in ('yellow_hit', 'spell_hit'):
-            hit_chance -= self.stats.get_spell_hit_from_rating(1)
+        if self.calculating_ep:
+            hit_chance -= self.stats.get_spell_hit_from_rating(self.get_ep_rating_offset('yellow_hit', 'spell_hit'))
         return hit_chance
 
     def buff_melee_crit(self):
@@ -196,3 +330,12 @@ class DamageCalculator(object):
             return self.buffs.bleed_damage_multiplier()
         elif is_physical:
             return self.buffs.physical_damage_multiplier() * self.armor_mitigation_multiplier(armor_override)
+
+
+def _perturbed_dps(task):
+    # Worker for DamageCalculator.get_ep_parallel.  Lives at module level so
+    # the process pool can pickle it.
+    calculator, stat = task
+    if stat is None:
+        return calculator.get_dps()
+    return calculator.ep_helper(stat)
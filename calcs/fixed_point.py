@@ -0,0 +1,24 @@
+# Solvers for the fixed point problems that come up in damage calculations,
+# such as proc uptimes that depend on attack counts that depend on the procs.
+#
+# A solver has one method, solve(step, point), where step(point) returns
+# (next_point, converged).  next_point is the fixed point iterate g(point)
+# as a list of numbers; converged is the caller's own test, comparing this
+# evaluation with the previous one.  solve returns the converged point
+# along with the number of times step was called.
+#
+# There is only plain iteration.  The proc fixed points in compute_damage
+# are strong contractions: even Fluid Death with Landslide on both weapons
+# settles in three steps, and two are needed just to confirm convergence.
+# Extrapolating solvers (Aitken, Anderson) had nothing to save there and
+# only added steps.
+
+class FixedPointIteration(object):
+    def solve(self, step, point):
+        iterations = 0
+        while True:
+            iterations += 1
+            next_point, converged = step(point)
+            if converged:
+                return point, iterations
+            point = next_point
@@ -3,8 +3,13 @@ import __builtin__
 
 __builtin__._ = gettext.gettext
 
+from calcs import fixed_point
 from calcs.rogue import RogueDamageCalculator
+from calcs.rogue.Aldriana import attack_record
+from calcs.rogue.Aldriana import cp_distribution_engine
 from core import exceptions
+from core import timing
+from objects import procs
 
 
 class InputNotModeledException(exceptions.InvalidInputException):
@@ -13,6 +18,40 @@ class InputNotModeledException(exceptions.InvalidInputException):
 
 
 class AldrianasRogueDamageCalculator(RogueDamageCalculator):
+    # See RogueDamageCalculator.modeled_talents.  The simulator reads a
+    # subset of these (simulator.SIMULATED_TALENTS and SIMULATED_GLYPHS).
+    modeled_talents = RogueDamageCalculator.modeled_talents | frozenset([
+        'adrenaline_rush', 'bandits_guile', 'cold_blood', 'combat_potency', 'cut_to_the_chase', 'improved_slice_and_dice',
+        'killing_spree', 'lightning_reflexes', 'master_poisoner', 'murderous_intent', 'overkill', 'puncturing_wounds',
+        'relentless_strikes', 'restless_blades', 'revealing_strike', 'ruthlessness', 'savage_combat', 'seal_fate',
+        'vendetta', 'venomous_wounds'
+    ])
+    modeled_glyphs = RogueDamageCalculator.modeled_glyphs | frozenset([
+        'adrenaline_rush', 'backstab', 'eviscerate', 'killing_spree', 'mutilate', 'revealing_strike', 'sinister_strike',
+        'slice_and_dice', 'tricks_of_the_trade', 'vendetta'
+    ])
+
+    # Slice and dice's attack speed bonus, and the attack power combat gets
+    # from Vitality.  The simulator reads these too.
+    SLICE_AND_DICE_SPEED_MULTIPLIER = 1.4
+    VITALITY_AP_MULTIPLIER = 1.2
+
+    # What the abilities cost before talents and glyphs.  A miss loses
+    # MISS_ENERGY_LOSS of a strike's base cost and all of a finisher's.
+    # The simulator reads these too, through energy_cost and
+    # miss_energy_loss.
+    ENERGY_COSTS = {
+        'mutilate': 60, 'backstab': 60, 'sinister_strike': 45, 'revealing_strike': 40,
+        'envenom': 35, 'eviscerate': 35, 'rupture': 25, 'slice_and_dice': 25
+    }
+    FINISHERS = frozenset(['envenom', 'eviscerate', 'rupture', 'slice_and_dice'])
+    MISS_ENERGY_LOSS = .2
+
+    # Vendetta's damage bonus, duration (before its glyph) and cooldown.
+    VENDETTA_DAMAGE_MULTIPLIER = 1.2
+    VENDETTA_DURATION = 30
+    VENDETTA_COOLDOWN = 120
+
     ###########################################################################
     # Main DPS comparison function.  Calls the appropriate sub-function based
     # on talent tree.
@@ -29,22 +68,54 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         else:
             raise InputNotModeledException(_('You must have 31 points in at least one talent tree.'))
 
+    # Column order for the rows passed to get_dps_batch.
+    BATCH_STAT_COLUMNS = ('str', 'agi', 'ap', 'crit', 'hit', 'exp', 'haste', 'mastery')
+
+    def get_dps_batch(self, stat_matrix):
+        # Evaluates get_dps for every row of stat_matrix, where each row holds
+        # the ratings named in BATCH_STAT_COLUMNS.  Anything that iterates as
+        # rows will do - a list of tuples, a NumPy array, etc.  Everything
+        # other than those eight ratings (gear, talents, buffs, settings) is
+        # shared by all the rows, so the caller only builds one calculator.
+        # Returns a list with one DPS value per row.
+        #
+        # The setup that doesn't depend on the ratings (see setup_key) and
+        # the modifier plans are worked out here, once, and every row's
+        # with_ starts from them; only the rating-dependent constants and
+        # the convergence run per row.
+        if self.talents.is_assassination_rogue():
+            self.init_assassination()
+        elif self.talents.is_combat_rogue():
+            self.init_combat()
+        dps_values = []
+        for row in stat_matrix:
+            if len(row) != len(self.BATCH_STAT_COLUMNS):
+                raise exceptions.InvalidInputException(_('Expected {columns} stat columns, got {length}').format(columns=len(self.BATCH_STAT_COLUMNS), length=len(row)))
+            # Converting to float here keeps NumPy scalar types out of the
+            # model, where their arithmetic is several times slower.
+            ratings = dict([(stat, float(value)) for stat, value in zip(self.BATCH_STAT_COLUMNS, row)])
+            dps_values.append(self.with_(**ratings).get_dps())
+
+        return dps_values
+
     ###########################################################################
     # General object manipulation functions that we'll use multiple places.
     ###########################################################################
 
     PRECISION_REQUIRED = 10 ** -7
 
-    def are_close_enough(self, old_dist, new_dist):
-        for item in new_dist.keys():
-            if item not in old_dist:
+    def are_close_enough(self, old_record, new_record):
+        for old_value, new_value in zip(old_record.values(), new_record.values()):
+            if new_value is None:
+                continue
+            elif old_value is None:
                 return False
-            elif not hasattr(new_dist[item], '__iter__'):
-                if abs(new_dist[item] - old_dist[item]) > self.PRECISION_REQUIRED:
+            elif not hasattr(new_value, '__iter__'):
+                if abs(new_value - old_value) > self.PRECISION_REQUIRED:
                     return False
             else:
-                for index in range(len(new_dist[item])):
-                    if abs(new_dist[item][index] - old_dist[item][index]) > self.PRECISION_REQUIRED:
+                for index in range(len(new_value)):
+                    if abs(new_value[index] - old_value[index]) > self.PRECISION_REQUIRED:
                         return False
         return True
 
@@ -74,40 +145,65 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         # Just average-casing for now.  Should fix that at some point.
         return 1 + .3 * self.heroism_uptime_per_fight()
 
-    def get_cp_distribution_for_cycle(self, cp_distribution_per_move, target_cp_quantity):
-        cur_min_cp = 0
-        ruthlessness_chance = self.talents.ruthlessness * .2
-        cur_dist = {(0,0):(1-ruthlessness_chance), (1,0):ruthlessness_chance}
-        while cur_min_cp < target_cp_quantity:
-            cur_min_cp += 1
-
-            new_dist = {}
-            for (cps, moves), prob in cur_dist.items():
-                if cps >= cur_min_cp:
-                    if (cps, moves) in new_dist:
-                        new_dist[(cps, moves)] += prob
-                    else:
-                        new_dist[(cps, moves)] = prob
-                else:
-                    for (move_cp, move_prob) in cp_distribution_per_move.items():
-                        total_cps = cps + move_cp
-                        if total_cps > 5:
-                            total_cps = 5
-                        dist_entry = (total_cps, moves + 1)
-                        if dist_entry in new_dist:
-                            new_dist[dist_entry] += move_prob * prob
-                        else:
-                            new_dist[dist_entry] = move_prob * prob
-            cur_dist = new_dist
-
-        return cur_dist
+    # Shared by all calculators so that repeated evaluations (EP, batches,
+    # convergence iterations) reuse each other's combo point distributions.
+    cp_distributions = cp_distribution_engine.CPDistributionEngine()
 
-    def set_constants(self):
-        # General setup that we'll use in all 3 cycles.
+    def get_cp_distribution_for_cycle(self, cp_distribution_per_move, target_cp_quantity):
+        return self.cp_distributions.get_distribution(cp_distribution_per_move, target_cp_quantity, self.talents.ruthlessness)
+
+    # init_assassination and init_combat split their setup in two.  What
+    # depends on the ratings is worked out on every call.  Everything else
+    # is kept, along with setup_key, the inputs it came from (see
+    # setup_inputs), and only worked out again once one of those changes.
+    # with_ copies what's kept, so an EP perturbation, a batch row or any
+    # other with_ that only changes ratings starts from its parent's setup.
+    setup_key = None
+
+    def setup_inputs(self, spec):
+        # The inputs, other than the ratings, that the setup reads.  Stats
+        # (so gear buffs and procs), talents, glyphs and buffs are
+        # read-only, and the weapons are never changed once built, so
+        # they're compared as objects; settings are compared by value.
+        settings = self.settings
+        return (spec, self.talents, self.glyphs, self.buffs, self.stats.gear_buffs, self.stats.procs,
+                self.stats.mh, self.stats.oh, self.stats.mh.type, self.stats.oh.type,
+                settings, sorted(vars(settings).items()), sorted(vars(settings.cycle).items()))
+
+    def set_input_constants(self):
+        # General setup that we'll use in all 3 cycles, from anything but
+        # the ratings.
+        started = self.timing_sink.clock()
         self.bonus_energy_regen = 0
+        self.overkill_energy_regen = 0
+        self.cold_blood_energy_regen = 0
         if self.settings.tricks_on_cooldown and not self.glyphs.tricks_of_the_trade:
             self.bonus_energy_regen -= 15./(30+self.settings.response_time)
 
+        self.agi_multiplier = self.buffs.stat_multiplier() * self.stats.gear_buffs.leather_specialization_multiplier()
+
+        self.relentless_strikes_energy_return_per_cp = [0, 1.75, 3.5, 5][self.talents.relentless_strikes]
+
+        self.base_speed_multiplier = self.SLICE_AND_DICE_SPEED_MULTIPLIER * self.buffs.melee_haste_multiplier() * self.get_heroism_haste_multiplier()
+
+        # The procs that add to the stats, and alongside each, the hand it
+        # is limited to (None for all but weapon enchants), for
+        # compute_damage.
+        self.stat_procs = []
+        for proc_info in self.stats.procs.get_all_procs_for_stat():
+            if proc_info.stat in self.CONVERGENCE_STATS and not proc_info.is_ppm():
+                self.stat_procs.append((proc_info, None))
+        for hand, weapon in (('mh', self.stats.mh), ('oh', self.stats.oh)):
+            for enchant in (weapon.landslide, weapon.hurricane):
+                if enchant:
+                    self.stat_procs.append((enchant, hand))
+        self.damage_procs = self.stats.procs.get_all_damage_procs()
+
+        self.timing_sink.record('set_input_constants', self.timing_sink.clock() - started)
+
+    def set_constants(self):
+        # General setup that we'll use in all 3 cycles, from the ratings.
+        started = self.timing_sink.clock()
         self.base_stats = {
             'agi': self.stats.agi + self.buffs.buff_agi() + self.race.racial_agi,
             'ap': self.stats.ap + 140,
@@ -124,14 +220,10 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
                 else:
                     self.base_stats[stat] += (value * duration) * 1.0 / self.settings.duration
 
-        self.agi_multiplier = self.buffs.stat_multiplier() * self.stats.gear_buffs.leather_specialization_multiplier()
-
         self.base_strength = self.stats.str + self.buffs.buff_str() + self.race.racial_str
         self.base_strength *= self.buffs.stat_multiplier()
 
-        self.relentless_strikes_energy_return_per_cp = [0, 1.75, 3.5, 5][self.talents.relentless_strikes]
-
-        self.base_speed_multiplier = 1.4 * self.buffs.melee_haste_multiplier() * self.get_heroism_haste_multiplier()
+        self.timing_sink.record('set_constants', self.timing_sink.clock() - started)
 
     def get_proc_damage_contribution(self, proc, proc_count, current_stats):
         base_damage = proc.value
@@ -149,109 +241,126 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
 
         return base_damage * multiplier * (1 + crit_rate * (crit_multiplier - 1)) * proc_count
 
+    def energy_cost(self, ability):
+        # What an ability costs after the talents and glyphs that discount it.
+        cost = self.ENERGY_COSTS[ability]
+        if ability == 'mutilate':
+            cost -= 5 * self.glyphs.mutilate
+        elif ability == 'backstab':
+            cost -= 15 * self.talents.murderous_intent
+        elif ability == 'sinister_strike':
+            cost -= 2 * self.talents.improved_sinister_strike
+        return cost
+
+    def miss_energy_loss(self, ability):
+        if ability in self.FINISHERS:
+            return self.energy_cost(ability)
+        return self.MISS_ENERGY_LOSS * self.ENERGY_COSTS[ability]
+
+    def energy_cost_per_hit(self, ability, hit_chance):
+        # The average energy spent on an ability for each one that lands.
+        loss = self.miss_energy_loss(ability)
+        return self.energy_cost(ability) - loss + loss / hit_chance
+
     def get_damage_breakdown(self, current_stats, attacks_per_second, crit_rates, damage_procs):
         # Vendetta may want to be handled elsewhere.
         average_ap = current_stats['ap'] + 2 * current_stats['agi'] + self.base_strength
         average_ap *= self.buffs.attack_power_multiplier()
         if self.talents.is_combat_rogue():
-            average_ap *= 1.2
+            average_ap *= self.VITALITY_AP_MULTIPLIER
         average_ap *= (1 + .01 * self.talents.savage_combat)
 
         damage_breakdown = {}
 
         (mh_base_damage, mh_crit_damage) = self.mh_damage(average_ap)
-        mh_hit_rate = self.dual_wield_mh_hit_chance() - self.GLANCE_RATE - crit_rates['mh_autoattacks']
-        average_mh_hit = self.GLANCE_RATE * self.GLANCE_MULTIPLIER * mh_base_damage + mh_hit_rate * mh_base_damage + crit_rates['mh_autoattacks'] * mh_crit_damage
-        mh_dps = average_mh_hit * attacks_per_second['mh_autoattacks']
+        mh_hit_rate = self.dual_wield_mh_hit_chance() - self.GLANCE_RATE - crit_rates.mh_autoattacks
+        average_mh_hit = self.GLANCE_RATE * self.GLANCE_MULTIPLIER * mh_base_damage + mh_hit_rate * mh_base_damage + crit_rates.mh_autoattacks * mh_crit_damage
+        mh_dps = average_mh_hit * attacks_per_second.mh_autoattacks
 
         (oh_base_damage, oh_crit_damage) = self.oh_damage(average_ap)
-        oh_hit_rate = self.dual_wield_oh_hit_chance() - self.GLANCE_RATE - crit_rates['oh_autoattacks']
-        average_oh_hit = self.GLANCE_RATE * self.GLANCE_MULTIPLIER * oh_base_damage + oh_hit_rate * oh_base_damage + crit_rates['oh_autoattacks'] * oh_crit_damage
-        oh_dps = average_oh_hit * attacks_per_second['oh_autoattacks']
+        oh_hit_rate = self.dual_wield_oh_hit_chance() - self.GLANCE_RATE - crit_rates.oh_autoattacks
+        average_oh_hit = self.GLANCE_RATE * self.GLANCE_MULTIPLIER * oh_base_damage + oh_hit_rate * oh_base_damage + crit_rates.oh_autoattacks * oh_crit_damage
+        oh_dps = average_oh_hit * attacks_per_second.oh_autoattacks
 
         damage_breakdown['autoattack'] = mh_dps + oh_dps
 
-        for key in attacks_per_second.keys():
-            if not attacks_per_second[key]:
-                del attacks_per_second[key]
-
-        if 'mutilate' in attacks_per_second:
-            mh_mutilate_dps = self.get_dps_contribution(self.mh_mutilate_damage(average_ap), crit_rates['mutilate'], attacks_per_second['mutilate'])
-            oh_mutilate_dps = self.get_dps_contribution(self.oh_mutilate_damage(average_ap), crit_rates['mutilate'], attacks_per_second['mutilate'])
+        if attacks_per_second.mutilate:
+            mh_mutilate_dps = self.get_dps_contribution(self.mh_mutilate_damage(average_ap), crit_rates.mutilate, attacks_per_second.mutilate)
+            oh_mutilate_dps = self.get_dps_contribution(self.oh_mutilate_damage(average_ap), crit_rates.mutilate, attacks_per_second.mutilate)
             damage_breakdown['mutilate'] = mh_mutilate_dps + oh_mutilate_dps
 
-        if 'backstab' in attacks_per_second:
-            damage_breakdown['backstab'] = self.get_dps_contribution(self.backstab_damage(average_ap), crit_rates['backstab'], attacks_per_second['backstab'])
+        if attacks_per_second.backstab:
+            damage_breakdown['backstab'] = self.get_dps_contribution(self.backstab_damage(average_ap), crit_rates.backstab, attacks_per_second.backstab)
 
-        if 'sinister_strike' in attacks_per_second:
-            damage_breakdown['sinister_strike'] = self.get_dps_contribution(self.sinister_strike_damage(average_ap), crit_rates['sinister_strike'], attacks_per_second['sinister_strike'])
+        if attacks_per_second.sinister_strike:
+            damage_breakdown['sinister_strike'] = self.get_dps_contribution(self.sinister_strike_damage(average_ap), crit_rates.sinister_strike, attacks_per_second.sinister_strike)
 
-        if 'revealing_strike' in attacks_per_second:
-            damage_breakdown['revealing_strike'] = self.get_dps_contribution(self.revealing_strike_damage(average_ap), crit_rates['revealing_strike'], attacks_per_second['revealing_strike'])
+        if attacks_per_second.revealing_strike:
+            damage_breakdown['revealing_strike'] = self.get_dps_contribution(self.revealing_strike_damage(average_ap), crit_rates.revealing_strike, attacks_per_second.revealing_strike)
 
-        if 'main_gauche' in attacks_per_second:
-            damage_breakdown['main_gauche'] = self.get_dps_contribution(self.main_gauche_damage(average_ap), crit_rates['main_gauche'], attacks_per_second['main_gauche'])
+        if attacks_per_second.main_gauche:
+            damage_breakdown['main_gauche'] = self.get_dps_contribution(self.main_gauche_damage(average_ap), crit_rates.main_gauche, attacks_per_second.main_gauche)
 
-        if 'mh_killing_spree' in attacks_per_second:
-            damage_breakdown['killing_spree'] = (self.get_dps_contribution(self.mh_killing_spree_damage(average_ap), crit_rates['mh_killing_spree'], attacks_per_second['mh_killing_spree']) +
-                                                 self.get_dps_contribution(self.oh_killing_spree_damage(average_ap), crit_rates['oh_killing_spree'], attacks_per_second['oh_killing_spree']))
+        if attacks_per_second.mh_killing_spree:
+            damage_breakdown['killing_spree'] = (self.get_dps_contribution(self.mh_killing_spree_damage(average_ap), crit_rates.mh_killing_spree, attacks_per_second.mh_killing_spree) +
+                                                 self.get_dps_contribution(self.oh_killing_spree_damage(average_ap), crit_rates.oh_killing_spree, attacks_per_second.oh_killing_spree))
 
-        if 'rupture_ticks' in attacks_per_second:
+        if attacks_per_second.rupture_ticks is not None:
             damage_breakdown['rupture'] = 0
             for i in xrange(1,6):
-                damage_breakdown['rupture'] += self.get_dps_contribution(self.rupture_tick_damage(average_ap, i), crit_rates['rupture_ticks'], attacks_per_second['rupture_ticks'][i])
+                damage_breakdown['rupture'] += self.get_dps_contribution(self.rupture_tick_damage(average_ap, i), crit_rates.rupture_ticks, attacks_per_second.rupture_ticks[i])
 
-        if 'envenom' in attacks_per_second:
+        if attacks_per_second.envenom is not None:
             damage_breakdown['envenom'] = 0
             for i in xrange(1,6):
-                damage_breakdown['envenom'] += self.get_dps_contribution(self.envenom_damage(average_ap, i), crit_rates['envenom'], attacks_per_second['envenom'][i])
+                damage_breakdown['envenom'] += self.get_dps_contribution(self.envenom_damage(average_ap, i), crit_rates.envenom, attacks_per_second.envenom[i])
 
-        if 'eviscerate' in attacks_per_second:
+        if attacks_per_second.eviscerate is not None:
             damage_breakdown['eviscerate'] = 0
             for i in xrange(1,6):
-                damage_breakdown['eviscerate'] += self.get_dps_contribution(self.eviscerate_damage(average_ap, i), crit_rates['eviscerate'], attacks_per_second['eviscerate'][i])
+                damage_breakdown['eviscerate'] += self.get_dps_contribution(self.eviscerate_damage(average_ap, i), crit_rates.eviscerate, attacks_per_second.eviscerate[i])
 
-        if 'venomous_wounds' in attacks_per_second:
-            damage_breakdown['venomous_wounds'] = self.get_dps_contribution(self.venomous_wounds_damage(average_ap, mastery=current_stats['mastery']), crit_rates['venomous_wounds'], attacks_per_second['venomous_wounds'])
+        if attacks_per_second.venomous_wounds:
+            damage_breakdown['venomous_wounds'] = self.get_dps_contribution(self.venomous_wounds_damage(average_ap, mastery=current_stats['mastery']), crit_rates.venomous_wounds, attacks_per_second.venomous_wounds)
 
-        if 'instant_poison' in attacks_per_second:
-            damage_breakdown['instant_poison'] = self.get_dps_contribution(self.instant_poison_damage(average_ap, mastery=current_stats['mastery']), crit_rates['instant_poison'], attacks_per_second['instant_poison'])
+        if attacks_per_second.instant_poison:
+            damage_breakdown['instant_poison'] = self.get_dps_contribution(self.instant_poison_damage(average_ap, mastery=current_stats['mastery']), crit_rates.instant_poison, attacks_per_second.instant_poison)
 
-        if 'deadly_poison' in attacks_per_second:
-            damage_breakdown['deadly_poison'] = self.get_dps_contribution(self.deadly_poison_tick_damage(average_ap, mastery=current_stats['mastery']), crit_rates['deadly_poison'], attacks_per_second['deadly_poison'])
+        if attacks_per_second.deadly_poison:
+            damage_breakdown['deadly_poison'] = self.get_dps_contribution(self.deadly_poison_tick_damage(average_ap, mastery=current_stats['mastery']), crit_rates.deadly_poison, attacks_per_second.deadly_poison)
 
-        if 'wound_poison' in attacks_per_second:
-            damage_breakdown['wound_poison'] = self.get_dps_contribution(self.wound_poison_damage(average_ap, mastery=current_stats['mastery']), crit_rates['wound_poison'], attacks_per_second['wound_poison'])
+        if attacks_per_second.wound_poison:
+            damage_breakdown['wound_poison'] = self.get_dps_contribution(self.wound_poison_damage(average_ap, mastery=current_stats['mastery']), crit_rates.wound_poison, attacks_per_second.wound_poison)
 
         for proc in damage_procs:
-            damage_breakdown[proc.proc_name] = self.get_proc_damage_contribution(proc, attacks_per_second[proc.proc_name], current_stats)
+            damage_breakdown[proc.proc_name] = self.get_proc_damage_contribution(proc, attacks_per_second.damage_procs[proc.proc_name], current_stats)
 
         return damage_breakdown
 
     def get_mh_procs_per_second(self, proc, attacks_per_second, crit_rates):
         triggers_per_second = 0
-        if proc.procs_off_auto_attacks():
-            if proc.procs_off_crit_only():
-                triggers_per_second += attacks_per_second['mh_autoattack_hits'] * crit_rates['mh_autoattacks']
+        trigger_mask = proc.trigger_mask
+        on_crit = proc.on_crit
+        if trigger_mask & procs.AUTO_ATTACKS:
+            if on_crit:
+                triggers_per_second += attacks_per_second.mh_autoattack_hits * crit_rates.mh_autoattacks
             else:
-                triggers_per_second += attacks_per_second['mh_autoattack_hits']
-        if proc.procs_off_strikes():
-            for ability in ('mutilate', 'backstab', 'revealing_strike', 'sinister_strike', 'ambush', 'hemorrhage', 'mh_killing_spree'):
-                if ability in attacks_per_second:
-                    if proc.procs_off_crit_only():
-                        triggers_per_second += attacks_per_second[ability] * crit_rates[ability]
-                    else:
-                        triggers_per_second += attacks_per_second[ability]
-            for ability in ('envenom', 'eviscerate'):
-                if ability in attacks_per_second:
-                    if proc.procs_off_crit_only():
-                        triggers_per_second += sum(attacks_per_second[ability]) * crit_rates[ability]
+                triggers_per_second += attacks_per_second.mh_autoattack_hits
+        if trigger_mask & procs.STRIKES:
+            for count, crit_rate in zip(attack_record.get_mh_strikes(attacks_per_second), attack_record.get_mh_strikes(crit_rates)):
+                if on_crit:
+                    triggers_per_second += count * crit_rate
+                else:
+                    triggers_per_second += count
+            for counts, crit_rate in zip(attack_record.get_mh_finishers(attacks_per_second), attack_record.get_mh_finishers(crit_rates)):
+                if counts is not None:
+                    if on_crit:
+                        triggers_per_second += sum(counts) * crit_rate
                     else:
-                        triggers_per_second += sum(attacks_per_second[ability])
-        if proc.procs_off_apply_debuff():
-            if 'rupture' in attacks_per_second:
-                if not proc.procs_off_crit_only():
-                    triggers_per_second += attacks_per_second['rupture']
+                        triggers_per_second += sum(counts)
+        if trigger_mask & procs.APPLY_DEBUFF:
+            if not on_crit:
+                triggers_per_second += attacks_per_second.rupture
 
         if proc.is_ppm():
             return triggers_per_second * proc.ppm * self.stats.mh.speed / 60.
@@ -260,18 +369,19 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
 
     def get_oh_procs_per_second(self, proc, attacks_per_second, crit_rates):
         triggers_per_second = 0
-        if proc.procs_off_auto_attacks():
-            if proc.procs_off_crit_only():
-                triggers_per_second += attacks_per_second['oh_autoattack_hits'] * crit_rates['oh_autoattacks']
+        trigger_mask = proc.trigger_mask
+        on_crit = proc.on_crit
+        if trigger_mask & procs.AUTO_ATTACKS:
+            if on_crit:
+                triggers_per_second += attacks_per_second.oh_autoattack_hits * crit_rates.oh_autoattacks
             else:
-                triggers_per_second += attacks_per_second['oh_autoattack_hits']
-        if proc.procs_off_strikes():
-            for ability in ('mutilate', 'main_gauche', 'oh_killing_spree'):
-                if ability in attacks_per_second:
-                    if proc.procs_off_crit_only():
-                        triggers_per_second += attacks_per_second[ability] * crit_rates[ability]
-                    else:
-                        triggers_per_second += attacks_per_second[ability]
+                triggers_per_second += attacks_per_second.oh_autoattack_hits
+        if trigger_mask & procs.STRIKES:
+            for count, crit_rate in zip(attack_record.get_oh_strikes(attacks_per_second), attack_record.get_oh_strikes(crit_rates)):
+                if on_crit:
+                    triggers_per_second += count * crit_rate
+                else:
+                    triggers_per_second += count
 
         if proc.is_ppm():
             return triggers_per_second * proc.ppm * self.stats.oh.speed / 60.
@@ -280,26 +390,26 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
 
     def get_other_procs_per_second(self, proc, attacks_per_second, crit_rates):
         triggers_per_second = 0
+        trigger_mask = proc.trigger_mask
+        on_crit = proc.on_crit
 
-        if proc.procs_off_harmful_spells():
-            for ability in ('instant_poison', 'wound_poison', 'venomous_wounds'):
-                if ability in attacks_per_second:
-                    if proc.procs_off_crit_only():
-                        triggers_per_second += attacks_per_second[ability] * crit_rates[ability]
-                    else:
-                        triggers_per_second += attacks_per_second[ability]
-        if proc.procs_off_periodic_spell_damage():
-            if 'deadly_poison' in attacks_per_second:
-                if proc.procs_off_crit_only():
-                    triggers_per_second += attacks_per_second['deadly_poison'] * crit_rates['deadly_poison']
+        if trigger_mask & procs.HARMFUL_SPELLS:
+            for count, crit_rate in zip(attack_record.get_harmful_spells(attacks_per_second), attack_record.get_harmful_spells(crit_rates)):
+                if on_crit:
+                    triggers_per_second += count * crit_rate
                 else:
-                    triggers_per_second += attacks_per_second['deadly_poison']
-        if proc.procs_off_bleeds():
-            if 'rupture_ticks' in attacks_per_second:
-                if proc.procs_off_crit_only():
-                    triggers_per_second += sum(attacks_per_second['rupture_ticks']) * crit_rates['rupture']
+                    triggers_per_second += count
+        if trigger_mask & procs.PERIODIC_SPELL_DAMAGE:
+            if on_crit:
+                triggers_per_second += attacks_per_second.deadly_poison * crit_rates.deadly_poison
+            else:
+                triggers_per_second += attacks_per_second.deadly_poison
+        if trigger_mask & procs.BLEEDS:
+            if attacks_per_second.rupture_ticks is not None:
+                if on_crit:
+                    triggers_per_second += sum(attacks_per_second.rupture_ticks) * crit_rates.rupture_ticks
                 else:
-                    triggers_per_second += sum(attacks_per_second['rupture_ticks'])
+                    triggers_per_second += sum(attacks_per_second.rupture_ticks)
 
         if proc.is_ppm():
             if triggers_per_second == 0:
@@ -309,47 +419,64 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         else:
             return triggers_per_second * proc.proc_chance
 
-    def get_procs_per_second(self, proc, attacks_per_second, crit_rates):
+    def get_procs_per_second(self, proc, attacks_per_second, crit_rates, hand=None):
+        # hand is 'mh' or 'oh' for a weapon enchant, which only procs off
+        # that weapon, and None for everything else.
+        #
         # TODO: Include damaging proc hits in figuring out how often everything else procs.
-        if getattr(proc, 'mh_only', False):
+        if hand == 'mh':
             procs_per_second = self.get_mh_procs_per_second(proc, attacks_per_second, crit_rates)
-        elif getattr(proc, 'oh_only', False):
+        elif hand == 'oh':
             procs_per_second = self.get_oh_procs_per_second(proc, attacks_per_second, crit_rates)
         else:
             procs_per_second = self.get_mh_procs_per_second(proc, attacks_per_second, crit_rates) + self.get_oh_procs_per_second(proc, attacks_per_second, crit_rates) + self.get_other_procs_per_second(proc, attacks_per_second, crit_rates)
 
         return procs_per_second
 
-    def set_uptime(self, proc, attacks_per_second, crit_rates):
-        procs_per_second = self.get_procs_per_second(proc, attacks_per_second, crit_rates)
+    def get_uptime(self, proc, attacks_per_second, crit_rates, hand=None):
+        # The proc's average stacks (for single-stack procs, the fraction of
+        # the time it's up).
+        procs_per_second = self.get_procs_per_second(proc, attacks_per_second, crit_rates, hand)
 
         if proc.icd:
-            proc.uptime = proc.duration / (proc.icd + 1. / procs_per_second)
+            return proc.duration / (proc.icd + 1. / procs_per_second)
         else:
             # See http://elitistjerks.com/f31/t20747-advanced_rogue_mechanics_discussion/#post621369
             # for the derivation of this formula.
             if procs_per_second >= 1 and proc.duration >= 1:
-                proc.uptime = proc.max_stacks
+                return proc.max_stacks
             else:
                 q = 1 - procs_per_second
                 Q = q ** proc.duration
                 P = 1 - Q
-                proc.uptime = P * (1 - P ** proc.max_stacks) / Q
+                return P * (1 - P ** proc.max_stacks) / Q
 
     def update_with_damaging_proc(self, proc, attacks_per_second, crit_rates):
         if proc.stat == 'spell_damage':
-            attacks_per_second[proc.proc_name] = self.get_procs_per_second(proc, attacks_per_second, crit_rates) * self.spell_hit_chance()
+            attacks_per_second.damage_procs[proc.proc_name] = self.get_procs_per_second(proc, attacks_per_second, crit_rates) * self.spell_hit_chance()
         elif proc.stat == 'physical_damage':
-            attacks_per_second[proc.proc_name] = self.get_procs_per_second(proc, attacks_per_second, crit_rates) * self.one_hand_melee_hit_chance()
+            attacks_per_second.damage_procs[proc.proc_name] = self.get_procs_per_second(proc, attacks_per_second, crit_rates) * self.one_hand_melee_hit_chance()
 
     def unheeded_warning_multiplier(self, attacks_per_second, crit_rates):
         proc = self.stats.procs.unheeded_warning
         if not proc:
             return 1
 
-        self.set_uptime(proc, attacks_per_second, crit_rates)
-        return 1 + proc.value * proc.uptime
+        return 1 + proc.value * self.get_uptime(proc, attacks_per_second, crit_rates)
+
 
+    # The stats compute_damage converges over, in the order the solver sees
+    # them.  After each compute_damage call, convergence_iterations holds
+    # the number of attack count evaluations it took.
+    CONVERGENCE_STATS = ('agi', 'ap', 'crit', 'haste', 'mastery')
+    solver = fixed_point.FixedPointIteration()
+
+    # Where set_constants and compute_damage report how long each of their
+    # phases took: set_constants, attack_counts (every call of the attack
+    # counts function), set_uptime and update_with_damaging_proc (each pass
+    # over the procs), convergence (the whole solve) and damage_breakdown.
+    # Set it to one of the sinks in core.timing to collect them.
+    timing_sink = timing.NullTimingSink()
 
     def compute_damage(self, attack_counts_function):
         # TODO: 4pc T11
@@ -366,38 +493,29 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
             'mastery': self.base_stats['mastery']
         }
 
-        active_procs = []
-        damage_procs = []
+        # The procs come from set_input_constants.  Proc specs are shared
+        # between evaluations, so what this one works out about them -
+        # uptimes from get_uptime - stays with it.
+        damage_procs = self.damage_procs
+
+        # The proc-adjusted stats are the fixed point of "count attacks using
+        # these stats, then add the proc uptimes those attack counts give".
+        # The solver works on the vector of those stats; the attack counts
+        # and crit rates from the latest evaluation are kept in latest.
+        latest = {}
+        sink = self.timing_sink
+
+        def step(stat_vector):
+            current_stats = dict(zip(self.CONVERGENCE_STATS, stat_vector))
+            started = sink.clock()
+            attacks_per_second, crit_rates = attack_counts_function(current_stats)
+            sink.record('attack_counts', sink.clock() - started)
+            converged = 'attacks_per_second' in latest and self.are_close_enough(latest['attacks_per_second'], attacks_per_second)
+            latest['attacks_per_second'] = attacks_per_second
+            latest['crit_rates'] = crit_rates
+            if converged:
+                return stat_vector, True
 
-        for proc_info in self.stats.procs.get_all_procs_for_stat():
-            if proc_info.stat in current_stats and not proc_info.is_ppm():
-                active_procs.append(proc_info)
-            if proc_info.stat in ('spell_damage', 'physical_damage'):
-                damage_procs.append(proc_info)
-
-        mh_landslide = self.stats.mh.landslide
-        if mh_landslide:
-            mh_landslide.mh_only = True
-            active_procs.append(mh_landslide)
-
-        mh_hurricane = self.stats.mh.hurricane
-        if mh_hurricane:
-            mh_hurricane.mh_only = True
-            active_procs.append(mh_hurricane)
-
-        oh_landslide = self.stats.oh.landslide
-        if oh_landslide:
-            oh_landslide.oh_only = True
-            active_procs.append(oh_landslide)
-
-        oh_hurricane = self.stats.oh.hurricane
-        if oh_hurricane:
-            oh_hurricane.oh_only = True
-            active_procs.append(oh_hurricane)
-
-        attacks_per_second, crit_rates = attack_counts_function(current_stats)
-
-        while True:
             current_stats = {
                 'agi': self.base_stats['agi'],
                 'ap': self.base_stats['ap'],
@@ -406,40 +524,83 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
                 'mastery': self.base_stats['mastery']
             }
 
+            started = sink.clock()
             for proc in damage_procs:
                 if not proc.icd:
                     self.update_with_damaging_proc(proc, attacks_per_second, crit_rates)
+            sink.record('update_with_damaging_proc', sink.clock() - started)
 
-            for proc in active_procs:
+            started = sink.clock()
+            for proc, hand in self.stat_procs:
                 if not proc.icd:
-                    self.set_uptime(proc, attacks_per_second, crit_rates)
-                    current_stats[proc.stat] += proc.uptime * proc.value
+                    current_stats[proc.stat] += self.get_uptime(proc, attacks_per_second, crit_rates, hand) * proc.value
+            sink.record('set_uptime', sink.clock() - started)
 
             current_stats['agi'] *= self.agi_multiplier
 
-            old_attacks_per_second = attacks_per_second
-            attacks_per_second, crit_rates = attack_counts_function(current_stats)
-
-            if self.are_close_enough(old_attacks_per_second, attacks_per_second):
-                break
-
-        for proc in active_procs:
+            return [current_stats[stat] for stat in self.CONVERGENCE_STATS], False
+
+        initial_stats = [current_stats[stat] for stat in self.CONVERGENCE_STATS]
+        history = None
+        if self.warm_starts is not None:
+            # On a curve, the procs add to the stats much as they did at the
+            # neighbouring ratings, so start from there.
+            history = self.warm_starts.setdefault((self.warm_start_track, attack_counts_function.__name__), [])
+            proc_stats = self.predict_proc_stats(history)
+            if proc_stats is not None:
+                initial_stats = [value + proc_value for value, proc_value in zip(initial_stats, proc_stats)]
+        started = sink.clock()
+        stat_vector, self.convergence_iterations = self.solver.solve(step, initial_stats)
+        sink.record('convergence', sink.clock() - started)
+        if history is not None:
+            base_stats = [current_stats[stat] for stat in self.CONVERGENCE_STATS]
+            history.append([value - base_value for value, base_value in zip(stat_vector, base_stats)])
+            del history[:-2]
+        current_stats = dict(zip(self.CONVERGENCE_STATS, stat_vector))
+        attacks_per_second = latest['attacks_per_second']
+        crit_rates = latest['crit_rates']
+
+        # The solver's last step counted attacks at exactly these stats, so
+        # unless a proc with an ICD moves them, those counts (and whatever
+        # the counts function set on self along the way) are already final.
+        started = sink.clock()
+        stats_changed = False
+        for proc, hand in self.stat_procs:
             if proc.icd:
-                self.set_uptime(proc, attacks_per_second, crit_rates)
+                uptime = self.get_uptime(proc, attacks_per_second, crit_rates, hand)
                 if proc.stat == 'agi':
-                    current_stats[proc.stat] += proc.uptime * proc.value * self.agi_multiplier
+                    current_stats[proc.stat] += uptime * proc.value * self.agi_multiplier
                 else:
-                    current_stats[proc.stat] += proc.uptime * proc.value
+                    current_stats[proc.stat] += uptime * proc.value
+                stats_changed = True
+        sink.record('set_uptime', sink.clock() - started)
 
-        attacks_per_second, crit_rates = attack_counts_function(current_stats)
+        if stats_changed:
+            started = sink.clock()
+            attacks_per_second, crit_rates = attack_counts_function(current_stats)
+            sink.record('attack_counts', sink.clock() - started)
 
+        started = sink.clock()
         for proc in damage_procs:
             self.update_with_damaging_proc(proc, attacks_per_second, crit_rates)
+        sink.record('update_with_damaging_proc', sink.clock() - started)
 
+        started = sink.clock()
         damage_breakdown = self.get_damage_breakdown(current_stats, attacks_per_second, crit_rates ,damage_procs)
         damage_breakdown['autoattack'] *= self.unheeded_warning_multiplier(attacks_per_second, crit_rates)
+        sink.record('damage_breakdown', sink.clock() - started)
         return damage_breakdown
 
+    def predict_proc_stats(self, history):
+        # What the procs will add to the converged stats at the next point
+        # of a curve, from what they added at the last two (or one): a
+        # straight line through them, since the points are evenly spaced.
+        if not history:
+            return None
+        elif len(history) == 1:
+            return history[-1]
+        return [max(2 * last - previous, 0) for last, previous in zip(history[-1], history[-2])]
+
     ###########################################################################
     # Assassination DPS functions
     ###########################################################################
@@ -451,6 +612,18 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         # breakdown or other sub-result, make sure to call this, as it
         # initializes many values that are needed to perform the calculations.
 
+        setup_inputs = self.setup_inputs('assassination')
+        if setup_inputs != self.setup_key:
+            self.init_assassination_inputs()
+            self.setup_key = setup_inputs
+
+        self.set_constants()
+
+        self.rupture_energy_cost = self.energy_cost_per_hit('rupture', self.one_hand_melee_hit_chance())
+        self.envenom_energy_cost = self.energy_cost_per_hit('envenom', self.one_hand_melee_hit_chance())
+
+    def init_assassination_inputs(self):
+        # The part of init_assassination that doesn't depend on the ratings.
         if self.settings.cycle._cycle_type != 'assassination':
             raise InputNotModeledException(_('You must specify an assassination cycle to match your assassination spec.'))
         if self.stats.mh.type != 'dagger' or self.stats.oh.type != 'dagger':
@@ -467,23 +640,22 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         if self.talents.cut_to_the_chase != 3:
             raise InputNotModeledException(_('Assassination modeling requires three points in Cut to the Chase'))
 
-        self.set_constants()
-
-        self.rupture_energy_cost = 25 / self.one_hand_melee_hit_chance()
-        self.envenom_energy_cost = 35 / self.one_hand_melee_hit_chance()
+        self.set_input_constants()
 
-        self.base_energy_regen = 10
+        # Overkill and cold blood are averaged over their cooldowns, and kept
+        # apart so that the simulator, which uses them as they come up, can
+        # take them back out.
         if self.talents.overkill:
-            self.base_energy_regen += 60 / (180. + self.settings.response_time)
-
+            self.overkill_energy_regen = 60 / (180. + self.settings.response_time)
         if self.talents.cold_blood:
-            self.bonus_energy_regen += 25./(120+self.settings.response_time)
+            self.cold_blood_energy_regen = 25./(120+self.settings.response_time)
 
+        self.base_energy_regen = 10 + self.overkill_energy_regen
+        self.bonus_energy_regen += self.cold_blood_energy_regen
+
+        self.vendetta_duration = self.VENDETTA_DURATION * (1 + .2 * self.glyphs.vendetta)
         if self.talents.vendetta:
-            if self.glyphs.vendetta:
-                self.vendetta_mult = 1.06
-            else:
-                self.vendetta_mult = 1.05
+            self.vendetta_mult = 1 + (self.VENDETTA_DAMAGE_MULTIPLIER - 1) * self.vendetta_duration / self.VENDETTA_COOLDOWN
         else:
             self.vendetta_mult = 1
 
@@ -518,9 +690,7 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         return dps_breakdown
 
     def assassination_dps_breakdown_mutilate(self):
-        self.mutilate_energy_cost = 48 + 12 / self.one_hand_melee_hit_chance()
-        if self.glyphs.mutilate:
-            self.mutilate_energy_cost -= 5
+        self.mutilate_energy_cost = self.energy_cost_per_hit('mutilate', self.one_hand_melee_hit_chance())
 
         damage_breakdown = self.compute_damage(self.assassination_attack_counts_mutilate)
 
@@ -553,16 +723,15 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         if mutilate_crit_rate > 1:
             mutilate_crit_rate = 1.
 
-        crit_rates = {
-            'mh_autoattacks': min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE),
-            'oh_autoattacks': min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE),
-            'mutilate': mutilate_crit_rate,
-            'envenom': base_melee_crit_rate,
-            'rupture_ticks': base_melee_crit_rate,
-            'venomous_wounds': base_spell_crit_rate,
-            'instant_poison': base_spell_crit_rate,
-            'deadly_poison': base_spell_crit_rate
-        }
+        crit_rates = attack_record.AttackRecord()
+        crit_rates.mh_autoattacks = min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.oh_autoattacks = min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.mutilate = mutilate_crit_rate
+        crit_rates.envenom = base_melee_crit_rate
+        crit_rates.rupture_ticks = base_melee_crit_rate
+        crit_rates.venomous_wounds = base_spell_crit_rate
+        crit_rates.instant_poison = base_spell_crit_rate
+        crit_rates.deadly_poison = base_spell_crit_rate
 
         seal_fate_proc_rate = 1 - (1 - mutilate_crit_rate * .5 * self.talents.seal_fate) ** 2
         cp_per_mut = {2: 1 - seal_fate_proc_rate, 3: seal_fate_proc_rate}
@@ -589,34 +758,34 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         envenom_energy_cost = muts_per_finisher * self.mutilate_energy_cost + self.envenom_energy_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp
         envenoms_per_cycle = energy_for_envenoms / envenom_energy_cost
 
-        attacks_per_second = {}
+        attacks_per_second = attack_record.AttackRecord()
 
         envenoms_per_second = envenoms_per_cycle / average_cycle_length
-        attacks_per_second['rupture'] = 1 / average_cycle_length
-        attacks_per_second['mutilate'] = (envenoms_per_second + attacks_per_second['rupture']) * muts_per_finisher
+        attacks_per_second.rupture = 1 / average_cycle_length
+        attacks_per_second.mutilate = (envenoms_per_second + attacks_per_second.rupture) * muts_per_finisher
 
         if self.talents.cold_blood:
             envenoms_per_cold_blood = 120 * envenoms_per_second
-            crit_rates['envenom'] = ((envenoms_per_cold_blood - 1) * crit_rates['envenom'] + 1) / envenoms_per_cold_blood
+            crit_rates.envenom = ((envenoms_per_cold_blood - 1) * crit_rates.envenom + 1) / envenoms_per_cold_blood
 
-        attacks_per_second['envenom'] = [finisher_chance * envenoms_per_second for finisher_chance in finisher_size_breakdown]
+        attacks_per_second.envenom = [finisher_chance * envenoms_per_second for finisher_chance in finisher_size_breakdown]
 
-        attacks_per_second['rupture_ticks'] = [0, 0, 0, 0, 0, 0]
+        attacks_per_second.rupture_ticks = [0, 0, 0, 0, 0, 0]
         for i in xrange(1, 6):
             ticks_per_rupture = 3 + i + 2 * self.glyphs.rupture
-            attacks_per_second['rupture_ticks'][i] = ticks_per_rupture * attacks_per_second['rupture'] * finisher_size_breakdown[i]
+            attacks_per_second.rupture_ticks[i] = ticks_per_rupture * attacks_per_second.rupture * finisher_size_breakdown[i]
 
-        total_rupture_ticks = sum(attacks_per_second['rupture_ticks'])
-        attacks_per_second['venomous_wounds'] = total_rupture_ticks * .3 * self.talents.venomous_wounds * self.spell_hit_chance()
+        total_rupture_ticks = sum(attacks_per_second.rupture_ticks)
+        attacks_per_second.venomous_wounds = total_rupture_ticks * .3 * self.talents.venomous_wounds * self.spell_hit_chance()
 
-        attacks_per_second['mh_autoattacks'] = attack_speed_multiplier / self.stats.mh.speed
-        attacks_per_second['oh_autoattacks'] = attack_speed_multiplier / self.stats.oh.speed
+        attacks_per_second.mh_autoattacks = attack_speed_multiplier / self.stats.mh.speed
+        attacks_per_second.oh_autoattacks = attack_speed_multiplier / self.stats.oh.speed
 
-        attacks_per_second['mh_autoattack_hits'] = attacks_per_second['mh_autoattacks'] * self.dual_wield_mh_hit_chance()
-        attacks_per_second['oh_autoattack_hits'] = attacks_per_second['oh_autoattacks'] * self.dual_wield_oh_hit_chance()
+        attacks_per_second.mh_autoattack_hits = attacks_per_second.mh_autoattacks * self.dual_wield_mh_hit_chance()
+        attacks_per_second.oh_autoattack_hits = attacks_per_second.oh_autoattacks * self.dual_wield_oh_hit_chance()
 
-        total_mh_hits_per_second = attacks_per_second['mh_autoattack_hits'] + attacks_per_second['mutilate'] + envenoms_per_second + attacks_per_second['rupture']
-        total_oh_hits_per_second = attacks_per_second['oh_autoattack_hits'] + attacks_per_second['mutilate']
+        total_mh_hits_per_second = attacks_per_second.mh_autoattack_hits + attacks_per_second.mutilate + envenoms_per_second + attacks_per_second.rupture
+        total_oh_hits_per_second = attacks_per_second.oh_autoattack_hits + attacks_per_second.mutilate
 
         if self.settings.mh_poison == 'ip':
             ip_base_proc_rate = .3 * self.stats.mh.speed / 1.4
@@ -628,7 +797,7 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         dp_base_proc_rate = .5
         dp_envenom_proc_rate = dp_base_proc_rate + .15
 
-        envenom_uptime = min(sum([(1+cps) * attacks_per_second['envenom'][cps] for cps in xrange(1,6)]), 1)
+        envenom_uptime = min(sum([(1+cps) * attacks_per_second.envenom[cps] for cps in xrange(1,6)]), 1)
         avg_ip_proc_rate = ip_base_proc_rate * (1 - envenom_uptime) + ip_envenom_proc_rate * envenom_uptime
         avg_dp_proc_rate = dp_base_proc_rate * (1 - envenom_uptime) + dp_envenom_proc_rate * envenom_uptime
 
@@ -639,8 +808,8 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
             mh_poison_procs = avg_dp_proc_rate * total_mh_hits_per_second
             oh_poison_procs = avg_ip_proc_rate * total_oh_hits_per_second
 
-        attacks_per_second['instant_poison'] = (mh_poison_procs + oh_poison_procs) * self.spell_hit_chance()
-        attacks_per_second['deadly_poison'] = 1./3
+        attacks_per_second.instant_poison = (mh_poison_procs + oh_poison_procs) * self.spell_hit_chance()
+        attacks_per_second.deadly_poison = 1./3
 
         return attacks_per_second, crit_rates
 
@@ -660,19 +829,17 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         if backstab_crit_rate > 1:
             backstab_crit_rate = 1.
 
-        crit_rates = {
-            'mh_autoattacks': min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE),
-            'oh_autoattacks': min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE),
-            'backstab': backstab_crit_rate,
-            'envenom': base_melee_crit_rate,
-            'rupture_ticks': base_melee_crit_rate,
-            'venomous_wounds': base_spell_crit_rate,
-            'instant_poison': base_spell_crit_rate,
-            'deadly_poison': base_spell_crit_rate
-        }
-
-        backstab_energy_cost = 48 + 12 / self.one_hand_melee_hit_chance()
-        backstab_energy_cost -= 15 * self.talents.murderous_intent
+        crit_rates = attack_record.AttackRecord()
+        crit_rates.mh_autoattacks = min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.oh_autoattacks = min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.backstab = backstab_crit_rate
+        crit_rates.envenom = base_melee_crit_rate
+        crit_rates.rupture_ticks = base_melee_crit_rate
+        crit_rates.venomous_wounds = base_spell_crit_rate
+        crit_rates.instant_poison = base_spell_crit_rate
+        crit_rates.deadly_poison = base_spell_crit_rate
+
+        backstab_energy_cost = self.energy_cost_per_hit('backstab', self.one_hand_melee_hit_chance())
         if self.glyphs.backstab:
             backstab_energy_cost -= 5 * backstab_crit_rate
 
@@ -701,34 +868,34 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         envenom_energy_cost = bs_per_finisher * backstab_energy_cost + self.envenom_energy_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp
         envenoms_per_cycle = energy_for_envenoms / envenom_energy_cost
 
-        attacks_per_second = {}
+        attacks_per_second = attack_record.AttackRecord()
 
         envenoms_per_second = envenoms_per_cycle / average_cycle_length
-        attacks_per_second['rupture'] = 1 / average_cycle_length
-        attacks_per_second['backstab'] = (envenoms_per_second + attacks_per_second['rupture']) * bs_per_finisher
+        attacks_per_second.rupture = 1 / average_cycle_length
+        attacks_per_second.backstab = (envenoms_per_second + attacks_per_second.rupture) * bs_per_finisher
 
         if self.talents.cold_blood:
             envenoms_per_cold_blood = 120 * envenoms_per_second
-            crit_rates['envenom'] = ((envenoms_per_cold_blood - 1) * crit_rates['envenom'] + 1) / envenoms_per_cold_blood
+            crit_rates.envenom = ((envenoms_per_cold_blood - 1) * crit_rates.envenom + 1) / envenoms_per_cold_blood
 
-        attacks_per_second['envenom'] = [finisher_chance * envenoms_per_second for finisher_chance in finisher_size_breakdown]
+        attacks_per_second.envenom = [finisher_chance * envenoms_per_second for finisher_chance in finisher_size_breakdown]
 
-        attacks_per_second['rupture_ticks'] = [0, 0, 0, 0, 0, 0]
+        attacks_per_second.rupture_ticks = [0, 0, 0, 0, 0, 0]
         for i in xrange(1, 6):
             ticks_per_rupture = 3 + i + 2 * self.glyphs.rupture
-            attacks_per_second['rupture_ticks'][i] = ticks_per_rupture * attacks_per_second['rupture'] * finisher_size_breakdown[i]
+            attacks_per_second.rupture_ticks[i] = ticks_per_rupture * attacks_per_second.rupture * finisher_size_breakdown[i]
 
-        total_rupture_ticks = sum(attacks_per_second['rupture_ticks'])
-        attacks_per_second['venomous_wounds'] = total_rupture_ticks * .3 * self.talents.venomous_wounds * self.spell_hit_chance()
+        total_rupture_ticks = sum(attacks_per_second.rupture_ticks)
+        attacks_per_second.venomous_wounds = total_rupture_ticks * .3 * self.talents.venomous_wounds * self.spell_hit_chance()
 
-        attacks_per_second['mh_autoattacks'] = attack_speed_multiplier / self.stats.mh.speed
-        attacks_per_second['oh_autoattacks'] = attack_speed_multiplier / self.stats.oh.speed
+        attacks_per_second.mh_autoattacks = attack_speed_multiplier / self.stats.mh.speed
+        attacks_per_second.oh_autoattacks = attack_speed_multiplier / self.stats.oh.speed
 
-        attacks_per_second['mh_autoattack_hits'] = attacks_per_second['mh_autoattacks'] * self.dual_wield_mh_hit_chance()
-        attacks_per_second['oh_autoattack_hits'] = attacks_per_second['oh_autoattacks'] * self.dual_wield_oh_hit_chance()
+        attacks_per_second.mh_autoattack_hits = attacks_per_second.mh_autoattacks * self.dual_wield_mh_hit_chance()
+        attacks_per_second.oh_autoattack_hits = attacks_per_second.oh_autoattacks * self.dual_wield_oh_hit_chance()
 
-        total_mh_hits_per_second = attacks_per_second['mh_autoattack_hits'] + attacks_per_second['backstab'] + envenoms_per_second + attacks_per_second['rupture']
-        total_oh_hits_per_second = attacks_per_second['oh_autoattack_hits']
+        total_mh_hits_per_second = attacks_per_second.mh_autoattack_hits + attacks_per_second.backstab + envenoms_per_second + attacks_per_second.rupture
+        total_oh_hits_per_second = attacks_per_second.oh_autoattack_hits
 
         if self.settings.mh_poison == 'ip':
             ip_base_proc_rate = .3 * self.stats.mh.speed / 1.4
@@ -740,7 +907,7 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         dp_base_proc_rate = .5
         dp_envenom_proc_rate = dp_base_proc_rate + .15
 
-        envenom_uptime = min(sum([(1+cps) * attacks_per_second['envenom'][cps] for cps in xrange(1,6)]), 1)
+        envenom_uptime = min(sum([(1+cps) * attacks_per_second.envenom[cps] for cps in xrange(1,6)]), 1)
         avg_ip_proc_rate = ip_base_proc_rate * (1 - envenom_uptime) + ip_envenom_proc_rate * envenom_uptime
         avg_dp_proc_rate = dp_base_proc_rate * (1 - envenom_uptime) + dp_envenom_proc_rate * envenom_uptime
 
@@ -751,8 +918,8 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
             mh_poison_procs = avg_dp_proc_rate * total_mh_hits_per_second
             oh_poison_procs = avg_ip_proc_rate * total_oh_hits_per_second
 
-        attacks_per_second['instant_poison'] = (mh_poison_procs + oh_poison_procs) * self.spell_hit_chance()
-        attacks_per_second['deadly_poison'] = 1./3
+        attacks_per_second.instant_poison = (mh_poison_procs + oh_poison_procs) * self.spell_hit_chance()
+        attacks_per_second.deadly_poison = 1./3
 
         return attacks_per_second, crit_rates
 
@@ -763,7 +930,25 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
     def combat_dps_estimate(self):
         return sum(self.combat_dps_breakdown().values())
 
-    def combat_dps_breakdown(self):
+    def init_combat(self):
+        # The combat counterpart of init_assassination; combat_dps_breakdown
+        # calls it for you.
+        setup_inputs = self.setup_inputs('combat')
+        if setup_inputs != self.setup_key:
+            self.init_combat_inputs()
+            self.setup_key = setup_inputs
+
+        self.set_constants()
+
+        self.strike_hit_chance = self.one_hand_melee_hit_chance()
+
+        self.base_rupture_energy_cost = self.energy_cost_per_hit('rupture', self.strike_hit_chance)
+        self.base_eviscerate_energy_cost = self.energy_cost_per_hit('eviscerate', self.strike_hit_chance)
+        self.base_revealing_strike_energy_cost = self.energy_cost_per_hit('revealing_strike', self.strike_hit_chance)
+        self.base_sinister_strike_energy_cost = self.energy_cost_per_hit('sinister_strike', self.strike_hit_chance)
+
+    def init_combat_inputs(self):
+        # The part of init_combat that doesn't depend on the ratings.
         if self.settings.cycle._cycle_type != 'combat':
             raise InputNotModeledException(_('You must specify a combat cycle to match your combat spec.'))
 
@@ -773,29 +958,28 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         if not self.talents.revealing_strike and self.settings.cycle.use_revealing_strike != 'never':
             raise InputNotModeledException(_('Cannot specify revealing strike usage in cycle without taking the talent.'))
 
-        self.set_constants()
+        self.set_input_constants()
 
         if self.talents.bandits_guile:
             self.max_bandits_guile_buff = 1.3
         else:
             self.max_bandits_guile_buff = 1
 
-        self.strike_hit_chance = self.one_hand_melee_hit_chance()
-
-        self.base_rupture_energy_cost = 25 / self.strike_hit_chance
-        self.base_eviscerate_energy_cost = 35 / self.strike_hit_chance
-        self.base_revealing_strike_energy_cost = 32 + 8 / self.strike_hit_chance
-        self.base_sinister_strike_energy_cost = 36 + 9 / self.strike_hit_chance - 2 * self.talents.improved_sinister_strike
-
         self.base_energy_regen = 12.5
+        self.lightning_reflexes_speed_multiplier = 1 + .02 * self.talents.lightning_reflexes
+        self.killing_spree_damage_multiplier = 1.2 + .1 * self.glyphs.killing_spree
+        self.revealing_strike_damage_multiplier = 1.2 + .1 * self.glyphs.revealing_strike
+
+    def combat_dps_breakdown(self):
+        self.init_combat()
 
         damage_breakdown = self.compute_damage(self.combat_attack_counts)
         for key in damage_breakdown:
             if key == 'killing_spree':
                 if self.settings.cycle.ksp_immediately:
-                    damage_breakdown[key] *= self.bandits_guile_multiplier * (1.2 + .1 * self.glyphs.killing_spree)
+                    damage_breakdown[key] *= self.bandits_guile_multiplier * self.killing_spree_damage_multiplier
                 else:
-                    damage_breakdown[key] *= self.max_bandits_guile_buff * (1.2 + .1 * self.glyphs.killing_spree)
+                    damage_breakdown[key] *= self.max_bandits_guile_buff * self.killing_spree_damage_multiplier
             elif key in ('sinister_strike', 'revealing_strike'):
                 damage_breakdown[key] *= self.bandits_guile_multiplier
             elif key == 'eviscerate':
@@ -808,25 +992,25 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         return damage_breakdown
 
     def combat_attack_counts(self, current_stats):
-        attacks_per_second = {}
+        attacks_per_second = attack_record.AttackRecord()
 
         base_melee_crit_rate = self.melee_crit_rate(agi=current_stats['agi'], crit=current_stats['crit'])
         base_spell_crit_rate = self.spell_crit_rate(crit=current_stats['crit'])
 
         haste_multiplier = self.stats.get_haste_multiplier_from_rating(current_stats['haste'])
 
-        attack_speed_multiplier = self.base_speed_multiplier * haste_multiplier * (1 + .02 * self.talents.lightning_reflexes)
+        attack_speed_multiplier = self.base_speed_multiplier * haste_multiplier * self.lightning_reflexes_speed_multiplier
 
-        attacks_per_second['mh_autoattacks'] = attack_speed_multiplier / self.stats.mh.speed
-        attacks_per_second['oh_autoattacks'] = attack_speed_multiplier / self.stats.oh.speed
+        attacks_per_second.mh_autoattacks = attack_speed_multiplier / self.stats.mh.speed
+        attacks_per_second.oh_autoattacks = attack_speed_multiplier / self.stats.oh.speed
 
-        attacks_per_second['mh_autoattack_hits'] = attacks_per_second['mh_autoattacks'] * self.dual_wield_mh_hit_chance()
-        attacks_per_second['oh_autoattack_hits'] = attacks_per_second['oh_autoattacks'] * self.dual_wield_oh_hit_chance()
+        attacks_per_second.mh_autoattack_hits = attacks_per_second.mh_autoattacks * self.dual_wield_mh_hit_chance()
+        attacks_per_second.oh_autoattack_hits = attacks_per_second.oh_autoattacks * self.dual_wield_oh_hit_chance()
 
         main_gauche_proc_rate = .02 * self.stats.get_mastery_from_rating(current_stats['mastery']) * self.off_hand_melee_hit_chance()
-        attacks_per_second['main_gauche'] = main_gauche_proc_rate * attacks_per_second['mh_autoattacks']
+        attacks_per_second.main_gauche = main_gauche_proc_rate * attacks_per_second.mh_autoattacks
 
-        autoattack_cp_regen = self.talents.combat_potency * (attacks_per_second['oh_autoattack_hits'] + attacks_per_second['main_gauche'])
+        autoattack_cp_regen = self.talents.combat_potency * (attacks_per_second.oh_autoattack_hits + attacks_per_second.main_gauche)
         energy_regen = self.base_energy_regen * haste_multiplier + self.bonus_energy_regen + autoattack_cp_regen
 
         rupture_energy_cost = self.base_rupture_energy_cost - main_gauche_proc_rate * self.talents.combat_potency
@@ -834,20 +1018,19 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         revealing_strike_energy_cost = self.base_revealing_strike_energy_cost - main_gauche_proc_rate * self.talents.combat_potency
         sinister_strike_energy_cost = self.base_sinister_strike_energy_cost - main_gauche_proc_rate * self.talents.combat_potency
 
-        crit_rates = {
-            'mh_autoattacks': min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE),
-            'oh_autoattacks': min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE),
-            'main_gauche': base_melee_crit_rate,
-            'sinister_strike': base_melee_crit_rate + self.stats.gear_buffs.rogue_t11_2pc_crit_bonus(),
-            'revealing_strike': base_melee_crit_rate,
-            'eviscerate': base_melee_crit_rate + .1 * self.glyphs.eviscerate,
-            'mh_killing_spree': base_melee_crit_rate,
-            'oh_killing_spree': base_melee_crit_rate,
-            'rupture_ticks': base_melee_crit_rate,
-            'instant_poison': base_spell_crit_rate,
-            'deadly_poison': base_spell_crit_rate,
-            'wound_poison': base_spell_crit_rate
-        }
+        crit_rates = attack_record.AttackRecord()
+        crit_rates.mh_autoattacks = min(base_melee_crit_rate, self.dual_wield_mh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.oh_autoattacks = min(base_melee_crit_rate, self.dual_wield_oh_hit_chance() - self.GLANCE_RATE)
+        crit_rates.main_gauche = base_melee_crit_rate
+        crit_rates.sinister_strike = base_melee_crit_rate + self.stats.gear_buffs.rogue_t11_2pc_crit_bonus()
+        crit_rates.revealing_strike = base_melee_crit_rate
+        crit_rates.eviscerate = base_melee_crit_rate + .1 * self.glyphs.eviscerate
+        crit_rates.mh_killing_spree = base_melee_crit_rate
+        crit_rates.oh_killing_spree = base_melee_crit_rate
+        crit_rates.rupture_ticks = base_melee_crit_rate
+        crit_rates.instant_poison = base_spell_crit_rate
+        crit_rates.deadly_poison = base_spell_crit_rate
+        crit_rates.wound_poison = base_spell_crit_rate
 
         extra_cp_chance = 0
         if self.glyphs.sinister_strike:
@@ -896,15 +1079,15 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
                 cp_per_finisher += actual_cps * probability
                 finisher_size_breakdown[actual_cps] += probability
 
-        self.revealing_strike_multiplier = (1 + (.2 + .1 * self.glyphs.revealing_strike) * rvs_per_finisher)
+        self.revealing_strike_multiplier = (1 + (self.revealing_strike_damage_multiplier - 1) * rvs_per_finisher)
 
         energy_cost_to_generate_cps = rvs_per_finisher * revealing_strike_energy_cost + ss_per_finisher * sinister_strike_energy_cost
         total_eviscerate_cost = energy_cost_to_generate_cps + eviscerate_energy_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp
         total_rupture_cost = energy_cost_to_generate_cps + rupture_energy_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp
 
-        ss_per_snd = (total_eviscerate_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp + 25) / sinister_strike_energy_cost
+        ss_per_snd = (total_eviscerate_cost - cp_per_finisher * self.relentless_strikes_energy_return_per_cp + self.energy_cost('slice_and_dice')) / sinister_strike_energy_cost
         snd_size = ss_per_snd * (1 + extra_cp_chance) + .2 * self.talents.ruthlessness
-        snd_cost = ss_per_snd * sinister_strike_energy_cost + 25 - snd_size * self.relentless_strikes_energy_return_per_cp
+        snd_cost = ss_per_snd * sinister_strike_energy_cost + self.energy_cost('slice_and_dice') - snd_size * self.relentless_strikes_energy_return_per_cp
 
         snd_duration = 6 + 3 * snd_size
         if self.glyphs.slice_and_dice:
@@ -916,15 +1099,15 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         avg_rupture_gap = (total_rupture_cost - .5 * total_eviscerate_cost) / energy_regen
         avg_rupture_duration = 2 * (3 + 2 * self.glyphs.rupture + cp_per_finisher)
         if self.settings.cycle.use_rupture:
-            attacks_per_second['rupture'] = 1 / (avg_rupture_duration + avg_rupture_gap)
+            attacks_per_second.rupture = 1 / (avg_rupture_duration + avg_rupture_gap)
         else:
-            attacks_per_second['rupture'] = 0
-        energy_spent_on_rupture = total_rupture_cost * attacks_per_second['rupture']
+            attacks_per_second.rupture = 0
+        energy_spent_on_rupture = total_rupture_cost * attacks_per_second.rupture
 
         energy_available_for_evis = energy_regen - energy_spent_on_snd - energy_spent_on_rupture
         evis_per_second = energy_available_for_evis / total_eviscerate_cost
 
-        cp_spent_on_damage_finishers_per_second = (attacks_per_second['rupture'] + evis_per_second) * cp_per_finisher
+        cp_spent_on_damage_finishers_per_second = (attacks_per_second.rupture + evis_per_second) * cp_per_finisher
 
         if self.talents.adrenaline_rush:
             ar_duration = 15 + 5 * self.glyphs.adrenaline_rush
@@ -942,18 +1125,24 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
         ar_uptime = ar_duration / ar_actual_cooldown
         ar_autoattack_multiplier = 1 + .2 * ar_uptime
 
-        for attack in ('mh_autoattacks', 'mh_autoattack_hits', 'oh_autoattacks', 'oh_autoattack_hits', 'main_gauche'):
-            attacks_per_second[attack] *= ar_autoattack_multiplier
+        attacks_per_second.mh_autoattacks *= ar_autoattack_multiplier
+        attacks_per_second.mh_autoattack_hits *= ar_autoattack_multiplier
+        attacks_per_second.oh_autoattacks *= ar_autoattack_multiplier
+        attacks_per_second.oh_autoattack_hits *= ar_autoattack_multiplier
+        attacks_per_second.main_gauche *= ar_autoattack_multiplier
 
-        total_restless_blades_benefit = (total_evis_per_second + attacks_per_second['rupture']) * cp_per_finisher * self.talents.restless_blades
-        ksp_cooldown = 120 / total_restless_blades_benefit + self.settings.response_time
+        total_restless_blades_benefit = (total_evis_per_second + attacks_per_second.rupture) * cp_per_finisher * self.talents.restless_blades
+        # Restless Blades takes total_restless_blades_benefit seconds off the
+        # cooldown every second, so it comes around 1 + that times faster -
+        # the same as adrenaline rush above.
+        ksp_cooldown = 120 / (1 + total_restless_blades_benefit) + self.settings.response_time
 
-        attacks_per_second['sinister_strike'] = (total_evis_per_second + attacks_per_second['rupture']) * ss_per_finisher + ss_per_snd / (snd_duration - self.settings.response_time)
-        attacks_per_second['revealing_strike'] = (total_evis_per_second + attacks_per_second['rupture']) * rvs_per_finisher
-        attacks_per_second['main_gauche'] += (attacks_per_second['sinister_strike'] + attacks_per_second['rupture'] + total_evis_per_second + attacks_per_second['rupture']) * main_gauche_proc_rate
+        attacks_per_second.sinister_strike = (total_evis_per_second + attacks_per_second.rupture) * ss_per_finisher + ss_per_snd / (snd_duration - self.settings.response_time)
+        attacks_per_second.revealing_strike = (total_evis_per_second + attacks_per_second.rupture) * rvs_per_finisher
+        attacks_per_second.main_gauche += (attacks_per_second.sinister_strike + attacks_per_second.rupture + total_evis_per_second + attacks_per_second.rupture) * main_gauche_proc_rate
 
         if self.talents.bandits_guile:
-            time_at_level = 9 / ((attacks_per_second['sinister_strike'] + attacks_per_second['revealing_strike']) * self.talents.bandits_guile)
+            time_at_level = 9 / ((attacks_per_second.sinister_strike + attacks_per_second.revealing_strike) * self.talents.bandits_guile)
             cycle_duration = 3 * time_at_level + 15
             if not self.settings.cycle.ksp_immediately:
                 avg_wait_till_full_stack = 1.5 * time_at_level / cycle_duration
@@ -964,32 +1153,32 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
             self.bandits_guile_multiplier = 1
 
         if self.talents.killing_spree:
-            attacks_per_second['mh_killing_spree'] = 5 * self.strike_hit_chance / ksp_cooldown
-            attacks_per_second['oh_killing_spree'] = 5 * self.one_hand_melee_hit_chance() / ksp_cooldown
+            attacks_per_second.mh_killing_spree = 5 * self.strike_hit_chance / ksp_cooldown
+            attacks_per_second.oh_killing_spree = 5 * self.one_hand_melee_hit_chance() / ksp_cooldown
             ksp_uptime = 2. / ksp_cooldown
 
-            ksp_buff = .2 + .1 * self.glyphs.killing_spree
+            ksp_buff = self.killing_spree_damage_multiplier - 1
             if self.settings.cycle.ksp_immediately:
                 self.ksp_multiplier = 1 + ksp_uptime * ksp_buff
             else:
                 self.ksp_multiplier = 1 + ksp_uptime * ksp_buff * self.max_bandits_guile_buff / self.bandits_guile_multiplier
         else:
-            attacks_per_second['mh_killing_spree'] = 0
-            attacks_per_second['oh_killing_spree'] = 0
+            attacks_per_second.mh_killing_spree = 0
+            attacks_per_second.oh_killing_spree = 0
             self.ksp_multiplier = 1
 
-        attacks_per_second['eviscerate'] = [finisher_chance * total_evis_per_second for finisher_chance in finisher_size_breakdown]
+        attacks_per_second.eviscerate = [finisher_chance * total_evis_per_second for finisher_chance in finisher_size_breakdown]
 
-        attacks_per_second['rupture_ticks'] = [0, 0, 0, 0, 0, 0]
+        attacks_per_second.rupture_ticks = [0, 0, 0, 0, 0, 0]
         for i in xrange(1, 6):
             ticks_per_rupture = 3 + i + 2 * self.glyphs.rupture
-            attacks_per_second['rupture_ticks'][i] = ticks_per_rupture * attacks_per_second['rupture'] * finisher_size_breakdown[i]
+            attacks_per_second.rupture_ticks[i] = ticks_per_rupture * attacks_per_second.rupture * finisher_size_breakdown[i]
 
-        total_mh_hits = attacks_per_second['mh_autoattack_hits'] + attacks_per_second['sinister_strike'] + attacks_per_second['revealing_strike'] + attacks_per_second['mh_killing_spree'] + attacks_per_second['rupture'] + total_evis_per_second
-        total_oh_hits = attacks_per_second['oh_autoattack_hits'] + attacks_per_second['main_gauche'] + attacks_per_second['oh_killing_spree']
+        total_mh_hits = attacks_per_second.mh_autoattack_hits + attacks_per_second.sinister_strike + attacks_per_second.revealing_strike + attacks_per_second.mh_killing_spree + attacks_per_second.rupture + total_evis_per_second
+        total_oh_hits = attacks_per_second.oh_autoattack_hits + attacks_per_second.main_gauche + attacks_per_second.oh_killing_spree
 
         if self.settings.mh_poison == 'dp' or self.settings.oh_poison == 'dp':
-            attacks_per_second['deadly_poison'] = 1./3
+            attacks_per_second.deadly_poison = 1./3
 
         if self.settings.mh_poison == 'ip':
             mh_proc_rate = self.stats.mh.speed / 7.
@@ -1010,14 +1199,14 @@ class AldrianasRogueDamageCalculator(RogueDamageCalculator):
 
         poison_setup = self.settings.mh_poison + self.settings.oh_poison
         if poison_setup in ['ipip', 'ipdp', 'dpip']:
-            attacks_per_second['instant_poison'] = mh_poison_procs + oh_poison_procs
+            attacks_per_second.instant_poison = mh_poison_procs + oh_poison_procs
         elif poison_setup in ['wpwp', 'wpdp', 'dpwp']:
-            attacks_per_second['wound_poison'] = mh_poison_procs + oh_poison_procs
+            attacks_per_second.wound_poison = mh_poison_procs + oh_poison_procs
         elif poison_setup == 'ipwp':
-            attacks_per_second['instant_poison'] = mh_poison_procs
-            attacks_per_second['wound_poison'] = oh_poison_procs
+            attacks_per_second.instant_poison = mh_poison_procs
+            attacks_per_second.wound_poison = oh_poison_procs
         elif poison_setup == 'wpip':
-            attacks_per_second['wound_poison'] = mh_poison_procs
-            attacks_per_second['instant_poison'] = oh_poison_procs
+            attacks_per_second.wound_poison = mh_poison_procs
+            attacks_per_second.instant_poison = oh_poison_procs
 
         return attacks_per_second, crit_rates
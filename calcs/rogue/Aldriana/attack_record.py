@@ -0,0 +1,85 @@
+import operator
+
+class AttackRecord(object):
+    # Per-ability numbers passed from the attack count functions to the proc
+    # and damage breakdown functions: one record for attacks per second, one
+    # for crit rates.  Every record has the same fixed set of fields, so the
+    # producers and consumers share one layout instead of building and
+    # hashing string-keyed dicts on every convergence iteration.
+    #
+    # Abilities a cycle doesn't use are left at 0, except for finishers,
+    # which are broken down by combo points: their attack counts are lists
+    # indexed by combo points (with index 0 unused), and they're None when
+    # the cycle never uses them.  Crit rate records hold a single number per
+    # ability, finishers included.  Damaging procs are named by the gear, so
+    # their attack counts live in the damage_procs dict, keyed by proc name.
+
+    ABILITIES = (
+        'mh_autoattacks',
+        'oh_autoattacks',
+        'mh_autoattack_hits',
+        'oh_autoattack_hits',
+        'mutilate',
+        'backstab',
+        'sinister_strike',
+        'revealing_strike',
+        'ambush',
+        'hemorrhage',
+        'main_gauche',
+        'mh_killing_spree',
+        'oh_killing_spree',
+        'rupture',
+        'rupture_ticks',
+        'envenom',
+        'eviscerate',
+        'venomous_wounds',
+        'instant_poison',
+        'deadly_poison',
+        'wound_poison'
+    )
+
+    FINISHERS = ('rupture_ticks', 'envenom', 'eviscerate')
+
+    __slots__ = ABILITIES + ('damage_procs',)
+
+    def __init__(self):
+        self.mh_autoattacks = 0
+        self.oh_autoattacks = 0
+        self.mh_autoattack_hits = 0
+        self.oh_autoattack_hits = 0
+        self.mutilate = 0
+        self.backstab = 0
+        self.sinister_strike = 0
+        self.revealing_strike = 0
+        self.ambush = 0
+        self.hemorrhage = 0
+        self.main_gauche = 0
+        self.mh_killing_spree = 0
+        self.oh_killing_spree = 0
+        self.rupture = 0
+        self.rupture_ticks = None
+        self.envenom = None
+        self.eviscerate = None
+        self.venomous_wounds = 0
+        self.instant_poison = 0
+        self.deadly_poison = 0
+        self.wound_poison = 0
+        self.damage_procs = {}
+
+    def values(self):
+        # The value of every ability, in ABILITIES order.
+        return get_all_abilities(self)
+
+    def items(self):
+        # (ability, value) pairs for the abilities that are set, mostly for
+        # inspecting a record by hand.
+        return [(ability, value) for ability, value in zip(self.ABILITIES, self.values()) if value]
+
+
+# Getters for groups of fields, so that the proc functions can pull every
+# ability of a kind from a record in one call.
+get_all_abilities = operator.attrgetter(*AttackRecord.ABILITIES)
+get_mh_strikes = operator.attrgetter('mutilate', 'backstab', 'revealing_strike', 'sinister_strike', 'ambush', 'hemorrhage', 'mh_killing_spree')
+get_mh_finishers = operator.attrgetter('envenom', 'eviscerate')
+get_oh_strikes = operator.attrgetter('mutilate', 'main_gauche', 'oh_killing_spree')
+get_harmful_spells = operator.attrgetter('instant_poison', 'wound_poison', 'venomous_wounds')
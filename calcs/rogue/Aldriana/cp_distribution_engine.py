@@ -0,0 +1,101 @@
+from core import lru_cache
+
+class CPDistributionEngine(object):
+    # Works out the combo point distribution of a finisher cycle: given the
+    # distribution of combo points gained per builder and the minimum number
+    # of combo points we finish at, returns {(cps, builders used): chance}.
+    # Ruthlessness can start us off at 1 combo point.
+    #
+    # The builder loop is an absorbing Markov chain over 0-5 combo points;
+    # we push the state vector through its transition matrix one builder at
+    # a time and read off the mass that lands at or above the target.
+    # Results are cached on (per-builder distribution, target, Ruthlessness
+    # rank) with LRU eviction.  Builders with two outcomes (every builder
+    # the model uses) have their probability snapped to a fine grid, with
+    # the result interpolated between the neighbouring grid points: Seal Fate
+    # rates drift a little on every convergence iteration, and this lets
+    # them keep hitting the cache.  Set grid_step to None for exact lookups.
+
+    MAX_CP = 5
+
+    def __init__(self, max_entries=1024, grid_step=10 ** -6):
+        self.cache = lru_cache.LRUCache(max_entries)
+        self.grid_step = grid_step
+
+    def get_distribution(self, cp_distribution_per_move, target_cp_quantity, ruthlessness_rank):
+        moves = tuple(sorted(cp_distribution_per_move.items()))
+
+        for move_cp, move_prob in moves:
+            if type(move_prob) not in (int, float):
+                # Dual numbers and the like can't be cached or interpolated.
+                return self.solve(moves, target_cp_quantity, ruthlessness_rank)
+
+        if self.grid_step and len(moves) == 2 and abs(moves[0][1] + moves[1][1] - 1) < 10 ** -12:
+            return self.get_interpolated_distribution(moves, target_cp_quantity, ruthlessness_rank)
+
+        key = (moves, target_cp_quantity, ruthlessness_rank)
+        distribution = self.cache.get(key)
+        if distribution is None:
+            distribution = self.solve(moves, target_cp_quantity, ruthlessness_rank)
+            self.cache.put(key, distribution)
+        return dict(distribution)
+
+    def get_interpolated_distribution(self, moves, target_cp_quantity, ruthlessness_rank):
+        ((low_cp, probability), (high_cp, unused)) = moves
+        grid_points = int(round(1. / self.grid_step))
+        lower_index = min(int(probability * grid_points), grid_points)
+        weight = probability * grid_points - lower_index
+
+        lower = self.get_grid_distribution(low_cp, high_cp, lower_index, target_cp_quantity, ruthlessness_rank)
+        if weight <= 0 or lower_index == grid_points:
+            return dict(lower)
+        upper = self.get_grid_distribution(low_cp, high_cp, lower_index + 1, target_cp_quantity, ruthlessness_rank)
+
+        distribution = {}
+        for entry, chance in lower.items():
+            distribution[entry] = chance * (1 - weight)
+        for entry, chance in upper.items():
+            distribution[entry] = distribution.get(entry, 0) + chance * weight
+        return distribution
+
+    def get_grid_distribution(self, low_cp, high_cp, index, target_cp_quantity, ruthlessness_rank):
+        key = (low_cp, high_cp, index, target_cp_quantity, ruthlessness_rank)
+        distribution = self.cache.get(key)
+        if distribution is None:
+            probability = index * 1. / int(round(1. / self.grid_step))
+            moves = ((low_cp, probability), (high_cp, 1 - probability))
+            distribution = self.solve(moves, target_cp_quantity, ruthlessness_rank)
+            self.cache.put(key, distribution)
+        return distribution
+
+    def solve(self, moves, target_cp_quantity, ruthlessness_rank):
+        # transition[cps][new_cps] is the chance a builder used at cps leaves
+        # us at new_cps.  Only states below the target ever use a builder.
+        states = range(self.MAX_CP + 1)
+        transition = [[0] * len(states) for cps in states]
+        for cps in xrange(target_cp_quantity):
+            for move_cp, move_prob in moves:
+                transition[cps][min(cps + move_cp, self.MAX_CP)] += move_prob
+
+        ruthlessness_chance = ruthlessness_rank * .2
+        state = [0] * len(states)
+        state[0] = 1 - ruthlessness_chance
+        state[1] = ruthlessness_chance
+
+        # Every builder gives at least one combo point, so nothing is left
+        # below the target after target_cp_quantity builders.
+        distribution = {}
+        for builders in xrange(target_cp_quantity + 1):
+            for cps in xrange(target_cp_quantity, len(states)):
+                if state[cps] != 0:
+                    distribution[(cps, builders)] = state[cps]
+            new_state = [0] * len(states)
+            for cps in xrange(target_cp_quantity):
+                if state[cps] != 0:
+                    row = transition[cps]
+                    for new_cps in states:
+                        if row[new_cps] != 0:
+                            new_state[new_cps] += state[cps] * row[new_cps]
+            state = new_state
+
+        return distribution
@@ -0,0 +1,133 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import math
+
+from calcs.rogue.Aldriana import simulator
+from core import exceptions
+from core import executors
+
+# Runs simulated fights (see simulator) until the mean DPS is known well
+# enough: fights go out in batches across executor's workers, each batch's
+# mean and variance are merged into the running totals, and the run stops
+# as soon as the confidence interval on the mean DPS is no wider than the
+# requested width.  A stable build stops after a few batches; a proc-heavy
+# one keeps going for as long as it needs, up to max_iterations.
+#
+# Fight number i of a run always has the seed simulator.fight_seed(seed, i),
+# and batches are merged in order, with the stopping rule checked after
+# each one; so a run's result depends on its seed and batch size, never on
+# how many processes ran it or how the batches were shared out.  Batches a
+# round ran past the stopping point are discarded.
+
+# Two-sided normal quantiles for the supported confidence levels.
+Z_VALUES = {.9: 1.6449, .95: 1.9600, .99: 2.5758}
+
+class RunningStats(object):
+    # The count, mean and sum of squared deviations of a series of values,
+    # updated one value at a time (Welford) and merged with another series'
+    # (Chan et al.) without keeping the values themselves.
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.
+        self.squares = 0.
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.squares += delta * (value - self.mean)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.squares += other.squares + delta * delta * self.count * other.count / count
+        self.count = count
+
+    def variance(self):
+        # The sample variance.
+        if self.count < 2:
+            return 0.
+        return self.squares / (self.count - 1)
+
+    def standard_error(self):
+        if not self.count:
+            return 0.
+        return math.sqrt(self.variance() / self.count)
+
+
+class MonteCarloRunner(object):
+    def __init__(self, calculator, executor=None, seed=0, batch_size=25, confidence=.95):
+        if confidence not in Z_VALUES:
+            raise exceptions.InvalidInputException(_('Confidence must be one of {levels}').format(levels=sorted(Z_VALUES)))
+        if batch_size < 2:
+            raise exceptions.InvalidInputException(_('Batches must have at least 2 fights'))
+        self.simulator = simulator.Simulator(calculator)
+        self.executor = executor or executors.SerialExecutor()
+        self.seed = seed
+        self.batch_size = batch_size
+        self.z = Z_VALUES[confidence]
+
+    def interval_width(self, stats):
+        return 2 * self.z * stats.standard_error()
+
+    def run(self, width, max_iterations=10000):
+        # Simulates until the confidence interval on the mean DPS is at most
+        # width wide, or max_iterations fights (rounded up to whole batches)
+        # have run.  Returns a dict with the mean dps, its interval (low,
+        # high), the sample standard deviation, the number of iterations,
+        # whether the interval converged, and the mean per-source dps
+        # breakdown.
+        if width <= 0:
+            raise exceptions.InvalidInputException(_('The interval width must be positive'))
+        stats = RunningStats()
+        breakdown = {}
+        batch_count = -(-max_iterations // self.batch_size)
+        batches_per_round = getattr(self.executor, 'processes', 1)
+        next_batch = 0
+        converged = False
+        while next_batch < batch_count and not converged:
+            batches = range(next_batch, min(next_batch + batches_per_round, batch_count))
+            tasks = [(self.simulator, self.seed, batch * self.batch_size, self.batch_size) for batch in batches]
+            for batch_stats, batch_breakdown in self.executor.map(simulate_batch, tasks):
+                stats.merge(batch_stats)
+                for source, damage in batch_breakdown.items():
+                    breakdown[source] = breakdown.get(source, 0) + damage
+                next_batch += 1
+                if stats.count >= 2 * self.batch_size and self.interval_width(stats) <= width:
+                    converged = True
+                    break
+
+        half_width = self.interval_width(stats) / 2
+        for source in breakdown:
+            breakdown[source] /= stats.count
+        return {
+            'dps': stats.mean,
+            'interval': (stats.mean - half_width, stats.mean + half_width),
+            'standard_deviation': math.sqrt(stats.variance()),
+            'iterations': stats.count,
+            'converged': converged,
+            'breakdown': breakdown
+        }
+
+
+def simulate_batch(task):
+    # Worker for MonteCarloRunner.run: task is (simulator, seed, first
+    # iteration, iterations).  Lives at module level so process pools can
+    # pickle it.  Returns the batch's RunningStats of DPS and its summed
+    # per-source breakdown.
+    fight_simulator, seed, first, iterations = task
+    stats = RunningStats()
+    breakdown = {}
+    for iteration in xrange(first, first + iterations):
+        result = fight_simulator.run(simulator.fight_seed(seed, iteration))
+        stats.add(result['dps'])
+        for source, dps in result['breakdown'].items():
+            breakdown[source] = breakdown.get(source, 0) + dps
+    return stats, breakdown
@@ -0,0 +1,288 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import hashlib
+import json
+import os
+
+from calcs.rogue.Aldriana import AldrianasRogueDamageCalculator
+from calcs.rogue.Aldriana import InputNotModeledException
+from calcs.rogue.Aldriana import settings
+from core import exceptions
+from core import executors
+from objects import buffs
+from objects import procs
+from objects import race
+from objects import stats
+from objects.rogue import rogue_glyphs
+from objects.rogue import rogue_talents
+
+# Builds calculators from plain dicts (decoded JSON, typically), so that
+# callers outside Python - or just outside this process - can describe a
+# character without constructing the objects themselves.  A profile looks
+# like:
+#
+#     {
+#         "stats": {"str": 20, "agi": 4755, "ap": 190, "crit": 1034,
+#                   "hit": 1333, "exp": 778, "haste": 1447, "mastery": 936},
+#         "mh": {"damage": 939.5, "speed": 1.8, "type": "dagger", "enchant": "landslide"},
+#         "oh": {"damage": 730.5, "speed": 1.4, "type": "dagger", "enchant": "landslide"},
+#         "ranged": {"damage": 1371.5, "speed": 2.2, "type": "thrown"},
+#         "procs": ["heroic_prestors_talisman_of_machination", "fluid_death"],
+#         "gear_buffs": ["rogue_t11_2pc", "leather_specialization"],
+#         "talents": ["0333230113022110321", "0020000000000000000", "2030030000000000000"],
+#         "glyphs": ["backstab", "mutilate", "rupture"],
+#         "race": "night_elf",
+#         "buffs": ["short_term_haste_buff", "stat_multiplier_buff"],
+#         "settings": {"cycle": {"type": "assassination", "min_envenom_size_mutilate": 4},
+#                      "response_time": 1},
+#         "level": 85
+#     }
+#
+# ranged, procs, gear_buffs, glyphs, buffs and level are optional; so is
+# everything in settings but the cycle type.  The other cycle and settings
+# entries are the keyword arguments of the corresponding classes in
+# calcs.rogue.Aldriana.settings.
+
+class InvalidProfileException(exceptions.InvalidInputException):
+    pass
+
+
+PROFILE_KEYS = frozenset(['stats', 'mh', 'oh', 'ranged', 'procs', 'gear_buffs', 'talents', 'glyphs', 'race', 'buffs', 'settings', 'level'])
+STAT_KEYS = ('str', 'agi', 'ap', 'crit', 'hit', 'exp', 'haste', 'mastery')
+WEAPON_KEYS = frozenset(['damage', 'speed', 'type', 'enchant'])
+CYCLES = {
+    'assassination': settings.AssassinationCycle,
+    'combat': settings.CombatCycle
+}
+
+def build_calculator(profile):
+    check_keys(profile, PROFILE_KEYS, ('stats', 'mh', 'oh', 'talents', 'race', 'settings'), 'profile')
+
+    profile_stats = profile['stats']
+    check_keys(profile_stats, STAT_KEYS, STAT_KEYS, 'stats')
+    ratings = [profile_stats[stat] for stat in STAT_KEYS]
+
+    mh = build_weapon(profile['mh'], 'mh')
+    oh = build_weapon(profile['oh'], 'oh')
+    ranged = None
+    if profile.get('ranged') is not None:
+        ranged = build_weapon(profile['ranged'], 'ranged')
+
+    check_names(profile.get('gear_buffs', ()), stats.GearBuffs.allowed_buffs, 'gear buff')
+    gear_buffs = stats.GearBuffs(*profile.get('gear_buffs', ()))
+    level = profile.get('level', 85)
+    profile_procs = procs.ProcsList(*profile.get('procs', ()))
+    character_stats = stats.Stats(*(ratings + [mh, oh, ranged, profile_procs, gear_buffs]), level=level)
+
+    if len(profile['talents']) != 3:
+        raise InvalidProfileException(_('Expected three talent strings, got {count}').format(count=len(profile['talents'])))
+    talents = rogue_talents.RogueTalents(*[str(talent_string) for talent_string in profile['talents']])
+
+    check_names(profile.get('glyphs', ()), rogue_glyphs.RogueGlyphs.allowed_glyphs, 'glyph')
+    glyphs = rogue_glyphs.RogueGlyphs(*profile.get('glyphs', ()))
+    character_buffs = buffs.Buffs(*profile.get('buffs', ()), level=level)
+    character_race = race.Race(str(profile['race']), level=level)
+
+    return AldrianasRogueDamageCalculator(character_stats, talents, glyphs, character_buffs, character_race, build_settings(profile['settings']), level)
+
+def build_weapon(weapon, slot):
+    check_keys(weapon, WEAPON_KEYS, ('damage', 'speed', 'type'), slot)
+    enchant = weapon.get('enchant')
+    if enchant is not None:
+        check_names([enchant], stats.Weapon.allowed_melee_enchants, 'enchant')
+        if weapon['type'] in ('gun', 'bow', 'crossbow', 'thrown'):
+            raise InvalidProfileException(_('Ranged weapons cannot have enchant {enchant}').format(enchant=enchant))
+        enchant = str(enchant)
+    return stats.Weapon(weapon['damage'], weapon['speed'], str(weapon['type']), enchant)
+
+def build_settings(profile_settings):
+    profile_settings = dict(profile_settings)
+    cycle = profile_settings.pop('cycle', None)
+    if not isinstance(cycle, dict) or cycle.get('type') not in CYCLES:
+        raise InvalidProfileException(_('settings.cycle.type must be one of {types}').format(types=', '.join(sorted(CYCLES))))
+    cycle = dict(cycle)
+    cycle_class = CYCLES[cycle.pop('type')]
+    try:
+        return settings.Settings(cycle_class(**keyword_arguments(cycle)), **keyword_arguments(profile_settings))
+    except (AssertionError, TypeError) as e:
+        raise InvalidProfileException(_('Invalid settings: {error}').format(error=str(e) or repr(e)))
+
+def keyword_arguments(values):
+    # JSON decodes keys as unicode, which Python 2.6 won't take as keyword
+    # argument names; string values (poisons, Revealing Strike usage) are
+    # compared against str constants.
+    arguments = {}
+    for key, value in values.items():
+        if isinstance(value, unicode):
+            value = str(value)
+        arguments[str(key)] = value
+    return arguments
+
+def check_keys(values, allowed, required, name):
+    if not isinstance(values, dict):
+        raise InvalidProfileException(_('{name} must be an object').format(name=name))
+    for key in values:
+        if key not in allowed:
+            raise InvalidProfileException(_('Unknown key {key} in {name}').format(key=key, name=name))
+    for key in required:
+        if key not in values:
+            raise InvalidProfileException(_('Missing key {key} in {name}').format(key=key, name=name))
+
+def check_names(names, allowed, kind):
+    for name in names:
+        if name not in allowed:
+            raise InvalidProfileException(_('Invalid {kind} {name}').format(kind=kind, name=name))
+
+# What evaluate can compute; breakdown is the DPS breakdown for the spec.
+EVALUATIONS = ('dps', 'ep', 'breakdown')
+
+def check_evaluation(what):
+    if what not in EVALUATIONS:
+        raise exceptions.InvalidInputException(_('Cannot evaluate {what}; expected one of {evaluations}').format(what=what, evaluations=', '.join(EVALUATIONS)))
+
+def evaluate(calculator, what='dps'):
+    if what == 'dps':
+        return calculator.get_dps()
+    elif what == 'ep':
+        return calculator.get_ep()
+    elif what == 'breakdown':
+        if calculator.talents.is_assassination_rogue():
+            calculator.init_assassination()
+            return calculator.assassination_dps_breakdown()
+        elif calculator.talents.is_combat_rogue():
+            return calculator.combat_dps_breakdown()
+        else:
+            raise InputNotModeledException(_('Damage breakdowns are only modeled for assassination and combat.'))
+    else:
+        check_evaluation(what)
+
+def parse_request(line, default_what='dps'):
+    # Decodes one request, as used by batch.py and server.py: a JSON
+    # profile, optionally with an "id" and a "what" overriding default_what.
+    # Returns (request_id, profile, what); request_id is None if absent.
+    request = json.loads(line)
+    if not isinstance(request, dict):
+        raise exceptions.InvalidInputException(_('Each request must be a JSON object'))
+    request_id = request.pop('id', None)
+    what = request.pop('what', default_what)
+    return request_id, request, what
+
+def request_key(profile, what):
+    # Equal for requests that must evaluate to the same thing.
+    return json.dumps([profile, what], sort_keys=True)
+
+def describe_error(error):
+    # The message reported back for a failed request.  Anything other than
+    # invalid input - bad JSON, or a profile the model trips over - gets the
+    # exception's name too.
+    if isinstance(error, exceptions.InvalidInputException):
+        return unicode(error)
+    return u'{name}: {error}'.format(name=type(error).__name__, error=unicode(error))
+
+def evaluate_many(profiles, what='dps', executor=None):
+    # Builds and evaluates a calculator for each of profiles, returning an
+    # iterator over the results in the same order.  executor decides where
+    # the work happens (see core.executors); by default it's all done here,
+    # one profile after another, while
+    #
+    #     with executors.ProcessPoolExecutor() as executor:
+    #         dps_values = list(profiles.evaluate_many(gear_sets, executor=executor))
+    #
+    # spreads it across every CPU.  Only the profile dicts travel to the
+    # workers; the calculators are built there.  An invalid profile raises
+    # when its result is reached.
+    check_evaluation(what)
+    if executor is None:
+        executor = executors.SerialExecutor()
+    return executor.map(evaluate_profile, [(profile, what) for profile in profiles])
+
+def evaluate_profile(task):
+    # Worker for evaluate_many (and server.py): task is (profile, what).
+    # Lives at module level so process pools can pickle it.
+    profile, what = task
+    return evaluate(build_calculator(profile), what)
+
+# The packages whose source determines the model: any change to them
+# changes model_version, and so every cache key.
+MODEL_PACKAGES = ('calcs', 'objects')
+
+_model_version = None
+
+def model_version():
+    # A hash of the source of MODEL_PACKAGES, computed once per process.
+    global _model_version
+    if _model_version is None:
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir, os.pardir)
+        source = hashlib.sha1()
+        for package in MODEL_PACKAGES:
+            for directory, subdirectories, files in sorted(os.walk(os.path.join(root, package))):
+                subdirectories.sort()
+                for name in sorted(files):
+                    if name.endswith('.py'):
+                        path = os.path.join(directory, name)
+                        source.update(os.path.relpath(path, root).replace(os.sep, '/') + '\0')
+                        module = open(path, 'rb')
+                        try:
+                            source.update(module.read())
+                        finally:
+                            module.close()
+        _model_version = source.hexdigest()
+    return _model_version
+
+def describe_calculator(calculator):
+    # Everything about calculator's inputs that affects its results, as
+    # plain data in a canonical form: the same character gives the same
+    # description however its objects were built (buffs in any order, agi
+    # as 4755 or 4755., talents from strings or keywords).
+    character_stats = calculator.stats
+    description = {
+        'level': calculator.level,
+        'stats': dict([(stat, float(getattr(character_stats, stat))) for stat in STAT_KEYS]),
+        'mh': describe_weapon(character_stats.mh),
+        'oh': describe_weapon(character_stats.oh),
+        'ranged': describe_weapon(character_stats.ranged),
+        'procs': active_names(character_stats.procs, procs.ProcsList.allowed_procs),
+        'gear_buffs': active_names(character_stats.gear_buffs, stats.GearBuffs.allowed_buffs),
+        'talents': dict([(talent, getattr(calculator.talents, talent)) for talent in calculator.talents.treeForTalent]),
+        'glyphs': active_names(calculator.glyphs, rogue_glyphs.RogueGlyphs.allowed_glyphs),
+        'race': calculator.race.race_name,
+        'buffs': active_names(calculator.buffs, buffs.Buffs.allowed_buffs),
+        'settings': None
+    }
+    if calculator.settings is not None:
+        description['settings'] = dict(vars(calculator.settings))
+        description['settings']['cycle'] = dict(vars(calculator.settings.cycle))
+        description['settings']['cycle']['type'] = calculator.settings.cycle._cycle_type
+    return description
+
+def describe_weapon(weapon):
+    if weapon is None:
+        return None
+    return {
+        'speed': float(weapon.speed),
+        'weapon_dps': float(weapon.weapon_dps),
+        'type': weapon.type,
+        'enchants': active_names(weapon, stats.Weapon.allowed_melee_enchants)
+    }
+
+def active_names(holder, allowed):
+    if holder is None:
+        return []
+    return sorted([name for name in allowed if getattr(holder, name)])
+
+def cache_key(calculator, what='dps'):
+    description = json.dumps([model_version(), what, describe_calculator(calculator)], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(description).hexdigest()
+
+def evaluate_cached(calculator, what, cache):
+    # evaluate, but looked up in (and saved to) cache, which is a
+    # core.result_cache.ResultCache or anything else with get and put.
+    key = cache_key(calculator, what)
+    result = cache.get(key)
+    if result is None:
+        result = evaluate(calculator, what)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,874 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import heapq
+import random
+
+from calcs.rogue.Aldriana import InputNotModeledException
+
+# An event-driven simulation of the fights the analytic model averages
+# over, to check it against: swings, the rotation, combo points, energy,
+# procs (with their ICDs and stacks), poisons, bleeds and cooldowns play out
+# on a heap of timed events over settings.duration, with every random roll
+# drawn from a generator seeded per fight, so that a fight is reproducible
+# from its seed.
+#
+# The simulator takes everything it can from its calculator: the hit and
+# crit tables, the damage formulas (which it calls with the stats of the
+# moment), and the constants init_assassination/init_combat and
+# set_constants work out.  The rotation follows the same rules as the
+# analytic cycles (finisher sizes, rupture priority, revealing strike
+# usage, when killing spree goes), and the things the analytic model
+# averages without modeling them in time, namely activated gear boosts and
+# tricks of the trade, stay averaged here too.  Deadly poison applications
+# at full stacks apply the other weapon's poison instead, as the analytic
+# model assumes.
+#
+# The simulated DPS still differs from the analytic model's, because of
+# what the model, a steady state, leaves out.  A fight starts with full
+# energy and every cooldown ready, worth about 1% more over five minutes and
+# less the longer the fight.  The assassination cycles always rupture at
+# envenom size, whatever prioritize_rupture_uptime says, so prioritizing
+# uptime simulates 1-2% higher.  Combat keeps slice and dice up all fight
+# and refreshes it at full size, where the rotation here lets it drop and
+# refreshes it with whatever combo points there are, for about 2% less.
+# test_matches_analytic_model checks the agreement that's left.
+#
+# Typical use:
+#     simulator = Simulator(calculator)
+#     result = simulator.run(seed)       # one fight
+#     result = simulator.average(200)    # the mean of 200 seeded fights
+#     dps_values = simulator.distribution(1000)
+# (monte_carlo.MonteCarloRunner runs as many as a confidence interval needs)
+# where a result is a dict with the dps, the per-source dps breakdown, and
+# the average stacks of every proc over the fight.
+#
+# The fights a simulator runs share whatever doesn't depend on their rolls,
+# so each fight after the first costs less: the talents and glyphs are
+# copied into plain attributes once, and everything derived from the stats
+# (attack power, crit rates, haste, every ability's damage) is worked out
+# once per combination of proc stacks - there are only so many of those -
+# and kept in stat_states for every later fight that reaches it.
+
+GCD = 1.
+MAX_ENERGY = 100.
+# Waits for energy end this close to the cost, so that rounding can't
+# leave the rotation waiting on ever smaller amounts.
+ENERGY_TOLERANCE = 1e-6
+MAX_COMBO_POINTS = 5
+RUPTURE_TICK_INTERVAL = 2.
+DEADLY_POISON_TICK_INTERVAL = 3.
+DEADLY_POISON_DURATION = 12.
+DEADLY_POISON_MAX_STACKS = 5
+HEROISM_DURATION = 40.
+HEROISM_INTERVAL = 600.
+KILLING_SPREE_HITS = 5
+KILLING_SPREE_INTERVAL = .5
+
+PROC_STATS = ('agi', 'ap', 'crit', 'haste', 'mastery')
+DAMAGE_PROC_STATS = ('spell_damage', 'physical_damage')
+
+# The talents and glyphs the fights read.
+SIMULATED_TALENTS = ('adrenaline_rush', 'bandits_guile', 'cold_blood', 'combat_potency', 'improved_slice_and_dice',
+                     'killing_spree', 'overkill', 'puncturing_wounds', 'restless_blades', 'ruthlessness', 'seal_fate',
+                     'vendetta', 'venomous_wounds')
+SIMULATED_GLYPHS = ('adrenaline_rush', 'backstab', 'eviscerate', 'rupture', 'sinister_strike', 'slice_and_dice')
+
+# The events that can trigger procs: autoattack and strike hits of either
+# hand (finishers count as main hand strikes), debuff applications,
+# harmful spells, periodic spell damage and bleed ticks.
+TRIGGERS = ('mh_auto', 'oh_auto', 'mh_strike', 'oh_strike', 'debuff', 'spell', 'periodic', 'bleed')
+
+def fight_seed(seed, iteration):
+    # The seed of fight number iteration of the series seeded seed.  Every
+    # (seed, iteration) pair gets its own, so no two series share a fight,
+    # and a fight's rolls don't depend on which process runs it.
+    return (seed << 32) + iteration
+
+
+class Simulator(object):
+    def __init__(self, calculator):
+        talents = calculator.talents
+        if talents.is_assassination_rogue():
+            calculator.init_assassination()
+            self.spec = 'assassination'
+        elif talents.is_combat_rogue():
+            calculator.init_combat()
+            self.spec = 'combat'
+        else:
+            raise InputNotModeledException(_('Simulations are only modeled for assassination and combat.'))
+
+        self.calculator = calculator
+        settings = calculator.settings
+        self.duration = settings.duration
+        self.response_time = settings.response_time
+        self.cycle = settings.cycle
+
+        self.base_stats = dict(calculator.base_stats)
+        self.agi_multiplier = calculator.agi_multiplier
+        self.base_strength = calculator.base_strength
+        self.ap_multiplier = calculator.buffs.attack_power_multiplier() * (1 + .01 * talents.savage_combat)
+        self.relentless_strikes_chance = calculator.relentless_strikes_energy_return_per_cp / 25.
+
+        # The calculator averages heroism, overkill and cold blood over the
+        # fight; the fights use them as they come up, so their averages come
+        # back out.  Cut to the Chase keeps slice and dice up for
+        # assassination, while combat's comes and goes (see swing).
+        self.base_energy_regen = calculator.base_energy_regen - calculator.overkill_energy_regen
+        self.bonus_energy_regen = calculator.bonus_energy_regen - calculator.cold_blood_energy_regen
+        self.speed_multiplier = calculator.base_speed_multiplier / calculator.get_heroism_haste_multiplier()
+        self.slice_and_dice_speed_multiplier = calculator.SLICE_AND_DICE_SPEED_MULTIPLIER
+        if self.spec == 'combat':
+            self.ap_multiplier *= calculator.VITALITY_AP_MULTIPLIER
+            self.speed_multiplier *= calculator.lightning_reflexes_speed_multiplier / self.slice_and_dice_speed_multiplier
+        self.heroism = bool(calculator.buffs.short_term_haste_buff)
+
+        # Ability costs and damage bonuses, as the model has them.  What a
+        # miss refunds is the cost less what the model says it loses.
+        self.energy_costs = dict((ability, calculator.energy_cost(ability)) for ability in calculator.ENERGY_COSTS)
+        self.miss_refunds = dict((ability, cost - calculator.miss_energy_loss(ability)) for (ability, cost) in self.energy_costs.items())
+        if self.spec == 'assassination':
+            self.vendetta_damage_multiplier = calculator.VENDETTA_DAMAGE_MULTIPLIER
+            self.vendetta_duration = calculator.vendetta_duration
+            self.vendetta_cooldown = calculator.VENDETTA_COOLDOWN
+        else:
+            self.killing_spree_damage_multiplier = calculator.killing_spree_damage_multiplier
+            self.revealing_strike_damage_multiplier = calculator.revealing_strike_damage_multiplier
+
+        self.strike_hit_chance = calculator.one_hand_melee_hit_chance()
+        self.off_hand_hit_chance = calculator.off_hand_melee_hit_chance()
+        self.autoattack_hit_chances = {'mh': calculator.dual_wield_mh_hit_chance(), 'oh': calculator.dual_wield_oh_hit_chance()}
+        self.spell_hit_chance = calculator.spell_hit_chance()
+        self.glance_rate = calculator.GLANCE_RATE
+        self.glance_multiplier = calculator.GLANCE_MULTIPLIER
+        self.t11_crit_bonus = calculator.stats.gear_buffs.rogue_t11_2pc_crit_bonus()
+        self.weapons = {'mh': calculator.stats.mh, 'oh': calculator.stats.oh}
+
+        self.talents = Snapshot(talents, SIMULATED_TALENTS)
+        self.glyphs = Snapshot(calculator.glyphs, SIMULATED_GLYPHS)
+        self.set_poisons()
+        self.set_procs()
+        self.stat_states = {}
+
+    def set_poisons(self):
+        # Per hand: the poison, its chance per hit, and that chance with
+        # envenom up (assassination only).
+        settings = self.calculator.settings
+        self.poisons = {'mh': settings.mh_poison, 'oh': settings.oh_poison}
+        self.poison_chances = {}
+        self.envenom_poison_chances = {}
+        for hand, poison in self.poisons.items():
+            speed = self.weapons[hand].speed
+            if self.spec == 'assassination':
+                if poison == 'ip':
+                    chance = .3 * speed / 1.4
+                    envenom_chance = chance * 1.5
+                else:
+                    chance = .5
+                    envenom_chance = chance + .15
+            else:
+                if poison == 'ip':
+                    chance = speed / 7.
+                elif poison == 'wp':
+                    chance = speed / 2.8
+                elif poison == 'dp':
+                    chance = .3
+                else:
+                    chance = 0
+                envenom_chance = chance
+            self.poison_chances[hand] = chance
+            self.envenom_poison_chances[hand] = envenom_chance
+
+    def set_procs(self):
+        # self.procs lists the modeled procs; self.triggered maps each
+        # trigger to the indices of the procs it can fire.
+        calculator = self.calculator
+        procs = []
+        for proc in calculator.stats.procs.get_all_procs_for_stat():
+            if proc.stat in PROC_STATS or proc.stat in DAMAGE_PROC_STATS:
+                procs.append((proc, None))
+            elif proc is calculator.stats.procs.unheeded_warning:
+                procs.append((proc, None))
+        for hand in ('mh', 'oh'):
+            weapon = self.weapons[hand]
+            for enchant in ('landslide', 'hurricane'):
+                proc = getattr(weapon, enchant)
+                if proc:
+                    procs.append((proc, hand))
+
+        self.procs = []
+        self.triggered = dict([(trigger, []) for trigger in TRIGGERS])
+        for index, (proc, hand) in enumerate(procs):
+            if proc.proc_chance is None:
+                raise InputNotModeledException(_('The proc rate of {proc} is unknown').format(proc=proc.proc_name))
+            self.procs.append((proc, hand))
+            if hand != 'oh':
+                if proc.procs_off_auto_attacks():
+                    self.triggered['mh_auto'].append(index)
+                if proc.procs_off_strikes():
+                    self.triggered['mh_strike'].append(index)
+                if proc.procs_off_apply_debuff() and not proc.procs_off_crit_only():
+                    self.triggered['debuff'].append(index)
+            if hand != 'mh':
+                if proc.procs_off_auto_attacks():
+                    self.triggered['oh_auto'].append(index)
+                if proc.procs_off_strikes():
+                    self.triggered['oh_strike'].append(index)
+            if hand is None:
+                if proc.procs_off_harmful_spells():
+                    self.triggered['spell'].append(index)
+                if proc.procs_off_periodic_spell_damage():
+                    self.triggered['periodic'].append(index)
+                if proc.procs_off_bleeds():
+                    self.triggered['bleed'].append(index)
+
+    def get_stat_state(self, proc_stacks):
+        # The StatState for a tuple of stacks of each of self.procs.
+        state = self.stat_states.get(proc_stacks)
+        if state is None:
+            stats = dict(self.base_stats)
+            for (proc, hand), stacks in zip(self.procs, proc_stacks):
+                if stacks and proc.stat in PROC_STATS:
+                    stats[proc.stat] += proc.value * stacks
+            state = StatState(self, stats)
+            self.stat_states[proc_stacks] = state
+        return state
+
+    def run(self, seed=None):
+        # Simulates one fight with its rolls drawn from a generator seeded
+        # with seed.
+        return Fight(self, random.Random(seed)).run()
+
+    def average(self, iterations, seed=0):
+        # The mean result of the first iterations fights of the series
+        # seeded seed (see fight_seed).
+        dps = 0
+        breakdown = {}
+        proc_stacks = {}
+        for iteration in xrange(iterations):
+            result = self.run(fight_seed(seed, iteration))
+            dps += result['dps'] / iterations
+            for source, value in result['breakdown'].items():
+                breakdown[source] = breakdown.get(source, 0) + value / iterations
+            for name, value in result['proc_stacks'].items():
+                proc_stacks[name] = proc_stacks.get(name, 0) + value / iterations
+        return {'dps': dps, 'breakdown': breakdown, 'proc_stacks': proc_stacks}
+
+    def distribution(self, iterations, seed=0):
+        # The DPS of each of the first iterations fights of the series
+        # seeded seed, in order.
+        return [self.run(fight_seed(seed, iteration))['dps'] for iteration in xrange(iterations)]
+
+
+class Snapshot(object):
+    # Copies of the named attributes of source, which read much faster than
+    # the talent and glyph classes' __getattr__.
+
+    def __init__(self, source, names):
+        for name in names:
+            setattr(self, name, getattr(source, name))
+
+
+class StatState(object):
+    # What a fight needs from one set of stats.  damage caches each
+    # ability's (normal, crit) damage, filled in as fights ask for it.
+
+    def __init__(self, simulator, stats):
+        calculator = simulator.calculator
+        agi = stats['agi'] * simulator.agi_multiplier
+        self.attack_power = (stats['ap'] + 2 * agi + simulator.base_strength) * simulator.ap_multiplier
+        self.mastery = stats['mastery']
+        self.melee_crit_rate = calculator.melee_crit_rate(agi=agi, crit=stats['crit'])
+        self.spell_crit_rate = calculator.spell_crit_rate(crit=stats['crit'])
+        self.haste_multiplier = calculator.stats.get_haste_multiplier_from_rating(stats['haste'])
+        self.damage = {}
+
+
+class Fight(object):
+    # The state of one simulated fight.  Events are (time, sequence,
+    # handler, argument) tuples on a heap; the sequence number keeps
+    # same-time events in the order they were scheduled.  Timed buffs and
+    # the rotation's pending decision carry tokens, so that an event
+    # scheduled for a buff or decision that has since been replaced can
+    # recognize itself as stale and do nothing.
+
+    def __init__(self, simulator, rng):
+        self.simulator = simulator
+        self.calculator = simulator.calculator
+        self.talents = simulator.talents
+        self.glyphs = simulator.glyphs
+        self.random = rng.random
+
+        self.events = []
+        self.sequence = 0
+        self.now = 0.
+        self.damage = {}
+
+        self.energy = MAX_ENERGY
+        self.energy_time = 0.
+        self.combo_points = 0
+        self.decision_token = 0
+        self.waiting = False
+        self.busy_until = 0.
+
+        # Buffs, debuffs and cooldowns.
+        self.heroism_active = False
+        self.overkill_active = False
+        self.adrenaline_rush_active = False
+        self.killing_spree_active = False
+        self.vendetta_active = False
+        self.slice_and_dice_end = -1.
+        self.slice_and_dice_token = 0
+        self.envenom_end = -1.
+        self.rupture_token = 0
+        self.rupture_active = False
+        self.revealing_strike_active = False
+        self.cold_blood_active = False
+        self.cold_blood_ready = 0.
+        self.vendetta_ready = 0.
+        self.overkill_ready = 0.
+        self.adrenaline_rush_ready = 0.
+        self.killing_spree_ready = 0.
+        self.bandits_guile_stacks = 0
+        self.deadly_poison_stacks = 0
+        self.deadly_poison_end = -1.
+        self.deadly_poison_ticking = False
+
+        proc_count = len(simulator.procs)
+        self.proc_stacks = [0] * proc_count
+        self.proc_tokens = [0] * proc_count
+        self.proc_ready = [0.] * proc_count
+        self.proc_stack_time = [0.] * proc_count
+        self.proc_changed = [0.] * proc_count
+        self.update_stats()
+        self.autoattack_multiplier = 1.
+        self.update_damage_multiplier()
+
+    def schedule(self, delay, handler, argument=None):
+        self.sequence += 1
+        heapq.heappush(self.events, (self.now + delay, self.sequence, handler, argument))
+
+    def run(self):
+        duration = self.simulator.duration
+        if self.simulator.heroism:
+            self.schedule(0, self.start_heroism)
+        self.schedule(0, self.swing, 'mh')
+        self.schedule(0, self.swing, 'oh')
+        self.schedule(0, self.decide, self.decision_token)
+
+        events = self.events
+        while events:
+            time, sequence, handler, argument = heapq.heappop(events)
+            if time >= duration:
+                break
+            self.now = time
+            handler(argument)
+        self.now = duration
+
+        breakdown = {}
+        for source, damage in self.damage.items():
+            breakdown[source] = damage / duration
+        proc_stacks = {}
+        for index, (proc, hand) in enumerate(self.simulator.procs):
+            self.proc_stack_time[index] += self.proc_stacks[index] * (duration - self.proc_changed[index])
+            name = proc.proc_name
+            if hand is not None:
+                name = hand + '_' + name
+            proc_stacks[name] = proc_stacks.get(name, 0) + self.proc_stack_time[index] / duration
+        return {'dps': sum(breakdown.values()), 'breakdown': breakdown, 'proc_stacks': proc_stacks}
+
+    # Stats.
+
+    def update_stats(self):
+        state = self.simulator.get_stat_state(tuple(self.proc_stacks))
+        self.attack_power = state.attack_power
+        self.mastery = state.mastery
+        self.melee_crit_rate = state.melee_crit_rate
+        self.spell_crit_rate = state.spell_crit_rate
+        self.haste_multiplier = state.haste_multiplier
+        self.damage_cache = state.damage
+
+    def get_damage(self, name, function, *arguments):
+        # (normal, crit) damage of an ability at the current stats.
+        key = (name,) + arguments
+        damage = self.damage_cache.get(key)
+        if damage is None:
+            damage = function(self.attack_power, *arguments)
+            self.damage_cache[key] = damage
+        return damage
+
+    def update_damage_multiplier(self):
+        multiplier = 1.
+        if self.vendetta_active:
+            multiplier *= self.simulator.vendetta_damage_multiplier
+        if self.killing_spree_active:
+            multiplier *= self.simulator.killing_spree_damage_multiplier
+        multiplier *= 1 + .1 * self.bandits_guile_level()
+        self.damage_multiplier = multiplier
+
+    def deal(self, source, damage):
+        self.damage[source] = self.damage.get(source, 0) + damage * self.damage_multiplier
+
+    def roll_damage(self, source, damage, crit_rate):
+        # Deals normal or crit damage; returns whether it crit.
+        crit = self.random() < crit_rate
+        self.deal(source, damage[crit])
+        return crit
+
+    # Energy and the rotation.
+
+    def energy_regen(self):
+        regen = self.simulator.base_energy_regen * self.haste_multiplier + self.simulator.bonus_energy_regen
+        if self.adrenaline_rush_active:
+            regen += 10 * self.haste_multiplier
+        if self.overkill_active:
+            regen += 3
+        return regen
+
+    def update_energy(self):
+        self.energy = min(MAX_ENERGY, self.energy + self.energy_regen() * (self.now - self.energy_time))
+        self.energy_time = self.now
+
+    def gain_energy(self, amount):
+        self.update_energy()
+        self.energy = min(MAX_ENERGY, self.energy + amount)
+        if self.waiting:
+            self.wake(0)
+
+    def spend_energy(self, amount):
+        self.update_energy()
+        self.energy -= amount
+
+    def wake(self, delay):
+        self.decision_token += 1
+        self.schedule(delay, self.decide, self.decision_token)
+
+    def decide(self, token):
+        if token != self.decision_token:
+            return
+        self.use_cooldowns()
+        action, cost = self.choose()
+        self.update_energy()
+        if self.energy < cost - ENERGY_TOLERANCE:
+            self.waiting = True
+            self.wake((cost - self.energy) / self.energy_regen())
+            return
+        self.waiting = False
+        self.busy_until = self.now + GCD
+        action()
+        self.wake(self.busy_until - self.now)
+
+    def use_cooldowns(self):
+        now = self.now
+        response_time = self.simulator.response_time
+        if self.talents.overkill and now >= self.overkill_ready:
+            self.overkill_ready = now + 180 + response_time
+            self.update_energy()
+            self.overkill_active = True
+            self.schedule(20, self.end_overkill)
+        if self.talents.vendetta and now >= self.vendetta_ready:
+            self.vendetta_ready = now + self.simulator.vendetta_cooldown + response_time
+            self.vendetta_active = True
+            self.update_damage_multiplier()
+            self.schedule(self.simulator.vendetta_duration, self.end_vendetta)
+        if self.talents.adrenaline_rush and now >= self.adrenaline_rush_ready:
+            self.adrenaline_rush_ready = now + 180 + response_time
+            self.update_energy()
+            self.adrenaline_rush_active = True
+            self.schedule(15 + 5 * self.glyphs.adrenaline_rush, self.end_adrenaline_rush)
+
+    def choose(self):
+        # The next action and the energy it needs.
+        if self.simulator.spec == 'assassination':
+            return self.choose_assassination()
+        return self.choose_combat()
+
+    def choose_assassination(self):
+        cycle = self.simulator.cycle
+        execute = self.now >= (1 - self.calculator.settings.time_in_execute_range) * self.simulator.duration
+        if execute:
+            finisher_size = cycle.min_envenom_size_backstab
+            prioritize_rupture = cycle.prioritize_rupture_uptime_backstab
+        else:
+            finisher_size = cycle.min_envenom_size_mutilate
+            prioritize_rupture = cycle.prioritize_rupture_uptime_mutilate
+        energy_costs = self.simulator.energy_costs
+        if not self.rupture_active and self.combo_points >= (1 if prioritize_rupture else finisher_size):
+            return self.rupture, energy_costs['rupture']
+        if self.combo_points >= finisher_size:
+            return self.envenom, energy_costs['envenom']
+        if execute:
+            return self.backstab, energy_costs['backstab']
+        return self.mutilate, energy_costs['mutilate']
+
+    def choose_combat(self):
+        cycle = self.simulator.cycle
+        energy_costs = self.simulator.energy_costs
+        if self.talents.killing_spree and self.now >= self.killing_spree_ready:
+            if cycle.ksp_immediately or self.bandits_guile_level() == 3 or not self.talents.bandits_guile:
+                return self.killing_spree, 0
+        if self.now >= self.slice_and_dice_end and self.combo_points:
+            return self.slice_and_dice, energy_costs['slice_and_dice']
+        revealing_strike = cycle.use_revealing_strike
+        if not self.revealing_strike_active and revealing_strike != 'never':
+            if self.combo_points == MAX_COMBO_POINTS - 1 or (revealing_strike == 'always' and self.combo_points == MAX_COMBO_POINTS):
+                return self.revealing_strike, energy_costs['revealing_strike']
+        if self.combo_points >= MAX_COMBO_POINTS:
+            if cycle.use_rupture and not self.rupture_active:
+                return self.rupture, energy_costs['rupture']
+            return self.eviscerate, energy_costs['eviscerate']
+        return self.sinister_strike, energy_costs['sinister_strike']
+
+    def strike_lands(self, ability):
+        # Pays for an ability and rolls whether it lands; misses refund
+        # part of the cost.
+        self.spend_energy(self.simulator.energy_costs[ability])
+        if self.random() < self.simulator.strike_hit_chance:
+            return True
+        self.gain_energy(self.simulator.miss_refunds[ability])
+        return False
+
+    def add_combo_points(self, count):
+        self.combo_points = min(MAX_COMBO_POINTS, self.combo_points + count)
+
+    def finish(self, damaging=True):
+        # Spends the combo points; returns how many there were.
+        combo_points = self.combo_points
+        self.combo_points = 0
+        if self.random() < .2 * self.talents.ruthlessness:
+            self.combo_points = 1
+        for combo_point in xrange(combo_points):
+            if self.random() < self.simulator.relentless_strikes_chance:
+                self.gain_energy(25)
+        if damaging and self.talents.restless_blades:
+            reduction = combo_points * self.talents.restless_blades
+            self.adrenaline_rush_ready -= reduction
+            self.killing_spree_ready -= reduction
+        return combo_points
+
+    def weapon_hit(self, hand, trigger, crit):
+        self.trigger_procs(trigger, crit)
+        self.apply_poison(hand)
+
+    def mutilate(self):
+        if not self.strike_lands('mutilate'):
+            return
+        calculator = self.calculator
+        crit_rate = min(self.melee_crit_rate + self.simulator.t11_crit_bonus + .05 * self.talents.puncturing_wounds, 1)
+        seal_fate = False
+        for hand, function in (('mh', calculator.mh_mutilate_damage), ('oh', calculator.oh_mutilate_damage)):
+            crit = self.roll_damage('mutilate', self.get_damage(hand + '_mutilate', function), crit_rate)
+            if crit and self.random() < .5 * self.talents.seal_fate:
+                seal_fate = True
+            self.weapon_hit(hand, hand + '_strike', crit)
+        self.add_combo_points(2 + seal_fate)
+
+    def backstab(self):
+        if not self.strike_lands('backstab'):
+            return
+        crit_rate = min(self.melee_crit_rate + self.simulator.t11_crit_bonus + .1 * self.talents.puncturing_wounds, 1)
+        crit = self.roll_damage('backstab', self.get_damage('backstab', self.calculator.backstab_damage), crit_rate)
+        combo_points = 1
+        if crit:
+            if self.glyphs.backstab:
+                self.gain_energy(5)
+            if self.random() < .5 * self.talents.seal_fate:
+                combo_points += 1
+        self.add_combo_points(combo_points)
+        self.weapon_hit('mh', 'mh_strike', crit)
+
+    def sinister_strike(self):
+        if not self.strike_lands('sinister_strike'):
+            return
+        crit_rate = self.melee_crit_rate + self.simulator.t11_crit_bonus
+        crit = self.roll_damage('sinister_strike', self.get_damage('sinister_strike', self.calculator.sinister_strike_damage), crit_rate)
+        combo_points = 1
+        if self.glyphs.sinister_strike and self.random() < .2:
+            combo_points += 1
+        self.add_combo_points(combo_points)
+        self.add_bandits_guile()
+        self.weapon_hit('mh', 'mh_strike', crit)
+        self.roll_main_gauche()
+
+    def revealing_strike(self):
+        if not self.strike_lands('revealing_strike'):
+            return
+        crit = self.roll_damage('revealing_strike', self.get_damage('revealing_strike', self.calculator.revealing_strike_damage), self.melee_crit_rate)
+        self.add_combo_points(1)
+        self.revealing_strike_active = True
+        self.add_bandits_guile()
+        self.weapon_hit('mh', 'mh_strike', crit)
+
+    def revealing_strike_multiplier(self):
+        if not self.revealing_strike_active:
+            return 1
+        self.revealing_strike_active = False
+        return self.simulator.revealing_strike_damage_multiplier
+
+    def rupture(self):
+        if not self.strike_lands('rupture'):
+            return
+        multiplier = self.revealing_strike_multiplier()
+        combo_points = self.finish()
+        damage = self.get_damage('rupture', self.calculator.rupture_tick_damage, combo_points)
+        self.rupture_token += 1
+        self.rupture_active = True
+        ticks = 3 + combo_points + 2 * self.glyphs.rupture
+        self.schedule(RUPTURE_TICK_INTERVAL, self.rupture_tick, (self.rupture_token, ticks, damage[0] * multiplier, damage[1] * multiplier))
+        self.trigger_procs('debuff', False)
+        self.weapon_hit('mh', 'mh_strike', False)
+        self.roll_main_gauche()
+
+    def rupture_tick(self, argument):
+        token, ticks, normal_damage, crit_damage = argument
+        if token != self.rupture_token:
+            return
+        crit = self.roll_damage('rupture', (normal_damage, crit_damage), self.melee_crit_rate)
+        self.trigger_procs('bleed', crit)
+        if self.talents.venomous_wounds and self.random() < .3 * self.talents.venomous_wounds:
+            self.gain_energy(10)
+            if self.random() < self.simulator.spell_hit_chance:
+                crit = self.roll_damage('venomous_wounds', self.get_damage('venomous_wounds', self.calculator.venomous_wounds_damage, self.mastery), self.spell_crit_rate)
+                self.trigger_procs('spell', crit)
+        if ticks > 1:
+            self.schedule(RUPTURE_TICK_INTERVAL, self.rupture_tick, (token, ticks - 1, normal_damage, crit_damage))
+        else:
+            self.rupture_active = False
+
+    def envenom(self):
+        if self.talents.cold_blood and self.now >= self.cold_blood_ready:
+            self.cold_blood_ready = self.now + 120 + self.simulator.response_time
+            self.cold_blood_active = True
+            self.gain_energy(25)
+        if not self.strike_lands('envenom'):
+            return
+        combo_points = self.finish()
+        crit_rate = self.melee_crit_rate
+        if self.cold_blood_active:
+            self.cold_blood_active = False
+            crit_rate = 1
+        crit = self.roll_damage('envenom', self.get_damage('envenom', self.calculator.envenom_damage, combo_points), crit_rate)
+        self.envenom_end = self.now + 1 + combo_points
+        self.weapon_hit('mh', 'mh_strike', crit)
+
+    def eviscerate(self):
+        if not self.strike_lands('eviscerate'):
+            return
+        multiplier = self.revealing_strike_multiplier()
+        combo_points = self.finish()
+        normal_damage, crit_damage = self.get_damage('eviscerate', self.calculator.eviscerate_damage, combo_points)
+        crit = self.roll_damage('eviscerate', (normal_damage * multiplier, crit_damage * multiplier), self.melee_crit_rate + .1 * self.glyphs.eviscerate)
+        self.weapon_hit('mh', 'mh_strike', crit)
+        self.roll_main_gauche()
+
+    def slice_and_dice(self):
+        self.spend_energy(self.simulator.energy_costs['slice_and_dice'])
+        combo_points = self.finish(damaging=False)
+        duration = 6 + 3 * combo_points + 3 * self.glyphs.slice_and_dice
+        duration *= 1 + .25 * self.talents.improved_slice_and_dice
+        self.slice_and_dice_end = self.now + duration
+
+    def killing_spree(self):
+        self.killing_spree_ready = self.now + 120 + self.simulator.response_time
+        self.killing_spree_active = True
+        self.update_damage_multiplier()
+        self.busy_until = self.now + (KILLING_SPREE_HITS - 1) * KILLING_SPREE_INTERVAL
+        for hit in xrange(KILLING_SPREE_HITS):
+            self.schedule(hit * KILLING_SPREE_INTERVAL, self.killing_spree_hit, hit == KILLING_SPREE_HITS - 1)
+
+    def killing_spree_hit(self, last):
+        calculator = self.calculator
+        for hand, function in (('mh', calculator.mh_killing_spree_damage), ('oh', calculator.oh_killing_spree_damage)):
+            if self.random() < self.simulator.strike_hit_chance:
+                crit = self.roll_damage('killing_spree', self.get_damage(hand + '_killing_spree', function), self.melee_crit_rate)
+                self.weapon_hit(hand, hand + '_strike', crit)
+        if last:
+            self.killing_spree_active = False
+            self.update_damage_multiplier()
+
+    def bandits_guile_level(self):
+        return min(self.bandits_guile_stacks // 3, 3)
+
+    def add_bandits_guile(self):
+        if not self.talents.bandits_guile or self.bandits_guile_stacks >= 9:
+            return
+        if self.random() < self.talents.bandits_guile / 3.:
+            self.bandits_guile_stacks += 1
+            if self.bandits_guile_stacks == 9:
+                self.schedule(15, self.end_bandits_guile)
+            self.update_damage_multiplier()
+
+    def end_bandits_guile(self, argument):
+        self.bandits_guile_stacks = 0
+        self.update_damage_multiplier()
+
+    def roll_main_gauche(self):
+        if self.simulator.spec != 'combat':
+            return
+        mastery = self.calculator.stats.get_mastery_from_rating(self.mastery)
+        if self.random() < .02 * mastery and self.random() < self.simulator.off_hand_hit_chance:
+            crit = self.roll_damage('main_gauche', self.get_damage('main_gauche', self.calculator.main_gauche_damage), self.melee_crit_rate)
+            self.combat_potency()
+            self.weapon_hit('oh', 'oh_strike', crit)
+
+    def combat_potency(self):
+        if self.talents.combat_potency and self.random() < .2:
+            self.gain_energy(5 * self.talents.combat_potency)
+
+    # Autoattacks.
+
+    def swing(self, hand):
+        speed = self.simulator.speed_multiplier * self.haste_multiplier
+        if self.simulator.spec == 'combat' and self.now < self.slice_and_dice_end:
+            speed *= self.simulator.slice_and_dice_speed_multiplier
+        if self.heroism_active:
+            speed *= 1.3
+        if self.adrenaline_rush_active:
+            speed *= 1.2
+        self.schedule(self.simulator.weapons[hand].speed / speed, self.swing, hand)
+
+        roll = self.random()
+        if roll >= self.simulator.autoattack_hit_chances[hand]:
+            if hand == 'mh':
+                self.roll_main_gauche()
+            return
+        if hand == 'mh':
+            damage = self.get_damage('mh', self.calculator.mh_damage)
+        else:
+            damage = self.get_damage('oh', self.calculator.oh_damage)
+        multiplier = self.autoattack_multiplier
+        crit = False
+        if roll < self.simulator.glance_rate:
+            self.deal('autoattack', damage[0] * self.simulator.glance_multiplier * multiplier)
+        elif roll < self.simulator.glance_rate + self.melee_crit_rate:
+            crit = True
+            self.deal('autoattack', damage[1] * multiplier)
+        else:
+            self.deal('autoattack', damage[0] * multiplier)
+        self.weapon_hit(hand, hand + '_auto', crit)
+        if hand == 'mh':
+            self.roll_main_gauche()
+        else:
+            self.combat_potency()
+
+    # Poisons.
+
+    def apply_poison(self, hand):
+        poison = self.simulator.poisons[hand]
+        if self.now < self.envenom_end:
+            chance = self.simulator.envenom_poison_chances[hand]
+        else:
+            chance = self.simulator.poison_chances[hand]
+        if not chance or self.random() >= chance or self.random() >= self.simulator.spell_hit_chance:
+            return
+        if poison == 'dp':
+            if self.deadly_poison_stacks < DEADLY_POISON_MAX_STACKS or self.now >= self.deadly_poison_end:
+                if self.now >= self.deadly_poison_end:
+                    self.deadly_poison_stacks = 0
+                self.deadly_poison_stacks += 1
+                self.deadly_poison_end = self.now + DEADLY_POISON_DURATION
+                if not self.deadly_poison_ticking:
+                    self.deadly_poison_ticking = True
+                    self.schedule(DEADLY_POISON_TICK_INTERVAL, self.deadly_poison_tick)
+                return
+            self.deadly_poison_end = self.now + DEADLY_POISON_DURATION
+            poison = self.simulator.poisons[{'mh': 'oh', 'oh': 'mh'}[hand]]
+        if poison == 'ip':
+            crit = self.roll_damage('instant_poison', self.get_damage('instant_poison', self.calculator.instant_poison_damage, self.mastery), self.spell_crit_rate)
+            self.trigger_procs('spell', crit)
+        elif poison == 'wp':
+            crit = self.roll_damage('wound_poison', self.get_damage('wound_poison', self.calculator.wound_poison_damage, self.mastery), self.spell_crit_rate)
+            self.trigger_procs('spell', crit)
+
+    def deadly_poison_tick(self, argument):
+        if self.now > self.deadly_poison_end:
+            self.deadly_poison_ticking = False
+            self.deadly_poison_stacks = 0
+            return
+        damage = self.get_damage('deadly_poison', self.calculator.deadly_poison_tick_damage, self.mastery, self.deadly_poison_stacks)
+        crit = self.roll_damage('deadly_poison', damage, self.spell_crit_rate)
+        self.trigger_procs('periodic', crit)
+        self.schedule(DEADLY_POISON_TICK_INTERVAL, self.deadly_poison_tick)
+
+    # Procs.
+
+    def trigger_procs(self, trigger, crit):
+        procs = self.simulator.procs
+        for index in self.simulator.triggered[trigger]:
+            proc, hand = procs[index]
+            if proc.on_crit and not crit:
+                continue
+            if self.now < self.proc_ready[index]:
+                continue
+            if self.random() < proc.proc_chance:
+                self.fire_proc(index, proc)
+
+    def fire_proc(self, index, proc):
+        if proc.icd:
+            self.proc_ready[index] = self.now + proc.icd
+        if proc.stat in DAMAGE_PROC_STATS:
+            self.damage_proc(proc)
+            return
+        if self.proc_stacks[index] < max(proc.max_stacks, 1):
+            self.change_proc_stacks(index, proc, 1)
+        self.proc_tokens[index] += 1
+        self.schedule(proc.duration, self.expire_proc, (index, self.proc_tokens[index]))
+
+    def expire_proc(self, argument):
+        index, token = argument
+        if token != self.proc_tokens[index]:
+            return
+        proc = self.simulator.procs[index][0]
+        self.change_proc_stacks(index, proc, -self.proc_stacks[index])
+
+    def change_proc_stacks(self, index, proc, change):
+        self.proc_stack_time[index] += self.proc_stacks[index] * (self.now - self.proc_changed[index])
+        self.proc_changed[index] = self.now
+        if proc.stat in PROC_STATS:
+            # Haste changes energy regen, so bank the energy gained so far.
+            self.update_energy()
+            self.proc_stacks[index] += change
+            self.update_stats()
+        else:
+            self.proc_stacks[index] += change
+            self.autoattack_multiplier += proc.value * change
+
+    def damage_proc(self, proc):
+        calculator = self.calculator
+        if proc.stat == 'spell_damage':
+            hit_chance = self.simulator.spell_hit_chance
+            multiplier = calculator.raid_settings_modifiers(is_spell=True)
+            crit_multiplier = calculator.crit_damage_modifiers(is_spell=True)
+            crit_rate = self.spell_crit_rate
+        else:
+            hit_chance = self.simulator.strike_hit_chance
+            multiplier = calculator.raid_settings_modifiers(is_physical=True)
+            crit_multiplier = calculator.crit_damage_modifiers()
+            crit_rate = self.melee_crit_rate
+        if self.random() < hit_chance:
+            damage = proc.value * multiplier
+            self.roll_damage(proc.proc_name, (damage, damage * crit_multiplier), crit_rate)
+
+    # Timed buffs.
+
+    def start_heroism(self, argument):
+        self.heroism_active = True
+        self.schedule(HEROISM_DURATION, self.end_heroism)
+        self.schedule(HEROISM_INTERVAL, self.start_heroism)
+
+    def end_heroism(self, argument):
+        self.heroism_active = False
+
+    def end_overkill(self, argument):
+        self.update_energy()
+        self.overkill_active = False
+
+    def end_vendetta(self, argument):
+        self.vendetta_active = False
+        self.update_damage_multiplier()
+
+    def end_adrenaline_rush(self, argument):
+        self.update_energy()
+        self.adrenaline_rush_active = False
@@ -37,11 +37,48 @@ class RogueDamageCalculator(DamageCalculator):
     MELEE_CRIT_REDUCTION =        .048
     SPELL_CRIT_REDUCTION =        .021
 
-    def __setattr__(self, name, value):
-        object.__setattr__(self, name, value)
-        if name == 'level':
-            self._set_constants_for_level()
-    
+    # Every talent and glyph this calculator reads.  Optimizers leave the
+    # rest alone (see optimizers.talent_builds and optimizers.sweeps), so a
+    # subclass that reads more must add them to its own tables; the tests
+    # check that changing anything outside them leaves DPS as it was.
+    modeled_talents = frozenset([
+        'aggression', 'coup_de_grace', 'improved_ambush', 'improved_sinister_strike', 'lethality', 'opportunity',
+        'precision', 'sanguinary_vein', 'vile_poisons'
+    ])
+    modeled_glyphs = frozenset(['rupture'])
+
+    # The talents_modifiers, raid_settings_modifiers and crit_damage_modifiers
+    # arguments for each ability, used to build its modifier plan (see
+    # get_modifiers).  None means talents_modifiers doesn't apply.
+    modifier_arguments = {
+        'autoattack':       ({'assassins_resolve': True}, {'is_physical': True}, {}),
+        'backstab':         ({'opportunity': True, 'aggression': True}, {'is_physical': True}, {'lethality': True}),
+        'mutilate':         ({'opportunity': True}, {'is_physical': True}, {'lethality': True}),
+        'sinister_strike':  ({'aggression': True, 'improved_sinister_strike': True}, {'is_physical': True}, {'lethality': True}),
+        'hemorrhage':       (None, {'is_physical': True}, {'lethality': True}),
+        'ambush':           ({'opportunity': True, 'improved_ambush': True}, {'is_physical': True}, {}),
+        'revealing_strike': (None, {'is_physical': True}, {}),
+        'venomous_wounds':  ({'potent_poisons': True, 'assassins_resolve': False}, {'is_spell': True}, {'is_spell': True}),
+        'main_gauche':      (None, {'is_physical': True}, {}),
+        'killing_spree':    (None, {'is_physical': True}, {}),
+        'instant_poison':   ({'potent_poisons': True, 'vile_poisons': True, 'assassins_resolve': False}, {'is_spell': True}, {'is_spell': True}),
+        'deadly_poison':    ({'potent_poisons': True, 'vile_poisons': True, 'assassins_resolve': False}, {'is_spell': True}, {'is_spell': True}),
+        'wound_poison':     ({'potent_poisons': True, 'vile_poisons': True, 'assassins_resolve': False}, {'is_spell': True}, {'is_spell': True}),
+        'garrote':          ({'opportunity': True, 'assassins_resolve': False}, {'is_bleed': True}, {}),
+        'rupture':          ({'executioner': True, 'assassins_resolve': False}, {'is_bleed': True}, {}),
+        'eviscerate':       ({'coup_de_grace': True, 'aggression': True, 'executioner': True}, {'is_physical': True}, {}),
+        'envenom':          ({'coup_de_grace': True, 'executioner': True, 'assassins_resolve': True}, {'is_spell': True}, {})
+    }
+
+    def _set_inputs(self, **inputs):
+        super(RogueDamageCalculator, self)._set_inputs(**inputs)
+        # Modifier plans only depend on talents, glyphs, buffs, gear buffs
+        # and weapon types, so a with_ that only changes ratings keeps them.
+        plan_inputs = (self.talents, self.glyphs, self.buffs, self.stats.gear_buffs, self.stats.mh.type, self.stats.oh.type)
+        if plan_inputs != getattr(self, 'modifier_plan_inputs', None):
+            self.modifier_plan_inputs = plan_inputs
+            self.clear_modifier_plans()
+
     def _set_constants_for_level(self):
         super(RogueDamageCalculator, self)._set_constants_for_level()
         try:
@@ -87,14 +124,32 @@ class RogueDamageCalculator(DamageCalculator):
         # Parameters are booleans distinguishing which talents affect the
         # spell in question. It returns the final modifier for their
         # respective additive/multiplicative values
+        additive_modifier, mastery_coefficient, multiplicative_modifier = self.talents_modifier_terms(
+            opportunity, coup_de_grace, executioner, aggression, improved_sinister_strike,
+            vile_poisons, improved_ambush, potent_poisons, assassins_resolve)
+        if mastery_coefficient:
+            additive_modifier += mastery_coefficient * self.stats.get_mastery_from_rating(mastery)
+
+        return additive_modifier * multiplicative_modifier
+
+    def talents_modifier_terms(self, opportunity=False, coup_de_grace=False,
+                               executioner=False, aggression=False,
+                               improved_sinister_strike=False, vile_poisons=False,
+                               improved_ambush=False, potent_poisons=False,
+                               assassins_resolve=True):
+        # The pieces of talents_modifiers that don't depend on stats: the
+        # additive modifier, the coefficient on mastery (as returned by
+        # get_mastery_from_rating) that gets added to it, and the
+        # multiplicative modifier applied to the total.
         base_modifier = 1
+        mastery_coefficient = 0
         if opportunity:
             base_modifier += .1 * self.talents.opportunity
         if coup_de_grace:
             cdg_tuple = (0, .07, .14, .2)
             base_modifier += cdg_tuple[self.talents.coup_de_grace]
         if executioner and self.talents.is_subtlety_rogue():
-            base_modifier += .02 * self.stats.get_mastery_from_rating(mastery)
+            mastery_coefficient += .02
         if aggression:
             aggression_tuple = (0, .07, .14, .2)
             base_modifier += aggression_tuple[self.talents.aggression]
@@ -106,15 +161,17 @@ class RogueDamageCalculator(DamageCalculator):
         if improved_ambush:
             base_modifier += .05 * self.talents.improved_ambush
         if potent_poisons and self.talents.is_assassination_rogue():
-            base_modifier += .035 * self.stats.get_mastery_from_rating(mastery)
+            mastery_coefficient += .035
+
+        multiplier = 1
         if assassins_resolve and self.talents.is_assassination_rogue() and (self.stats.mh.type == 'dagger'):
-            base_modifier *= 1.15
+            multiplier *= 1.15
         # Passing Sanguinary Vein without talent parameter (it affects all damage)
         # nor is_bleeding since the target will most likely be bleeding from
         # refreshed ruptures in subtletly builds.
-        base_modifier *= (1 + .05 * self.talents.sanguinary_vein)
+        multiplier *= (1 + .05 * self.talents.sanguinary_vein)
 
-        return base_modifier
+        return base_modifier, mastery_coefficient, multiplier
 
     def crit_damage_modifiers(self, lethality=False, is_spell=False):
         # This formula may need to be splited in two and bring the meta and
@@ -138,11 +195,43 @@ class RogueDamageCalculator(DamageCalculator):
 
         return total_modifier
 
+    def clear_modifier_plans(self):
+        # Modifier plans are rebuilt lazily after this.  Everything they're
+        # worked out from is read-only, so they last until _set_inputs (and
+        # so with_) changes one of those inputs.
+        self.modifier_plans = {}
+
+    def get_modifier_plan(self, ability):
+        # Everything about an ability's damage modifiers that doesn't depend
+        # on stats, worked out once: (additive talent modifier, mastery
+        # coefficient, talent multiplier, raid multiplier, crit multiplier).
+        plan = self.modifier_plans.get(ability)
+        if plan is None:
+            talent_arguments, raid_arguments, crit_arguments = self.modifier_arguments[ability]
+            if talent_arguments is None:
+                talent_terms = (1, 0, 1)
+            else:
+                talent_terms = self.talents_modifier_terms(**talent_arguments)
+            plan = talent_terms + (self.raid_settings_modifiers(**raid_arguments), self.crit_damage_modifiers(**crit_arguments))
+            self.modifier_plans[ability] = plan
+        return plan
+
+    def get_modifiers(self, ability, mastery=None, armor=None):
+        # Returns (damage multiplier, crit multiplier) for ability; the same
+        # values talents_modifiers, raid_settings_modifiers and
+        # crit_damage_modifiers would give, but only the mastery and armor
+        # dependent parts are computed on each call.
+        additive_modifier, mastery_coefficient, talent_multiplier, raid_multiplier, crit_multiplier = self.get_modifier_plan(ability)
+        if mastery_coefficient:
+            additive_modifier += mastery_coefficient * self.stats.get_mastery_from_rating(mastery)
+        if armor is not None:
+            raid_multiplier = self.raid_settings_modifiers(armor=armor, **self.modifier_arguments[ability][1])
+
+        return additive_modifier * talent_multiplier * raid_multiplier, crit_multiplier
+
     def mh_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.damage(ap)
-        multiplier = self.talents_modifiers(assassins_resolve=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('autoattack', armor=armor)
 
         damage = weapon_damage * multiplier
         crit_damage = damage * crit_multiplier
@@ -151,9 +240,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def oh_damage(self, ap, armor=None):
         weapon_damage = self.stats.oh.damage(ap)
-        multiplier = self.talents_modifiers(assassins_resolve=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('autoattack', armor=armor)
 
         damage = self.oh_penalty() * weapon_damage * multiplier
         crit_damage = damage * crit_multiplier
@@ -162,9 +249,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def backstab_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.talents_modifiers(opportunity=True, aggression=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers(lethality=True)
+        multiplier, crit_multiplier = self.get_modifiers('backstab', armor=armor)
         percentage_damage_bonus = 2
         if self.talents.is_subtlety_rogue():
             percentage_damage_bonus += .25
@@ -176,9 +261,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def mh_mutilate_damage(self, ap, is_poisoned=True, armor=None):
         mh_weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.talents_modifiers(opportunity=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers(lethality=True)
+        multiplier, crit_multiplier = self.get_modifiers('mutilate', armor=armor)
 
         mh_damage = 1.5 * (mh_weapon_damage + self.mut_bonus_dmg) * multiplier
 
@@ -191,9 +274,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def oh_mutilate_damage(self, ap, is_poisoned=True, armor=None):
         oh_weapon_damage = self.stats.oh.normalized_damage(ap)
-        multiplier = self.talents_modifiers(opportunity=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers(lethality=True)
+        multiplier, crit_multiplier = self.get_modifiers('mutilate', armor=armor)
 
         oh_damage = 1.5 * (self.oh_penalty() * oh_weapon_damage + self.mut_bonus_dmg) * multiplier
 
@@ -206,9 +287,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def sinister_strike_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.talents_modifiers(aggression=True, improved_sinister_strike=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers(lethality=True)
+        multiplier, crit_multiplier = self.get_modifiers('sinister_strike', armor=armor)
 
         damage = (weapon_damage + self.ss_bonus_dmg) * multiplier
         crit_damage = damage * crit_multiplier
@@ -217,8 +296,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def hemorrhage_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers(lethality=True)
+        multiplier, crit_multiplier = self.get_modifiers('hemorrhage', armor=armor)
 
         if self.stats.mh.type == 'dagger':
             percentage_damage_bonus = 1.595
@@ -238,9 +316,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def ambush_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.talents_modifiers(opportunity=True, improved_ambush=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('ambush', armor=armor)
 
         if self.stats.mh.type == 'dagger':
             damage = (2.7493 * weapon_damage + self.ambush_bonus_dmg * 2.75) * multiplier
@@ -252,8 +328,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def revealing_strike_damage(self, ap, armor=None):
         weapon_damage = self.stats.mh.damage(ap)
-        multiplier = self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('revealing_strike', armor=armor)
 
         damage = 1.25 * weapon_damage * multiplier
         crit_damage = damage * crit_multiplier
@@ -261,9 +336,7 @@ class RogueDamageCalculator(DamageCalculator):
         return damage, crit_damage
 
     def venomous_wounds_damage(self, ap, mastery=None):
-        multiplier = self.talents_modifiers(potent_poisons=True, assassins_resolve=False, mastery=mastery)
-        multiplier *= self.raid_settings_modifiers(is_spell=True)
-        crit_multiplier = self.crit_damage_modifiers(is_spell=True)
+        multiplier, crit_multiplier = self.get_modifiers('venomous_wounds', mastery=mastery)
 
         damage = (self.vw_base_dmg + self.vw_percentage_dmg * ap) * multiplier
         crit_damage = damage * crit_multiplier
@@ -272,8 +345,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def main_gauche_damage(self, ap, armor=None):
         weapon_damage = self.stats.oh.normalized_damage(ap)
-        multiplier = self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('main_gauche', armor=armor)
 
         damage = self.oh_penalty() * weapon_damage * multiplier
         crit_damage = damage * crit_multiplier
@@ -282,8 +354,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def mh_killing_spree_damage(self, ap, armor=None):
         mh_weapon_damage = self.stats.mh.normalized_damage(ap)
-        multiplier = self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('killing_spree', armor=armor)
 
         mh_damage = mh_weapon_damage * multiplier
         crit_mh_damage = mh_damage * crit_multiplier
@@ -292,8 +363,7 @@ class RogueDamageCalculator(DamageCalculator):
 
     def oh_killing_spree_damage(self, ap, armor=None):
         oh_weapon_damage = self.stats.oh.normalized_damage(ap)
-        multiplier = self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('killing_spree', armor=armor)
 
         oh_damage = self.oh_penalty() * oh_weapon_damage * multiplier
         crit_oh_damage = oh_damage * crit_multiplier
@@ -301,10 +371,7 @@ class RogueDamageCalculator(DamageCalculator):
         return oh_damage, crit_oh_damage
 
     def instant_poison_damage(self, ap, mastery=None):
-        multiplier = self.talents_modifiers(potent_poisons=True, vile_poisons=True,
-                                       assassins_resolve=False, mastery=mastery)
-        multiplier *= self.raid_settings_modifiers(is_spell=True)
-        crit_multiplier = self.crit_damage_modifiers(is_spell=True)
+        multiplier, crit_multiplier = self.get_modifiers('instant_poison', mastery=mastery)
 
         damage = (self.ip_base_dmg + 0.09 * ap) * multiplier
         crit_damage = damage * crit_multiplier
@@ -312,10 +379,7 @@ class RogueDamageCalculator(DamageCalculator):
         return damage, crit_damage
 
     def deadly_poison_tick_damage(self, ap, mastery=None, dp_stacks=5):
-        multiplier = self.talents_modifiers(potent_poisons=True, vile_poisons=True,
-                                       assassins_resolve=False, mastery=mastery)
-        multiplier *= self.raid_settings_modifiers(is_spell=True)
-        crit_multiplier = self.crit_damage_modifiers(is_spell=True)
+        multiplier, crit_multiplier = self.get_modifiers('deadly_poison', mastery=mastery)
 
         tick_damage = ((self.dp_base_dmg + self.dp_percentage_dmg * ap) * dp_stacks / 4) * multiplier
         crit_tick_damage = tick_damage * crit_multiplier
@@ -323,10 +387,7 @@ class RogueDamageCalculator(DamageCalculator):
         return tick_damage, crit_tick_damage
 
     def wound_poison_damage(self, ap, mastery=None):
-        multiplier = self.talents_modifiers(potent_poisons=True, vile_poisons=True,
-                                       assassins_resolve=False, mastery=mastery)
-        multiplier *= self.raid_settings_modifiers(is_spell=True)
-        crit_multiplier = self.crit_damage_modifiers(is_spell=True)
+        multiplier, crit_multiplier = self.get_modifiers('wound_poison', mastery=mastery)
 
         damage = (self.wp_base_dmg + self.wp_percentage_dmg * ap) * multiplier
         crit_damage = damage * crit_multiplier
@@ -334,9 +395,7 @@ class RogueDamageCalculator(DamageCalculator):
         return damage, crit_damage
 
     def garrote_tick_damage(self, ap):
-        multiplier = self.talents_modifiers(opportunity=True, assassins_resolve=False)
-        multiplier *= self.raid_settings_modifiers(is_bleed=True)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('garrote')
 
         tick_damage = (self.garrote_base_dmg +  ap * 1 * 0.07) * multiplier
         crit_tick_damage = tick_damage * crit_multiplier
@@ -347,9 +406,7 @@ class RogueDamageCalculator(DamageCalculator):
         # Assassasin's resolve was tested on melee, poisons, weapon strikes and
         # ap strikes, not bleeds. Although there's no reason to believe it doesn't
         # affect bleeds, I'm setting it to false until some testing is done
-        multiplier = self.talents_modifiers(executioner=True, assassins_resolve=False)
-        multiplier *= self.raid_settings_modifiers(is_bleed=True)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('rupture')
 
         ap_multiplier_tuple = (0, .015, .024, .03, .03428571, .0375)
         tick_damage = (self.rup_base_dmg + self.rup_bonus_dmg * cp + ap_multiplier_tuple[cp] * ap) * multiplier
@@ -365,9 +422,7 @@ class RogueDamageCalculator(DamageCalculator):
         return tick_damage, crit_tick_damage
 
     def eviscerate_damage(self, ap, cp, armor=None):
-        multiplier = self.talents_modifiers(coup_de_grace=True, aggression=True, executioner=True)
-        multiplier *= self.raid_settings_modifiers(is_physical=True, armor=armor)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('eviscerate', armor=armor)
 
         ap_multiplier_tuple = (0, .091, .182, .273, .364, .455)
         damage = (self.evis_base_dmg + self.evis_bonus_dmg * cp + ap_multiplier_tuple[cp] * ap) * multiplier
@@ -378,9 +433,7 @@ class RogueDamageCalculator(DamageCalculator):
     def envenom_damage(self, ap, cp):
         # Envemom has a dependency on dp_charges too; but being unlikely to be used out of builds
         # with master poisoner I'm not including that for the moment
-        multiplier = self.talents_modifiers(coup_de_grace=True, executioner=True, assassins_resolve=True)
-        multiplier *= self.raid_settings_modifiers(is_spell=True)
-        crit_multiplier = self.crit_damage_modifiers()
+        multiplier, crit_multiplier = self.get_modifiers('envenom')
 
         damage = (self.env_bonus_dmg * cp + .09 * cp * ap) * multiplier
         crit_damage = damage * crit_multiplier
@@ -0,0 +1,129 @@
+import math
+
+class DualNumber(object):
+    # A value together with its partial derivatives with respect to a fixed
+    # list of input variables - i.e., forward-mode automatic differentiation.
+    # Arithmetic with plain numbers or other DualNumbers (built over the same
+    # variables) propagates the derivatives.  Comparisons and truth tests only
+    # look at the value, so model code that branches on a quantity takes
+    # exactly the branch it would take for the plain number; the derivatives
+    # are those of that branch.
+
+    __slots__ = ('value', 'partials')
+
+    # Comparisons are by value, so hashing would be misleading; DualNumbers
+    # must not be used as dict keys.
+    __hash__ = None
+
+    def __init__(self, value, partials):
+        self.value = value
+        self.partials = tuple(partials)
+
+    def __repr__(self):
+        return 'DualNumber(%r, %r)' % (self.value, self.partials)
+
+    def __float__(self):
+        return float(self.value)
+
+    def __nonzero__(self):
+        return bool(self.value)
+
+    def __neg__(self):
+        return DualNumber(-self.value, [-p for p in self.partials])
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        if self.value < 0:
+            return -self
+        return self
+
+    def __add__(self, other):
+        if isinstance(other, DualNumber):
+            return DualNumber(self.value + other.value, [a + b for a, b in zip(self.partials, other.partials)])
+        return DualNumber(self.value + other, self.partials)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, DualNumber):
+            return DualNumber(self.value - other.value, [a - b for a, b in zip(self.partials, other.partials)])
+        return DualNumber(self.value - other, self.partials)
+
+    def __rsub__(self, other):
+        return DualNumber(other - self.value, [-p for p in self.partials])
+
+    def __mul__(self, other):
+        if isinstance(other, DualNumber):
+            return DualNumber(self.value * other.value, [a * other.value + self.value * b for a, b in zip(self.partials, other.partials)])
+        return DualNumber(self.value * other, [p * other for p in self.partials])
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, DualNumber):
+            quotient = self.value * 1.0 / other.value
+            return DualNumber(quotient, [(a - quotient * b) / other.value for a, b in zip(self.partials, other.partials)])
+        return DualNumber(self.value * 1.0 / other, [p * 1.0 / other for p in self.partials])
+
+    def __rtruediv__(self, other):
+        quotient = other * 1.0 / self.value
+        return DualNumber(quotient, [-quotient * p / self.value for p in self.partials])
+
+    # The model divides floats by floats throughout, so classic division
+    # behaves like true division here.
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    def __pow__(self, other):
+        if isinstance(other, DualNumber):
+            result = self.value ** other.value
+            log_value = math.log(self.value)
+            return DualNumber(result, [result * (b * log_value + other.value * a / self.value) for a, b in zip(self.partials, other.partials)])
+        if other == 0:
+            return DualNumber(1., [0.] * len(self.partials))
+        slope = other * self.value ** (other - 1)
+        return DualNumber(self.value ** other, [slope * p for p in self.partials])
+
+    def __rpow__(self, other):
+        result = other ** self.value
+        log_other = math.log(other)
+        return DualNumber(result, [result * log_other * p for p in self.partials])
+
+    def __eq__(self, other):
+        return self.value == get_value(other)
+
+    def __ne__(self, other):
+        return self.value != get_value(other)
+
+    def __lt__(self, other):
+        return self.value < get_value(other)
+
+    def __le__(self, other):
+        return self.value <= get_value(other)
+
+    def __gt__(self, other):
+        return self.value > get_value(other)
+
+    def __ge__(self, other):
+        return self.value >= get_value(other)
+
+
+def get_value(number):
+    # The plain value of either a DualNumber or an ordinary number.
+    if isinstance(number, DualNumber):
+        return number.value
+    return number
+
+def get_partials(number, variable_count):
+    # The partial derivatives of number; ordinary numbers are constants.
+    if isinstance(number, DualNumber):
+        return number.partials
+    return (0.,) * variable_count
+
+def variables(values):
+    # Builds one independent DualNumber per value: the n-th one has a
+    # derivative of 1 with respect to the n-th variable and 0 otherwise.
+    count = len(values)
+    return [DualNumber(value, [float(i == j) for j in xrange(count)]) for i, value in enumerate(values)]
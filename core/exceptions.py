@@ -3,6 +3,9 @@ class InvalidInputException(Exception):
     # either use or subclass this.
 
     def __init__(self, error_msg):
+        # Passing error_msg on sets args, which pickle needs to recreate the
+        # exception - e.g. when it's raised in a process pool worker.
+        Exception.__init__(self, error_msg)
         self.error_msg = error_msg
 
     def __str__(self):
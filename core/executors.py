@@ -0,0 +1,132 @@
+import itertools
+import multiprocessing
+import threading
+
+# Executors for functions that map one picklable task to one result, like
+# calcs.rogue.Aldriana.profiles.evaluate_many.  An executor needs a
+# map(function, tasks) method returning an iterator over the results in the
+# order of tasks, and a close method; anything with those two can be passed
+# in place of the ones here.
+
+class SerialExecutor(object):
+    # Runs everything in the calling process, one task at a time.
+
+    def map(self, function, tasks):
+        return itertools.imap(function, tasks)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ProcessPoolExecutor(SerialExecutor):
+    # Spreads tasks across a multiprocessing pool of processes workers
+    # (defaulting to the number of CPUs).  The pool is only started by the
+    # first map, so the workers are forked with whatever the caller has
+    # imported by then - the engine itself, at the very least - and don't
+    # import it again.  The pool is then reused until close.
+    #
+    # Tasks are sent in chunks, sized so that each worker gets about
+    # chunks_per_process of them: big enough that pickling and queueing
+    # overhead stays small next to the work itself, small enough that one
+    # slow chunk doesn't leave the other workers idle at the end.
+
+    def __init__(self, processes=None, chunks_per_process=4, max_chunk_size=64):
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunks_per_process = chunks_per_process
+        self.max_chunk_size = max_chunk_size
+        self.pool = None
+
+    def chunk_size(self, task_count):
+        chunks = self.processes * self.chunks_per_process
+        return max(1, min(self.max_chunk_size, -(-task_count // chunks)))
+
+    def start(self):
+        # Starts the pool now rather than on the first map, e.g. so that a
+        # service pays for the fork before its first request arrives.
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+
+    def map(self, function, tasks):
+        # The pool reads all the tasks up front in any case, so this doesn't
+        # give up any laziness by counting them first.
+        tasks = list(tasks)
+        self.start()
+        return self.pool.imap(function, tasks, self.chunk_size(len(tasks)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+
+class Coalescer(object):
+    # Runs single tasks through executor, sharing the evaluation between
+    # identical tasks in flight at the same time: submit a task along with
+    # a hashable key (two tasks with equal keys must give equal results),
+    # and until the first submission of that key has its result, later ones
+    # get the same PendingResult back instead of starting over.  Safe to
+    # use from several threads, provided executor.map is.
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.lock = threading.Lock()
+        self.in_flight = {}
+
+    def submit(self, function, task, key):
+        key = (function, key)
+        self.lock.acquire()
+        try:
+            pending = self.in_flight.get(key)
+            if pending is None:
+                pending = PendingResult(self, key, self.executor.map(function, [task]))
+                self.in_flight[key] = pending
+            return pending
+        finally:
+            self.lock.release()
+
+    def finished(self, key, pending):
+        self.lock.acquire()
+        try:
+            if self.in_flight.get(key) is pending:
+                del self.in_flight[key]
+        finally:
+            self.lock.release()
+
+
+class PendingResult(object):
+    # What Coalescer.submit returns.  The first caller of result waits for
+    # the result (with SerialExecutor, computes it) and the others wait for
+    # that caller; all of them get the same value back, or the same
+    # exception raised.
+
+    def __init__(self, coalescer, key, results):
+        self.coalescer = coalescer
+        self.key = key
+        self.results = results
+        self.lock = threading.Lock()
+        self.done = False
+
+    def result(self):
+        self.lock.acquire()
+        try:
+            if not self.done:
+                try:
+                    self.value = self.results.next()
+                    self.error = None
+                except Exception as e:
+                    self.error = e
+                self.done = True
+                self.results = None
+                self.coalescer.finished(self.key, self)
+        finally:
+            self.lock.release()
+        if self.error is not None:
+            raise self.error
+        return self.value
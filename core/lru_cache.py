@@ -0,0 +1,56 @@
+class LRUCache(object):
+    # A mapping that holds at most max_entries items.  Once it's full, adding
+    # a new item evicts the one that was least recently read or written.
+    # We're targeting Python 2.6, which has no OrderedDict, so recency is
+    # tracked with a circular doubly linked list of [previous, next, key,
+    # value] nodes hanging off a sentinel root node.
+
+    PREVIOUS, NEXT, KEY, VALUE = 0, 1, 2, 3
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.clear()
+
+    def clear(self):
+        self._nodes = {}
+        self._root = []
+        self._root[:] = [self._root, self._root, None, None]
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, key):
+        return key in self._nodes
+
+    def get(self, key, default=None):
+        node = self._nodes.get(key)
+        if node is None:
+            return default
+        self._unlink(node)
+        self._link_as_newest(node)
+        return node[self.VALUE]
+
+    def put(self, key, value):
+        node = self._nodes.get(key)
+        if node is not None:
+            node[self.VALUE] = value
+            self._unlink(node)
+        else:
+            if len(self._nodes) >= self.max_entries:
+                oldest = self._root[self.NEXT]
+                self._unlink(oldest)
+                del self._nodes[oldest[self.KEY]]
+            node = [None, None, key, value]
+            self._nodes[key] = node
+        self._link_as_newest(node)
+
+    def _unlink(self, node):
+        node[self.PREVIOUS][self.NEXT] = node[self.NEXT]
+        node[self.NEXT][self.PREVIOUS] = node[self.PREVIOUS]
+
+    def _link_as_newest(self, node):
+        newest = self._root[self.PREVIOUS]
+        node[self.PREVIOUS] = newest
+        node[self.NEXT] = self._root
+        newest[self.NEXT] = node
+        self._root[self.PREVIOUS] = node
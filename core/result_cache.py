@@ -0,0 +1,146 @@
+import json
+import sqlite3
+import threading
+
+# A persistent map from string keys to JSON-able values, kept in an sqlite
+# database so it survives between processes and can be shared by several
+# at once.  Once the stored keys and values add up to more than max_bytes,
+# the least recently used entries are evicted until they fit again.  See
+# calcs.rogue.Aldriana.profiles.evaluate_cached for the intended use.
+#
+# A hit mustn't cost as much as the evaluation it saves, so get only reads:
+# the uses it records are kept in memory and written out in batches - on
+# the next put, every flush_every hits, and on close.  Recency can be that
+# far behind for eviction, which is all it's used for.  The total size
+# lives in a one-row table, kept up to date by put and evict in the same
+# transaction, rather than being summed over the whole table on each put.
+#
+# Every write runs in a transaction begun with BEGIN IMMEDIATE, which takes
+# the database's write lock before anything is read.  Otherwise another
+# process could replace an entry between put reading the old entry's size
+# and writing the new one, and the total would drift from the entries.
+
+class ResultCache(object):
+    def __init__(self, path, max_bytes=64 * 1024 * 1024, flush_every=256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_every = flush_every
+        # One connection, shared by every thread that uses this cache and
+        # serialized by lock.
+        self.lock = threading.Lock()
+        # Transactions are begun and ended here (see write), not by sqlite3.
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.write(self.create_tables)
+        # key -> last use, for the hits not yet written out.
+        self.pending_uses = {}
+        self.last_use = self.stored_last_use()
+
+    def create_tables(self):
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        self.connection.execute('CREATE INDEX IF NOT EXISTS results_by_last_used ON results (last_used)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS totals (size INTEGER NOT NULL)')
+        if self.connection.execute('SELECT COUNT(*) FROM totals').fetchone()[0] == 0:
+            self.connection.execute('INSERT INTO totals (size) SELECT COALESCE(SUM(size), 0) FROM results')
+
+    def write(self, function, *arguments):
+        # Calls function in a write transaction; see the comment at the top.
+        self.connection.execute('BEGIN IMMEDIATE')
+        try:
+            result = function(*arguments)
+        except:
+            self.connection.execute('ROLLBACK')
+            raise
+        self.connection.execute('COMMIT')
+        return result
+
+    def stored_last_use(self):
+        return self.connection.execute('SELECT COALESCE(MAX(last_used), 0) FROM results').fetchone()[0]
+
+    def next_use(self):
+        # A counter rather than a timestamp, so that uses within the same
+        # clock tick still have an order.
+        self.last_use += 1
+        return self.last_use
+
+    def get(self, key, default=None):
+        self.lock.acquire()
+        try:
+            row = self.connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return default
+            self.pending_uses[key] = self.next_use()
+            if len(self.pending_uses) >= self.flush_every:
+                self.write(self.flush_uses)
+            return json.loads(row[0])
+        finally:
+            self.lock.release()
+
+    def flush_uses(self):
+        if not self.pending_uses:
+            return
+        # Other processes may have used the cache since this one last
+        # looked; uses recorded here come after theirs.
+        offset = max(self.stored_last_use() - min(self.pending_uses.values()) + 1, 0)
+        self.connection.executemany('UPDATE results SET last_used = ? WHERE key = ?', [(use + offset, key) for key, use in self.pending_uses.items()])
+        self.last_use += offset
+        self.pending_uses = {}
+
+    def put(self, key, value):
+        value = json.dumps(value, sort_keys=True)
+        size = len(key) + len(value)
+        self.lock.acquire()
+        try:
+            self.write(self.replace, key, value, size)
+        finally:
+            self.lock.release()
+
+    def replace(self, key, value, size):
+        self.flush_uses()
+        row = self.connection.execute('SELECT size FROM results WHERE key = ?', (key,)).fetchone()
+        self.connection.execute('INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)', (key, value, size, self.next_use()))
+        self.connection.execute('UPDATE totals SET size = size + ?', (size - (row and row[0] or 0),))
+        self.evict()
+
+    def evict(self):
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        evicted = []
+        evicted_size = 0
+        for key, size in self.connection.execute('SELECT key, size FROM results ORDER BY last_used'):
+            evicted.append((key,))
+            evicted_size += size
+            if evicted_size >= excess:
+                break
+        self.connection.executemany('DELETE FROM results WHERE key = ?', evicted)
+        self.connection.execute('UPDATE totals SET size = size - ?', (evicted_size,))
+
+    def size(self):
+        return self.connection.execute('SELECT size FROM totals').fetchone()[0]
+
+    def __len__(self):
+        self.lock.acquire()
+        try:
+            return self.connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        finally:
+            self.lock.release()
+
+    def clear(self):
+        self.lock.acquire()
+        try:
+            self.write(self.delete_all)
+            self.pending_uses = {}
+        finally:
+            self.lock.release()
+
+    def delete_all(self):
+        self.connection.execute('DELETE FROM results')
+        self.connection.execute('UPDATE totals SET size = 0')
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            self.write(self.flush_uses)
+            self.connection.close()
+        finally:
+            self.lock.release()
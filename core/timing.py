@@ -0,0 +1,69 @@
+import json
+import timeit
+
+# Sinks for the phase timings calculators report (see, e.g.,
+# AldrianasRogueDamageCalculator.compute_damage).  A calculator holds a
+# sink as timing_sink and, around each phase, does
+#
+#     started = sink.clock()
+#     ...
+#     sink.record('phase name', sink.clock() - started)
+#
+# NullTimingSink is the default: its clock doesn't read the system timer
+# and record throws everything away, so untimed runs pay next to nothing.
+
+class NullTimingSink(object):
+    def clock(self):
+        return 0
+
+    def record(self, phase, seconds):
+        pass
+
+
+class TimingAggregator(NullTimingSink):
+    # Keeps a running count, total and maximum per phase in memory.
+
+    def __init__(self):
+        self.clear()
+
+    def clock(self):
+        return timeit.default_timer()
+
+    def record(self, phase, seconds):
+        totals = self.phases.get(phase)
+        if totals is None:
+            self.phases[phase] = [1, seconds, seconds]
+        else:
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+
+    def clear(self):
+        self.phases = {}
+
+    def summary(self):
+        # {phase: {'count', 'total', 'mean', 'max'}}, times in seconds.
+        summary = {}
+        for phase, (count, total, maximum) in self.phases.items():
+            summary[phase] = {'count': count, 'total': total, 'mean': total / count, 'max': maximum}
+        return summary
+
+
+class JSONLinesTimingSink(NullTimingSink):
+    # Writes one JSON object per timing to stream (anything with a write
+    # method), e.g. {"phase": "attack_counts", "seconds": 0.0002}.  Every
+    # item of context - a request id, the gear being evaluated - is added
+    # to each line, so the lines can be grouped afterwards.
+
+    def __init__(self, stream, context=None):
+        self.stream = stream
+        self.context = context or {}
+
+    def clock(self):
+        return timeit.default_timer()
+
+    def record(self, phase, seconds):
+        line = dict(self.context)
+        line['phase'] = phase
+        line['seconds'] = seconds
+        self.stream.write(json.dumps(line, sort_keys=True) + '\n')
@@ -27,27 +27,46 @@ class Buffs(object):
     
     str_and_agi_buff_values = {80:155, 85:549}
 
+    # Buffs are read-only once built, as stats.Stats are: with_ gives a copy
+    # with some buffs switched on or off, or another level, e.g.
+    # buffs.with_(agi_flask=True, level=80).
     def __init__(self, *args, **kwargs):
         for buff in args:
             if buff not in self.allowed_buffs:
                 raise InvalidBuffException(_('Invalid buff {buff}').format(buff=buff))
-            setattr(self, buff, True)
-        self.level = kwargs.get('level', 85)
+            object.__setattr__(self, buff, True)
+        object.__setattr__(self, 'level', kwargs.get('level', 85))
+        self._set_constants_for_level()
 
     def __getattr__(self, name):
         # Any buff we haven't assigned a value to, we don't have.
         if name in self.allowed_buffs:
             return False
         object.__getattribute__(self, name)
-    
+
     def __setattr__(self, name, value):
-        object.__setattr__(self, name, value)
-        if name == 'level':
-            self._set_constants_for_level()
-    
+        raise AttributeError(_('Buffs are read-only; use with_ to change {buff}').format(buff=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Buffs are read-only; use with_ to change {buff}').format(buff=name))
+
+    def with_(self, **changes):
+        level = changes.pop('level', self.level)
+        for buff in changes:
+            if buff not in self.allowed_buffs:
+                raise InvalidBuffException(_('Invalid buff {buff}').format(buff=buff))
+        copy = object.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        for buff, value in changes.items():
+            copy.__dict__[buff] = bool(value)
+        if level != self.level:
+            copy.__dict__['level'] = level
+            copy._set_constants_for_level()
+        return copy
+
     def _set_constants_for_level(self):
         try:
-            self.str_and_agi_buff_bonus = self.str_and_agi_buff_values[self.level]
+            object.__setattr__(self, 'str_and_agi_buff_bonus', self.str_and_agi_buff_values[self.level])
         except KeyError as e:
             raise exceptions.InvalidLevelException(_('No conversion factor available for level {level}').format(level=self.level))
 
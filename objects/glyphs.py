@@ -1,13 +1,35 @@
+from core import exceptions
+
+class InvalidGlyphException(exceptions.InvalidInputException):
+    pass
+
+
 class Glyphs(object):
     allowed_glyphs = frozenset()
 
     def __init__(self, *args):
         for arg in args:
             if arg in self.allowed_glyphs:
-                setattr(self, arg, True)
+                object.__setattr__(self, arg, True)
 
     def __getattr__(self, name):
         # Any glyph we haven't assigned a value to, we don't have.
         if name in self.allowed_glyphs:
             return False
         object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Glyphs are read-only; use with_ to change {glyph}').format(glyph=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Glyphs are read-only; use with_ to change {glyph}').format(glyph=name))
+
+    def with_(self, **changes):
+        for glyph in changes:
+            if glyph not in self.allowed_glyphs:
+                raise InvalidGlyphException(_('Invalid glyph {glyph}').format(glyph=glyph))
+        copy = object.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        for glyph, value in changes.items():
+            copy.__dict__[glyph] = bool(value)
+        return copy
@@ -4,59 +4,87 @@ class InvalidProcException(exceptions.InvalidInputException):
     pass
 
 
+# Trigger categories, as bits of a proc's trigger_mask.
+AUTO_ATTACKS = 1
+STRIKES = 2
+HARMFUL_SPELLS = 4
+HEALS = 8
+PERIODIC_SPELL_DAMAGE = 16
+PERIODIC_HEALS = 32
+BLEEDS = 64
+APPLY_DEBUFF = 128
+TRIGGER_CATEGORIES = (AUTO_ATTACKS, STRIKES, HARMFUL_SPELLS, HEALS, PERIODIC_SPELL_DAMAGE, PERIODIC_HEALS, BLEEDS, APPLY_DEBUFF)
+
+DAMAGE_STATS = ('spell_damage', 'physical_damage')
+
+# Trigger -> the categories it procs off; unknown triggers proc off none.
+TRIGGER_MASKS = {
+    'all_spells_and_attacks':   AUTO_ATTACKS | STRIKES | HARMFUL_SPELLS | HEALS | APPLY_DEBUFF,
+    'all_attacks':              AUTO_ATTACKS | STRIKES | APPLY_DEBUFF,
+    'auto_attack':              AUTO_ATTACKS,
+    'strikes':                  STRIKES,
+    'all_spells':               HARMFUL_SPELLS | HEALS,
+    'damaging_spells':          HARMFUL_SPELLS,
+    'healing_spells':           HEALS,
+    'all_periodic_damage':      PERIODIC_SPELL_DAMAGE | BLEEDS,
+    'periodic_spell_damage':    PERIODIC_SPELL_DAMAGE,
+    'bleeds':                   BLEEDS,
+    'hots':                     PERIODIC_HEALS
+}
+
 class Proc(object):
+    # A proc's specification.  Specs are immutable, so one can be shared by
+    # any number of calculators and evaluations at once; whatever an
+    # evaluation works out about a proc (its uptime, which hand it's on)
+    # stays with the evaluation.
+    __slots__ = ('stat', 'value', 'duration', 'proc_chance', 'trigger', 'icd', 'max_stacks', 'on_crit', 'proc_name', 'trigger_mask')
+
     def __init__(self, stat, value, duration, proc_chance, trigger, icd, max_stacks, on_crit, proc_name):
-        self.stat = stat
-        self.value = value
-        self.duration = duration
-        self.proc_chance = proc_chance
-        self.trigger = trigger
-        self.icd = icd
-        self.max_stacks = max_stacks
-        self.on_crit = on_crit
-        self.proc_name = proc_name
+        self._set_fields(stat, value, duration, trigger, icd, max_stacks, on_crit, proc_name)
+        object.__setattr__(self, 'proc_chance', proc_chance)
+
+    def _set_fields(self, stat, value, duration, trigger, icd, max_stacks, on_crit, proc_name):
+        set_field = object.__setattr__
+        set_field(self, 'stat', stat)
+        set_field(self, 'value', value)
+        set_field(self, 'duration', duration)
+        set_field(self, 'trigger', trigger)
+        set_field(self, 'icd', icd)
+        set_field(self, 'max_stacks', max_stacks)
+        set_field(self, 'on_crit', on_crit)
+        set_field(self, 'proc_name', proc_name)
+        set_field(self, 'trigger_mask', TRIGGER_MASKS.get(trigger, 0))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Proc specs are immutable'))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Proc specs are immutable'))
+
+    def __reduce__(self):
+        # Pickles and copies rebuild the spec through __init__.
+        return (self.__class__, (self.stat, self.value, self.duration, self.proc_chance, self.trigger, self.icd, self.max_stacks, self.on_crit, self.proc_name))
 
     def procs_off_auto_attacks(self):
-        if self.trigger in ('all_attacks', 'auto_attack', 'all_spells_and_attacks'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & AUTO_ATTACKS)
 
     def procs_off_strikes(self):
-        if self.trigger in ('all_attacks', 'strikes', 'all_spells_and_attacks'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & STRIKES)
 
     def procs_off_harmful_spells(self):
-        if self.trigger in ('all_spells', 'damaging_spells', 'all_spells_and_attacks'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & HARMFUL_SPELLS)
 
     def procs_off_heals(self):
-        if self.trigger in ('all_spells', 'healing_spells', 'all_spells_and_attacks'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & HEALS)
 
     def procs_off_periodic_spell_damage(self):
-        if self.trigger in ('all_periodic_damage', 'periodic_spell_damage'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & PERIODIC_SPELL_DAMAGE)
 
     def procs_off_periodic_heals(self):
-        if self.trigger == 'hots':
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & PERIODIC_HEALS)
 
     def procs_off_bleeds(self):
-        if self.trigger in ('all_periodic_damage', 'bleeds'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & BLEEDS)
 
     def procs_off_crit_only(self):
         if self.on_crit:
@@ -65,28 +93,31 @@ class Proc(object):
             return False
 
     def procs_off_apply_debuff(self):
-        if self.trigger in ('all_spells_and_attacks', 'all_attacks'):
-            return True
-        else:
-            return False
+        return bool(self.trigger_mask & APPLY_DEBUFF)
 
     def is_ppm(self):
         return False
 
 class PPMProc(Proc):
+    # A proc that happens ppm times a minute on average.  Given the speed of
+    # the weapon it's on, proc_chance is the chance per proc event; without
+    # one, proc_chance is None.
+    __slots__ = ('ppm', 'speed')
+
+    def __init__(self, stat, value, duration, ppm, trigger, icd, max_stacks, on_crit, proc_name, speed=None):
+        self._set_fields(stat, value, duration, trigger, icd, max_stacks, on_crit, proc_name)
+        object.__setattr__(self, 'ppm', ppm)
+        object.__setattr__(self, 'speed', speed)
+        if speed is None:
+            object.__setattr__(self, 'proc_chance', None)
+        else:
+            object.__setattr__(self, 'proc_chance', self.proc_rate(speed))
+
+    def __reduce__(self):
+        return (self.__class__, (self.stat, self.value, self.duration, self.ppm, self.trigger, self.icd, self.max_stacks, self.on_crit, self.proc_name, self.speed))
+
     # Calculate proc_rate for a ppm proc assuming self.proc_chance is the # procs/minute
     # and speed is the number of seconds between proc events. Result is percent chance of proc per event.
-    def __init__(self, stat, value, duration, ppm, trigger, icd, max_stacks, on_crit, proc_name):
-        self.stat = stat
-        self.value = value
-        self.duration = duration
-        self.ppm = ppm
-        self.trigger = trigger
-        self.icd = icd
-        self.max_stacks = max_stacks
-        self.on_crit = on_crit
-        self.proc_name = proc_name
-
     def proc_rate(self, speed):
         return self.ppm * speed / 60.
 
@@ -133,13 +164,45 @@ class ProcsList(object):
 ##       'hots'
 ##    ])
 
+    # Lists are indexed when they're built - by stat, by trigger category,
+    # by whether the proc has an ICD, and for damage procs - so that the
+    # lookups below just return a tuple, in allowed_procs order.  Proc specs
+    # are immutable, so lists with the same procs share their specs and
+    # indexes, which makes building another list (as trinket sweeps do by
+    # the thousand) almost free.  Don't assign procs to a list afterwards;
+    # build a new one.
+    _shared_indexes = {}
+
     def __init__(self, *args):
-        for arg in args:
-            if arg in self.allowed_procs:
-                setattr(self, arg, Proc(*self.allowed_procs[arg]))
-            else:
-                # Throw invalid input exception here
-                raise InvalidProcException(_('No data for proc {proc}').format(proc=arg))
+        names = frozenset(args)
+        indexes = self._shared_indexes.get(names)
+        if indexes is None:
+            for arg in args:
+                if arg not in self.allowed_procs:
+                    # Throw invalid input exception here
+                    raise InvalidProcException(_('No data for proc {proc}').format(proc=arg))
+            indexes = self._build_indexes(names)
+            self._shared_indexes[names] = indexes
+        self.__dict__.update(indexes)
+
+    def _build_indexes(self, names):
+        specs = []
+        for proc_name in self.allowed_procs:
+            if proc_name in names:
+                specs.append((proc_name, Proc(*self.allowed_procs[proc_name])))
+        procs = tuple([proc for proc_name, proc in specs])
+
+        indexes = dict(specs)
+        indexes['_all_procs'] = procs
+        by_stat = {}
+        for proc in procs:
+            by_stat[proc.stat] = by_stat.get(proc.stat, ()) + (proc,)
+        indexes['_procs_by_stat'] = by_stat
+        indexes['_procs_by_trigger'] = dict([(category, tuple([proc for proc in procs if proc.trigger_mask & category])) for category in TRIGGER_CATEGORIES])
+        indexes['_procs_with_icd'] = tuple([proc for proc in procs if proc.icd])
+        indexes['_procs_without_icd'] = tuple([proc for proc in procs if not proc.icd])
+        indexes['_damage_procs'] = tuple([proc for proc in procs if proc.stat in DAMAGE_STATS])
+        return indexes
 
     def __getattr__(self, proc):
         # Any proc we haven't assigned a value to, we don't have.
@@ -148,21 +211,20 @@ class ProcsList(object):
         object.__getattribute__(self, proc)
 
     def get_all_procs_for_stat(self, stat=None):
-        procs = []
-        for proc_name in self.allowed_procs:
-            proc = getattr(self, proc_name)
-            if proc:
-                if stat == None or proc.stat == stat:
-                    procs.append(proc)
-
-        return procs
+        if stat is None:
+            return self._all_procs
+        return self._procs_by_stat.get(stat, ())
 
     def get_all_damage_procs(self):
-        procs = []
-        for proc_name in self.allowed_procs:
-            proc = getattr(self, proc_name)
-            if proc:
-                if proc.stat in ('spell_damage', 'physical_damage'):
-                    procs.append(proc)
+        return self._damage_procs
+
+    def get_procs_for_trigger(self, category):
+        # The procs that proc off category, one of the trigger categories
+        # above (e.g. STRIKES).
+        return self._procs_by_trigger.get(category, ())
+
+    def get_procs_with_icd(self):
+        return self._procs_with_icd
 
-        return procs
+    def get_procs_without_icd(self):
+        return self._procs_without_icd
@@ -15,40 +15,55 @@ class Stats(object):
     expertise_rating_conversion_values = {60:2.34483 * 4, 70:3.69761 * 4, 80:7.68869 * 4, 81:10.0959 * 4, 82:13.2576 * 4, 83:17.4163 * 4, 84:22.8685 * 4, 85:30.027200698852539 * 4}
     mastery_rating_conversion_values = {60:14, 70:22.0769, 80:45.906, 81:60.2784, 82:79.1556, 83:103.986, 84:136.53799, 85:179.279998779296875}
 
+    # Stats are read-only once built: with_ gives a copy with some fields
+    # replaced, sharing everything else - weapons, procs, gear buffs and the
+    # level-derived rating conversions - with the original.  That way a base
+    # profile can be handed to optimizers, sweeps and workers without being
+    # copied first, and nothing they do can change it.
+    fields = ('str', 'agi', 'ap', 'crit', 'hit', 'exp', 'haste', 'mastery', 'mh', 'oh', 'ranged', 'procs', 'gear_buffs', 'level')
+
     def __init__(self, str, agi, ap, crit, hit, exp, haste, mastery, mh, oh, ranged, procs, gear_buffs, level=85):
         # This will need to be adjusted if at any point we want to support
         # other classes, but this is probably the easiest way to do it for
         # the moment.
-        self.str = str
-        self.agi = agi
-        self.ap = ap
-        self.crit = crit
-        self.hit = hit
-        self.exp = exp
-        self.haste = haste
-        self.mastery = mastery
-        self.mh = mh
-        self.oh = oh
-        self.ranged = ranged
-        self.procs = procs
-        self.gear_buffs = gear_buffs
-        self.level = level
+        values = (str, agi, ap, crit, hit, exp, haste, mastery, mh, oh, ranged, procs, gear_buffs, level)
+        for name, value in zip(self.fields, values):
+            object.__setattr__(self, name, value)
+        self._set_constants_for_level()
 
     def _set_constants_for_level(self):
         try:
-            self.melee_hit_rating_conversion = self.melee_hit_rating_conversion_values[self.level]
-            self.spell_hit_rating_conversion = self.spell_hit_rating_conversion_values[self.level]
-            self.crit_rating_conversion = self.crit_rating_conversion_values[self.level]
-            self.haste_rating_conversion = self.haste_rating_conversion_values[self.level]
-            self.expertise_rating_conversion = self.expertise_rating_conversion_values[self.level]
-            self.mastery_rating_conversion = self.mastery_rating_conversion_values[self.level]
+            conversions = (
+                ('melee_hit_rating_conversion', self.melee_hit_rating_conversion_values[self.level]),
+                ('spell_hit_rating_conversion', self.spell_hit_rating_conversion_values[self.level]),
+                ('crit_rating_conversion', self.crit_rating_conversion_values[self.level]),
+                ('haste_rating_conversion', self.haste_rating_conversion_values[self.level]),
+                ('expertise_rating_conversion', self.expertise_rating_conversion_values[self.level]),
+                ('mastery_rating_conversion', self.mastery_rating_conversion_values[self.level])
+            )
         except KeyError:
             raise exceptions.InvalidLevelException(_('No conversion factor available for level {level}').format(level=self.level))
-    
+        for name, value in conversions:
+            object.__setattr__(self, name, value)
+
     def __setattr__(self, name, value):
-        object.__setattr__(self, name, value)
-        if name == 'level':
-            self._set_constants_for_level()
+        raise AttributeError(_('Stats are read-only; use with_ to change {field}').format(field=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Stats are read-only; use with_ to change {field}').format(field=name))
+
+    def with_(self, **changes):
+        # A copy of these stats with the given fields replaced, e.g.
+        # stats.with_(haste=1500, crit=1200).
+        for name in changes:
+            if name not in self.fields:
+                raise exceptions.InvalidInputException(_('Unknown stat {stat}').format(stat=name))
+        copy = object.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.__dict__.update(changes)
+        if 'level' in changes and changes['level'] != self.level:
+            copy._set_constants_for_level()
+        return copy
 
     def get_mastery_from_rating(self, rating=None):
         if rating is None:
@@ -104,9 +119,7 @@ class Weapon(object):
 
         if enchant is not None:
             assert self.is_melee() and enchant in self.allowed_melee_enchants
-            proc = procs.PPMProc(*self.allowed_melee_enchants[enchant])
-            proc.proc_chance = proc.proc_rate(self.speed)
-            setattr(self, enchant, proc)
+            setattr(self, enchant, procs.PPMProc(*self.allowed_melee_enchants[enchant], speed=self.speed))
 
     def __getattr__(self, name):
         # Any enchant we haven't assigned a value to, we don't have.
@@ -143,10 +156,12 @@ class GearBuffs(object):
         'engineer_glove_enchant':   ('haste', 340, 12, 60)
     }
 
+    # Read-only once built, like Stats; with_ gives a copy with some gear
+    # buffs switched on or off.
     def __init__(self, *args):
         for arg in args:
             if arg in self.allowed_buffs:
-                setattr(self, arg, True)
+                object.__setattr__(self, arg, True)
 
     def __getattr__(self, name):
         # Any gear buff we haven't assigned a value to, we don't have.
@@ -154,6 +169,23 @@ class GearBuffs(object):
             return False
         object.__getattribute__(self, name)
 
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Gear buffs are read-only; use with_ to change {buff}').format(buff=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Gear buffs are read-only; use with_ to change {buff}').format(buff=name))
+
+    def with_(self, **changes):
+        # e.g. gear_buffs.with_(chaotic_metagem=True, rogue_t11_2pc=False).
+        for name in changes:
+            if name not in self.allowed_buffs:
+                raise exceptions.InvalidInputException(_('Unknown gear buff {buff}').format(buff=name))
+        copy = object.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        for name, value in changes.items():
+            copy.__dict__[name] = bool(value)
+        return copy
+
     def metagem_crit_multiplier(self):
         if self.chaotic_metagem:
             return 1.03
@@ -27,7 +27,13 @@ class TalentTree(object):
         if talent_value < 0 or talent_value > self.allowed_talents[talent_name]:
             raise InvalidTalentException(_('Invalid value {talent_value} for talent {talent_name}').format(talent_value=talent_value, talent_name=talent_name))
 
-        setattr(self, talent_name, int(talent_value))
+        object.__setattr__(self, talent_name, int(talent_value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Talents are read-only; use with_ to change {talent}').format(talent=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Talents are read-only; use with_ to change {talent}').format(talent=name))
 
     def __init__(self, talent_string = '', **kwargs):
         if not talent_string:
@@ -62,41 +68,64 @@ class ClassTalents(object):
         NotImplemented
 
     def __init__(self, string1, string2, string3):
-        self.trees = list()
-        self.spec = None
-
-        # instantiate the three trees using the specified strings. while we're
-        # at it, count up the total talents as a sanity check, and find the
-        # tree with the most talents to determine spec. since the specced tree
-        # always has either 1) all the talents, or 2) at least 31 talents while
-        # the other two have fewer than 31 talents, this works.
+        # instantiate the three trees using the specified strings.
+        trees = [treeClass(string) for (treeClass, string) in zip(self.treeClasses(), [string1, string2, string3])]
+        self._set_trees(trees)
+
+    def _set_trees(self, trees):
+        # count up the total talents as a sanity check, and find the tree with
+        # the most talents to determine spec. since the specced tree always
+        # has either 1) all the talents, or 2) at least 31 talents while the
+        # other two have fewer than 31 talents, this works.
+        spec = None
         maxTalents = 0
         totalTalents = 0
-        for (treeClass, string) in zip(self.treeClasses(), [string1, string2, string3]):
-            tree = treeClass(string)
+        for tree in trees:
             if maxTalents < tree.talents_in_tree():
                 maxTalents = tree.talents_in_tree()
-                self.spec = treeClass
+                spec = tree.__class__
             totalTalents += tree.talents_in_tree()
-            self.trees.append(tree)
 
         # build up a dict of talents to trees for quicker access in __getattr__
-        self.treeForTalent = dict()
-        for tree in self.trees:
+        treeForTalent = dict()
+        for tree in trees:
             for name in tree.allowed_talents.keys():
-                self.treeForTalent[name] = tree
+                treeForTalent[name] = tree
 
         # May need to be adjusted if we're going to allow calculations at
         # multiple character levels, but this will do for the moment.
         if totalTalents > 41:
             raise InvalidTalentException(_('Total number of talentpoints has to be 41 or less'))
 
+        object.__setattr__(self, 'trees', trees)
+        object.__setattr__(self, 'spec', spec)
+        object.__setattr__(self, 'treeForTalent', treeForTalent)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(_('Talents are read-only; use with_ to change {talent}').format(talent=name))
+
+    def __delattr__(self, name):
+        raise AttributeError(_('Talents are read-only; use with_ to change {talent}').format(talent=name))
+
+    def with_(self, **changes):
+        # A copy with the given talents set to new point values; each changed
+        # tree is rebuilt, so the usual checks apply to the result.
+        values = [dict(tree.__dict__) for tree in self.trees]
+        for name, value in changes.items():
+            if name not in self.treeForTalent:
+                raise InvalidTalentException(_('Invalid talent name {talent_name}').format(talent_name=name))
+            values[self.trees.index(self.treeForTalent[name])][name] = value
+        copy = object.__new__(self.__class__)
+        copy._set_trees([tree.__class__(**tree_values) for (tree, tree_values) in zip(self.trees, values)])
+        return copy
+
     def is_specced(self, treeClass):
         return self.spec == treeClass
 
     def __getattr__(self, name):
         # If someone tries to access a talent defined on one of the trees,
-        # access it through that tree.
-        if name in self.treeForTalent.keys():
+        # access it through that tree.  treeForTalent itself can be missing
+        # while an instance is being unpickled or copied; don't recurse.
+        if name != 'treeForTalent' and name in self.treeForTalent.keys():
             return getattr(self.treeForTalent[name], name)
         object.__getattribute__(self, name)
@@ -0,0 +1,4 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
@@ -0,0 +1,231 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import itertools
+
+from core import exceptions
+from core import executors
+from objects import stats
+from optimizers import reforging
+
+# Chooses gems, the meta gem and weapon enchants to maximize a calculator's
+# DPS.  The calculator's stats must be the character's without any gems,
+# socket bonuses or meta gem effect; its weapon enchants are replaced.
+# items lists the socketed items, each as {'sockets': [colors], 'bonus':
+# {stat: rating}}, where a color is red, yellow, blue, meta or prismatic.
+# A socket bonus only applies when every socket holds a gem matching its
+# color; prismatic sockets take anything and count as matched.
+#
+# Enchants and the meta gem change the procs and crit damage the model
+# works with, which stat weights can't rank; so every combination of them
+# (a configuration) is evaluated exactly, with the gems stat weights pick
+# for it.  Only the best few configurations are then refined: with weights
+# worked out for that configuration, each item's gems are chosen either to
+# match its sockets or to ignore them, and that plan and each single-item
+# flip of it are evaluated exactly.
+
+# Gem name -> (socket colors it matches, ratings).
+GEMS = {
+    'delicate_inferno_ruby':    (('red',), {'agi': 40}),
+    'precise_inferno_ruby':     (('red',), {'exp': 40}),
+    'smooth_amberjewel':        (('yellow',), {'crit': 40}),
+    'quick_amberjewel':         (('yellow',), {'haste': 40}),
+    'fractured_amberjewel':     (('yellow',), {'mastery': 40}),
+    'rigid_ocean_sapphire':     (('blue',), {'hit': 40}),
+    'deadly_ember_topaz':       (('red', 'yellow'), {'agi': 20, 'crit': 20}),
+    'deft_ember_topaz':         (('red', 'yellow'), {'agi': 20, 'haste': 20}),
+    'adept_ember_topaz':        (('red', 'yellow'), {'agi': 20, 'mastery': 20}),
+    'glinting_demonseye':       (('red', 'blue'), {'agi': 20, 'hit': 20}),
+    'accurate_demonseye':       (('red', 'blue'), {'exp': 20, 'hit': 20}),
+    'piercing_dream_emerald':   (('yellow', 'blue'), {'crit': 20, 'hit': 20}),
+    'lightning_dream_emerald':  (('yellow', 'blue'), {'haste': 20, 'hit': 20}),
+    'senseis_dream_emerald':    (('yellow', 'blue'), {'mastery': 20, 'hit': 20})
+}
+
+# Meta gem name -> (ratings, GearBuffs entry for its effect).  Activation
+# requirements aren't modeled.
+META_GEMS = {
+    'chaotic_shadowspirit_diamond': ({'crit': 54}, 'chaotic_metagem'),
+    'agile_shadowspirit_diamond':   ({'agi': 54}, 'chaotic_metagem')
+}
+
+SOCKET_COLORS = frozenset(['red', 'yellow', 'blue', 'meta', 'prismatic'])
+WEIGHTED_STATS = ('agi', 'crit', 'hit', 'exp', 'haste', 'mastery')
+META_BUFFS = frozenset([buff for ratings, buff in META_GEMS.values()])
+
+class GemOptimizer(object):
+    def __init__(self, calculator, items, executor=None, gems=None, meta_gems=None, enchants=None, configurations_to_refine=3):
+        for item in items:
+            for color in item['sockets']:
+                if color not in SOCKET_COLORS:
+                    raise exceptions.InvalidInputException(_('Invalid socket color {color}').format(color=color))
+        self.calculator = calculator
+        self.items = items
+        self.executor = executor or executors.SerialExecutor()
+        self.gems = gems or GEMS
+        self.meta_gems = meta_gems or META_GEMS
+        if enchants is None:
+            enchants = sorted(stats.Weapon.allowed_melee_enchants) + [None]
+        self.enchants = enchants
+        self.configurations_to_refine = configurations_to_refine
+        self.columns = calculator.BATCH_STAT_COLUMNS
+        self.base_row = tuple([getattr(calculator.stats, stat) for stat in self.columns])
+        self.has_meta_socket = False
+        for item in items:
+            if 'meta' in item['sockets']:
+                self.has_meta_socket = True
+
+    def get_configurations(self):
+        # (meta gem or None, main hand enchant, off hand enchant) triples.
+        if self.has_meta_socket:
+            meta_gems = sorted(self.meta_gems)
+        else:
+            meta_gems = [None]
+        return list(itertools.product(meta_gems, self.enchants, self.enchants))
+
+    def configure(self, configuration):
+        # A copy of the calculator with configuration's meta gem effect and
+        # enchants.
+        meta_gem, mh_enchant, oh_enchant = configuration
+        character_stats = self.calculator.stats
+        gear_buffs = [buff for buff in stats.GearBuffs.allowed_buffs if getattr(character_stats.gear_buffs, buff) and buff not in META_BUFFS]
+        if meta_gem is not None:
+            gear_buffs.append(self.meta_gems[meta_gem][1])
+        return self.calculator.with_(mh=self.enchanted(character_stats.mh, mh_enchant),
+                                     oh=self.enchanted(character_stats.oh, oh_enchant),
+                                     gear_buffs=stats.GearBuffs(*gear_buffs))
+
+    def enchanted(self, weapon, enchant):
+        return stats.Weapon(weapon.weapon_dps * weapon.speed, weapon.speed, weapon.type, enchant)
+
+    def gem_value(self, gem, weights):
+        return sum([weights[stat] * rating for stat, rating in self.gems[gem][1].items()])
+
+    def matches(self, gem, color):
+        return color == 'prismatic' or color in self.gems[gem][0]
+
+    def get_item_plans(self, item, weights):
+        # Returns the item's sensible gemmings by estimated value, best
+        # first, as (value, gems, ratings) with gems listed socket by socket
+        # (None for the meta socket, which get_plan fills in).  There are at
+        # most two: every socket matched, bonus included, and the best gem
+        # in every socket regardless of color.
+        gem_names = sorted(self.gems)
+        best_gem = max([(self.gem_value(gem, weights), gem) for gem in gem_names])[1]
+        plans = []
+        for match_sockets in (True, False):
+            gems = []
+            ratings = {}
+            matched = True
+            for color in item['sockets']:
+                if color == 'meta':
+                    gems.append(None)
+                    continue
+                if match_sockets:
+                    gem = max([(self.gem_value(name, weights), name) for name in gem_names if self.matches(name, color)])[1]
+                else:
+                    gem = best_gem
+                matched = matched and self.matches(gem, color)
+                gems.append(gem)
+                for stat, rating in self.gems[gem][1].items():
+                    ratings[stat] = ratings.get(stat, 0) + rating
+            if matched:
+                for stat, rating in item.get('bonus', {}).items():
+                    ratings[stat] = ratings.get(stat, 0) + rating
+            value = sum([weights[stat] * rating for stat, rating in ratings.items()])
+            if gems not in [plan[1] for plan in plans]:
+                plans.append((value, gems, ratings))
+        plans.sort(reverse=True)
+        return plans
+
+    def get_row(self, configuration, ratings_list):
+        row = list(self.base_row)
+        meta_gem = configuration[0]
+        if meta_gem is not None:
+            ratings_list = ratings_list + [self.meta_gems[meta_gem][0]]
+        for ratings in ratings_list:
+            for stat, rating in ratings.items():
+                row[self.columns.index(stat)] += rating
+        return tuple(row)
+
+    def get_weights_rows(self, row):
+        rows = [row]
+        for stat in WEIGHTED_STATS:
+            perturbed_row = list(row)
+            perturbed_row[self.columns.index(stat)] += 1
+            rows.append(tuple(perturbed_row))
+        return rows
+
+    def get_weights(self, dps_values):
+        weights = {}
+        for stat, dps in zip(WEIGHTED_STATS, dps_values[1:]):
+            weights[stat] = dps - dps_values[0]
+        return weights
+
+    def get_plan(self, configuration, item_plans, flipped=None):
+        # Each item's best plan, except the second best for item flipped.
+        gems = []
+        ratings_list = []
+        for index, plans in enumerate(item_plans):
+            plan = plans[0]
+            if index == flipped:
+                plan = plans[1]
+            item_gems = list(plan[1])
+            for socket, color in enumerate(self.items[index]['sockets']):
+                if color == 'meta':
+                    item_gems[socket] = configuration[0]
+            gems.append(item_gems)
+            ratings_list.append(plan[2])
+        return gems, self.get_row(configuration, ratings_list)
+
+    def optimize(self):
+        # Returns (configuration, gems, dps): configuration is a dict with
+        # the meta gem and the enchant for each hand, and gems the gem for
+        # each socket of each item.
+        configurations = self.get_configurations()
+        calculators = [self.configure(configuration) for configuration in configurations]
+
+        # Rank the configurations on one set of weights, worked out for the
+        # first configuration with no gems at all.
+        weights = self.get_weights(self.executor.map(reforging.batch_dps, [(calculators[0], self.get_weights_rows(self.base_row))]).next())
+        item_plans = [self.get_item_plans(item, weights) for item in self.items]
+        tasks = []
+        for configuration, calculator in zip(configurations, calculators):
+            tasks.append((calculator, [self.get_plan(configuration, item_plans)[1]]))
+        ranking = []
+        for index, dps_values in enumerate(self.executor.map(reforging.batch_dps, tasks)):
+            ranking.append((dps_values[0], index))
+        ranking.sort(reverse=True)
+        refined = [index for dps, index in ranking[:self.configurations_to_refine]]
+
+        # Each of the best configurations gets its own weights, at its
+        # ranked gems, and exact evaluations of its best plan by those and
+        # each flip of it (alongside the ranked gems, in case they're
+        # better still).
+        tasks = []
+        for index in refined:
+            row = self.get_plan(configurations[index], item_plans)[1]
+            tasks.append((calculators[index], self.get_weights_rows(row)))
+        configuration_weights = [self.get_weights(dps_values) for dps_values in self.executor.map(reforging.batch_dps, tasks)]
+
+        tasks = []
+        candidates = []
+        for index, weights in zip(refined, configuration_weights):
+            configuration = configurations[index]
+            plans = [self.get_item_plans(item, weights) for item in self.items]
+            configuration_candidates = [self.get_plan(configuration, item_plans), self.get_plan(configuration, plans)]
+            for item_index in xrange(len(self.items)):
+                if len(plans[item_index]) > 1:
+                    configuration_candidates.append(self.get_plan(configuration, plans, item_index))
+            candidates.append(configuration_candidates)
+            tasks.append((calculators[index], [row for gems, row in configuration_candidates]))
+
+        best = None
+        for index, configuration_candidates, dps_values in zip(refined, candidates, self.executor.map(reforging.batch_dps, tasks)):
+            for (gems, row), dps in zip(configuration_candidates, dps_values):
+                if best is None or dps > best[2]:
+                    meta_gem, mh_enchant, oh_enchant = configurations[index]
+                    best = ({'meta_gem': meta_gem, 'mh_enchant': mh_enchant, 'oh_enchant': oh_enchant}, gems, dps)
+        return best
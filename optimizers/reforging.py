@@ -0,0 +1,184 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+from core import exceptions
+from core import executors
+from core import lru_cache
+
+# Finds the reforges that maximize a calculator's DPS.  Each item can have
+# 40% (rounded down) of one of its secondary ratings moved to a secondary
+# rating it doesn't have.  The calculator's stats must be the character's
+# ratings before reforging, and items a list with each item's secondary
+# ratings, e.g. {'crit': 168, 'haste': 112}; a reforge is None or a
+# (from stat, to stat) pair, and a character's reforges a list of those, in
+# the same order as items.
+#
+# The search is a local search guided by stat weights: each round, the
+# weights (DPS per point of each rating, by finite differences) rank every
+# single-item change; the best few, along with the best change for every
+# item at once, are then evaluated exactly, and the best of those is
+# accepted if it actually beats the current reforges.  Caps make the
+# weights change abruptly, which is why every step is confirmed with
+# get_dps rather than trusted, and why, when none of those is better, every
+# single-item change is evaluated before the search stops.  Exact
+# evaluations go through
+# get_dps_batch, on executor (see core.executors), and are cached by total
+# ratings, since different reforges often give the same totals.
+
+SECONDARY_STATS = ('crit', 'hit', 'exp', 'haste', 'mastery')
+REFORGE_FRACTION = .4
+
+class ReforgeOptimizer(object):
+    def __init__(self, calculator, items, executor=None, candidates_per_round=8, cache_size=4096):
+        for item in items:
+            for stat in item:
+                if stat not in SECONDARY_STATS:
+                    raise exceptions.InvalidInputException(_('Cannot reforge {stat}').format(stat=stat))
+        self.calculator = calculator
+        self.items = items
+        self.executor = executor or executors.SerialExecutor()
+        self.candidates_per_round = candidates_per_round
+        self.cache = lru_cache.LRUCache(cache_size)
+        self.columns = calculator.BATCH_STAT_COLUMNS
+        self.base_row = tuple([getattr(calculator.stats, stat) for stat in self.columns])
+
+    def reforge_options(self, item):
+        options = [None]
+        for from_stat in SECONDARY_STATS:
+            if item.get(from_stat, 0) > 0:
+                for to_stat in SECONDARY_STATS:
+                    if item.get(to_stat, 0) == 0:
+                        options.append((from_stat, to_stat))
+        return options
+
+    def reforge_amount(self, item, reforge):
+        if reforge is None:
+            return 0
+        return int(item[reforge[0]] * REFORGE_FRACTION)
+
+    def check_reforges(self, reforges):
+        if len(reforges) != len(self.items):
+            raise exceptions.InvalidInputException(_('Expected {count} reforges, got {length}').format(count=len(self.items), length=len(reforges)))
+        for item, reforge in zip(self.items, reforges):
+            if reforge not in self.reforge_options(item):
+                raise exceptions.InvalidInputException(_('Invalid reforge {reforge}').format(reforge=reforge))
+
+    def get_row(self, reforges):
+        row = list(self.base_row)
+        for item, reforge in zip(self.items, reforges):
+            amount = self.reforge_amount(item, reforge)
+            if amount:
+                row[self.columns.index(reforge[0])] -= amount
+                row[self.columns.index(reforge[1])] += amount
+        return tuple(row)
+
+    def get_dps_for_rows(self, rows):
+        # Exact DPS for each of rows, evaluating only those not already in
+        # the cache, split into one chunk per worker.
+        missing = []
+        for row in rows:
+            if row not in self.cache and row not in missing:
+                missing.append(row)
+        if missing:
+            chunk_count = min(len(missing), getattr(self.executor, 'processes', 1))
+            chunks = [missing[index::chunk_count] for index in xrange(chunk_count)]
+            tasks = [(self.calculator, chunk) for chunk in chunks]
+            for chunk, dps_values in zip(chunks, self.executor.map(batch_dps, tasks)):
+                for row, dps in zip(chunk, dps_values):
+                    self.cache.put(row, dps)
+        return [self.cache.get(row) for row in rows]
+
+    def get_dps(self, reforges):
+        return self.get_dps_for_rows([self.get_row(reforges)])[0]
+
+    def get_stat_weights(self, reforges):
+        # DPS gained per point of each secondary rating, at reforges.
+        row = self.get_row(reforges)
+        rows = [row]
+        for stat in SECONDARY_STATS:
+            perturbed_row = list(row)
+            perturbed_row[self.columns.index(stat)] += 1
+            rows.append(tuple(perturbed_row))
+        dps_values = self.get_dps_for_rows(rows)
+        weights = {}
+        for stat, dps in zip(SECONDARY_STATS, dps_values[1:]):
+            weights[stat] = dps - dps_values[0]
+        return weights
+
+    def estimate_gain(self, item, reforge, weights):
+        # Estimated DPS from reforge, relative to leaving item alone.
+        amount = self.reforge_amount(item, reforge)
+        if not amount:
+            return 0
+        return amount * (weights[reforge[1]] - weights[reforge[0]])
+
+    def optimize(self, reforges=None, max_rounds=20):
+        # Returns (best reforges found, their DPS), starting the search
+        # from reforges (defaulting to none at all).
+        if reforges is None:
+            reforges = [None] * len(self.items)
+        else:
+            reforges = list(reforges)
+            self.check_reforges(reforges)
+        dps = self.get_dps(reforges)
+
+        for attempt in xrange(max_rounds):
+            weights = self.get_stat_weights(reforges)
+            moves = []
+            best_by_item = list(reforges)
+            for index, item in enumerate(self.items):
+                current_gain = self.estimate_gain(item, reforges[index], weights)
+                best_gain = 0
+                for option in self.reforge_options(item):
+                    gain = self.estimate_gain(item, option, weights) - current_gain
+                    if option != reforges[index] and gain > 0:
+                        moves.append((gain, index, option))
+                        if gain > best_gain:
+                            best_gain = gain
+                            best_by_item[index] = option
+            moves.sort(reverse=True)
+            candidates = [best_by_item]
+            for gain, index, option in moves[:self.candidates_per_round]:
+                candidates.append(self.with_reforge(reforges, index, option))
+            best_dps, best_candidate = self.best_candidate(candidates)
+
+            if best_dps <= dps:
+                # The weights found nothing; before giving up, try every
+                # single-item change, which catches those the weights
+                # misjudge near a cap.
+                candidates = []
+                for index, item in enumerate(self.items):
+                    for option in self.reforge_options(item):
+                        if option != reforges[index]:
+                            candidates.append(self.with_reforge(reforges, index, option))
+                best_dps, best_candidate = self.best_candidate(candidates)
+                if best_dps <= dps:
+                    break
+
+            reforges = best_candidate
+            dps = best_dps
+
+        return reforges, dps
+
+    def with_reforge(self, reforges, index, reforge):
+        candidate = list(reforges)
+        candidate[index] = reforge
+        return candidate
+
+    def best_candidate(self, candidates):
+        # Returns (DPS, reforges) for the best of candidates.
+        if not candidates:
+            return None, None
+        dps_values = self.get_dps_for_rows([self.get_row(candidate) for candidate in candidates])
+        best_dps = max(dps_values)
+        return best_dps, candidates[dps_values.index(best_dps)]
+
+
+def batch_dps(task):
+    # Worker for ReforgeOptimizer.get_dps_for_rows (and the other
+    # optimizers): task is (calculator, rows of ratings).  Lives at module
+    # level so process pools can pickle it.
+    calculator, rows = task
+    return calculator.get_dps_batch(rows)
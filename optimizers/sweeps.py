@@ -0,0 +1,266 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+import copy
+import itertools
+
+from calcs.rogue.Aldriana import profiles
+from core import exceptions
+from core import executors
+from objects import buffs
+from objects import race
+from objects import stats
+from objects.rogue import rogue_glyphs
+
+# Evaluates every combination of a calculator's categorical inputs - buffs,
+# glyphs, race, gear buffs (consumables and activated items included) and
+# poisons - and ranks them by DPS.  Each buff, glyph and gear buff to sweep
+# is an axis of its own, on or off; races and each hand's poison are one
+# axis each, over the choices given.  Everything not swept stays as the
+# calculator has it.
+#
+# The model only sees these inputs through a handful of derived quantities
+# (Buffs.stat_multiplier, the racial expertise for the weapons in hand, the
+# poison on each hand, the glyphs in the calculator's modeled_glyphs
+# table, ...), listed in get_rate_quantities and
+# get_damage_quantities.  Points with the same quantities have the same
+# DPS, so only one of them is evaluated.  Further, the damage quantities -
+# the raid damage multipliers for spells, physical attacks and bleeds -
+# only scale the damage of each source, and never the attack counts the
+# model converges on.  So the model is run once for each distinct set of
+# rate quantities, for a damage breakdown, and every point sharing them
+# gets its DPS by rescaling that breakdown: a full matrix of the 14 buffs,
+# five of which only change damage multipliers, takes 512 evaluations
+# rather than 16384.  affected_quantities reports which quantities each
+# axis actually moves.
+
+POISONS = ('ip', 'dp', 'wp')
+
+# Axis kind -> what its choices may name.
+ALLOWED_CHOICES = {
+    'buffs': buffs.Buffs.allowed_buffs,
+    'glyphs': rogue_glyphs.RogueGlyphs.allowed_glyphs,
+    'gear_buffs': stats.GearBuffs.allowed_buffs,
+    'race': race.Race.racial_stat_offset,
+    'mh_poison': POISONS,
+    'oh_poison': POISONS
+}
+
+# The stats set_constants adds activated gear boosts to.
+BOOSTED_STATS = ('agi', 'ap', 'crit', 'haste', 'mastery')
+
+def get_rate_quantities(calculator):
+    # (name, value) for everything the categorical inputs feed into besides
+    # the raid damage multipliers.
+    character_buffs = calculator.buffs
+    character_race = calculator.race
+    gear_buffs = calculator.stats.gear_buffs
+    quantities = [
+        ('stat_multiplier', character_buffs.stat_multiplier()),
+        ('melee_haste_multiplier', character_buffs.melee_haste_multiplier()),
+        ('attack_power_multiplier', character_buffs.attack_power_multiplier()),
+        ('buff_str', character_buffs.buff_str()),
+        ('buff_agi', character_buffs.buff_agi()),
+        ('buff_all_crit', character_buffs.buff_all_crit()),
+        ('buff_spell_crit', character_buffs.buff_spell_crit()),
+        ('heroism_uptime', calculator.heroism_uptime_per_fight()),
+        ('racial_str', character_race.racial_str),
+        ('racial_agi', character_race.racial_agi),
+        ('racial_hit', character_race.get_racial_hit()),
+        ('mh_racial_expertise', character_race.get_racial_expertise(calculator.stats.mh.type)),
+        ('oh_racial_expertise', character_race.get_racial_expertise(calculator.stats.oh.type)),
+        ('metagem_crit_multiplier', gear_buffs.metagem_crit_multiplier()),
+        ('rogue_t11_2pc_crit_bonus', gear_buffs.rogue_t11_2pc_crit_bonus()),
+        ('leather_specialization_multiplier', gear_buffs.leather_specialization_multiplier()),
+        ('activated_boosts', tuple([tuple(gear_buffs.get_all_activated_boosts_for_stat(stat)) for stat in BOOSTED_STATS])),
+        ('mh_poison', calculator.settings.mh_poison),
+        ('oh_poison', calculator.settings.oh_poison)
+    ]
+    for glyph in sorted(calculator.modeled_glyphs):
+        quantities.append((glyph + '_glyph', bool(getattr(calculator.glyphs, glyph))))
+    return quantities
+
+def get_damage_quantities(calculator):
+    # (name, value) for the raid damage multipliers, which scale damage
+    # without touching attack counts.
+    return [
+        ('spell_damage', calculator.raid_settings_modifiers(is_spell=True)),
+        ('physical_damage', calculator.raid_settings_modifiers(is_physical=True)),
+        ('bleed_damage', calculator.raid_settings_modifiers(is_bleed=True))
+    ]
+
+def damage_category(calculator, source):
+    # The damage quantity that scales source, a key of a damage breakdown,
+    # or None if there isn't one.
+    arguments = calculator.modifier_arguments.get(source)
+    if arguments is not None:
+        raid_arguments = arguments[1]
+        if raid_arguments.get('is_spell'):
+            return 'spell_damage'
+        elif raid_arguments.get('is_bleed'):
+            return 'bleed_damage'
+        return 'physical_damage'
+    proc = getattr(calculator.stats.procs, source, None)
+    if proc and proc.stat in ('spell_damage', 'physical_damage'):
+        return proc.stat
+    return None
+
+def apply_point(calculator, point):
+    # A copy of calculator with its categorical inputs replaced by those of
+    # point, a dict like describe_point returns.
+    settings = copy.copy(calculator.settings)
+    settings.mh_poison = point['mh_poison']
+    settings.oh_poison = point['oh_poison']
+    return calculator.with_(buffs=buffs.Buffs(*point['buffs'], level=calculator.level),
+                            glyphs=rogue_glyphs.RogueGlyphs(*point['glyphs']),
+                            race=race.Race(point['race'], level=calculator.level),
+                            gear_buffs=stats.GearBuffs(*point['gear_buffs']),
+                            settings=settings)
+
+def describe_point(calculator):
+    return {
+        'buffs': profiles.active_names(calculator.buffs, buffs.Buffs.allowed_buffs),
+        'glyphs': profiles.active_names(calculator.glyphs, rogue_glyphs.RogueGlyphs.allowed_glyphs),
+        'race': calculator.race.race_name,
+        'gear_buffs': profiles.active_names(calculator.stats.gear_buffs, stats.GearBuffs.allowed_buffs),
+        'mh_poison': calculator.settings.mh_poison,
+        'oh_poison': calculator.settings.oh_poison
+    }
+
+
+class CategoricalSweep(object):
+    def __init__(self, calculator, buffs=(), glyphs=(), races=(), gear_buffs=(), mh_poisons=(), oh_poisons=(), executor=None):
+        self.calculator = calculator
+        self.executor = executor or executors.SerialExecutor()
+        # (kind, name, choices) for each axis; name is the buff, glyph or
+        # gear buff for on/off axes, None for the others.
+        self.axes = []
+        for kind, names in (('buffs', buffs), ('glyphs', glyphs), ('gear_buffs', gear_buffs)):
+            profiles.check_names(names, ALLOWED_CHOICES[kind], kind)
+            for name in names:
+                self.axes.append((kind, name, (False, True)))
+        for kind, choices in (('race', races), ('mh_poison', mh_poisons), ('oh_poison', oh_poisons)):
+            profiles.check_names(choices, ALLOWED_CHOICES[kind], kind)
+            if choices:
+                self.axes.append((kind, None, tuple(choices)))
+        self.base_point = describe_point(calculator)
+        self.evaluations = 0
+
+    def get_point(self, choices):
+        # The describe_point style dict for one choice on each axis.
+        point = copy.deepcopy(self.base_point)
+        for axis, choice in zip(self.axes, choices):
+            self.choose(point, axis, choice)
+        return point
+
+    def choose(self, point, axis, choice):
+        kind, name, choices = axis
+        if name is None:
+            point[kind] = choice
+        elif choice and name not in point[kind]:
+            point[kind] = sorted(point[kind] + [name])
+        elif not choice and name in point[kind]:
+            point[kind] = [other for other in point[kind] if other != name]
+
+    def get_points(self):
+        return [self.get_point(choices) for choices in itertools.product(*[choices for kind, name, choices in self.axes])]
+
+    def get_quantities(self, points):
+        # (rate quantities, damage quantities) for each of points, each a
+        # tuple of values.
+        quantities = []
+        for point in points:
+            calculator = apply_point(self.calculator, point)
+            rate_quantities = tuple([value for name, value in get_rate_quantities(calculator)])
+            damage_quantities = tuple([value for name, value in get_damage_quantities(calculator)])
+            quantities.append((rate_quantities, damage_quantities))
+        return quantities
+
+    def affected_quantities(self):
+        # Axis (kind, name) -> the names of the derived quantities that
+        # change along it, the other axes left as the calculator has them.
+        # An axis with none can't change DPS.
+        names = [name for name, value in get_rate_quantities(self.calculator) + get_damage_quantities(self.calculator)]
+        affected = {}
+        for axis in self.axes:
+            kind, name, choices = axis
+            points = []
+            for choice in choices:
+                point = copy.deepcopy(self.base_point)
+                self.choose(point, axis, choice)
+                points.append(point)
+            values = [rate_quantities + damage_quantities for rate_quantities, damage_quantities in self.get_quantities(points)]
+            affected[(kind, name)] = [names[position] for position in xrange(len(names)) if len(set([value[position] for value in values])) > 1]
+        return affected
+
+    def run(self):
+        # Returns [(dps, point)] for every point, best first; points the
+        # model rejects come last, with a DPS of None.
+        points = self.get_points()
+        quantities = self.get_quantities(points)
+
+        # One exact evaluation per distinct set of rate quantities, at the
+        # first point that has them.
+        representatives = {}
+        for point, (rate_quantities, damage_quantities) in zip(points, quantities):
+            if rate_quantities not in representatives:
+                representatives[rate_quantities] = (point, damage_quantities)
+        groups = representatives.keys()
+        breakdowns = {}
+        if groups:
+            chunk_count = min(len(groups), getattr(self.executor, 'processes', 1))
+            chunks = [groups[index::chunk_count] for index in xrange(chunk_count)]
+            tasks = [(self.calculator, [representatives[group][0] for group in chunk]) for chunk in chunks]
+            for chunk, chunk_breakdowns in zip(chunks, self.executor.map(sweep_breakdowns, tasks)):
+                for group, breakdown in zip(chunk, chunk_breakdowns):
+                    breakdowns[group] = breakdown
+            self.evaluations += len(groups)
+
+        damage_names = [name for name, value in get_damage_quantities(self.calculator)]
+        results = []
+        for point, (rate_quantities, damage_quantities) in zip(points, quantities):
+            breakdown = breakdowns[rate_quantities]
+            if breakdown is None:
+                results.append((None, point))
+                continue
+            base_damage_quantities = representatives[rate_quantities][1]
+            dps = 0
+            for source, source_dps in breakdown.items():
+                category = damage_category(self.calculator, source)
+                if category is not None:
+                    position = damage_names.index(category)
+                    dps += source_dps * damage_quantities[position] / base_damage_quantities[position]
+                elif damage_quantities == base_damage_quantities:
+                    dps += source_dps
+                else:
+                    # A source no damage quantity accounts for; only an
+                    # exact evaluation will do.
+                    dps = sum(sweep_breakdowns((self.calculator, [point]))[0].values())
+                    self.evaluations += 1
+                    break
+            results.append((dps, point))
+
+        results.sort(key=self.rank)
+        return results
+
+    def rank(self, result):
+        dps, point = result
+        if dps is None:
+            return (1, 0)
+        return (0, -dps)
+
+
+def sweep_breakdowns(task):
+    # Worker for CategoricalSweep.run: task is (calculator, points).
+    # Returns the DPS breakdown at each point, or None where the model
+    # rejects it.  Lives at module level so process pools can pickle it.
+    calculator, points = task
+    breakdowns = []
+    for point in points:
+        try:
+            breakdowns.append(profiles.evaluate(apply_point(calculator, point), 'breakdown'))
+        except exceptions.InvalidInputException:
+            breakdowns.append(None)
+    return breakdowns
@@ -0,0 +1,206 @@
+import gettext
+import __builtin__
+
+__builtin__._ = gettext.gettext
+
+from calcs.rogue import Aldriana
+from core import exceptions
+from core import executors
+from objects.rogue import rogue_talents
+
+# Searches for the talent build with the highest DPS, starting from the
+# calculator's own.  A build moves one point at a time between talents,
+# within the rules the engine knows about: at most 41 points, no talent
+# past its maximum, the spec's tree staying the spec, and the talents the
+# spec's model requires (Master Poisoner and Cut to the Chase for
+# assassination) left alone.  Builds the model rejects are skipped.
+#
+# Talents the model never reads can't change DPS, so they're pruned before
+# any evaluation: points never move into or out of them, and whatever the
+# starting build has in them stays put as filler.  The calculator declares
+# the talents it reads in its modeled_talents table.
+#
+# This is a local search, not an enumeration of the valid builds: even
+# pruned, an assassination build has 32 points to spread over 27 talents,
+# some 2 * 10**13 ways, against a few milliseconds per evaluation.  So the
+# best build it finds is the best within one point swap of itself, which
+# needn't be the best there is.  Each round, the exact
+# DPS of adding or removing one point in every remaining talent ranks the
+# point swaps between them (a full build's additions are measured with its
+# cheapest point taken back); the best few swaps are evaluated exactly and
+# the best accepted if it gains DPS, falling back to every possible swap
+# before the search stops.  Every candidate shares the calculator's gear,
+# buffs and settings; only its talents are replaced.
+
+MAX_POINTS = 41
+
+# Spec -> {talent: points} the spec's model insists on.
+REQUIRED_TALENTS = {
+    'assassination': {'master_poisoner': 1, 'cut_to_the_chase': 3}
+}
+
+_tree_orders = {}
+
+def tree_order(tree_class):
+    # The talents of tree_class in talent string order.
+    order = _tree_orders.get(tree_class)
+    if order is None:
+        length = len(tree_class.allowed_talents)
+        order = []
+        for position in xrange(length):
+            tree = tree_class('0' * position + '1' + '0' * (length - position - 1))
+            for name in tree.allowed_talents:
+                if getattr(tree, name):
+                    order.append(name)
+        _tree_orders[tree_class] = order
+    return order
+
+def talent_strings(build):
+    # The three talent strings for build, a dict of talent -> points.
+    strings = []
+    for tree_class in rogue_talents.RogueTalents.treeClasses():
+        strings.append(''.join([str(build.get(name, 0)) for name in tree_order(tree_class)]))
+    return tuple(strings)
+
+def get_build(talents):
+    return dict([(name, getattr(talents, name)) for name in talents.treeForTalent])
+
+def get_spec(talents):
+    if talents.is_assassination_rogue():
+        return 'assassination'
+    elif talents.is_combat_rogue():
+        return 'combat'
+    raise Aldriana.InputNotModeledException(_('Talent searches are only modeled for assassination and combat.'))
+
+
+class TalentSearch(object):
+    def __init__(self, calculator, executor=None, candidates_per_round=8):
+        self.calculator = calculator
+        self.executor = executor or executors.SerialExecutor()
+        self.candidates_per_round = candidates_per_round
+        self.spec = get_spec(calculator.talents)
+        required = REQUIRED_TALENTS.get(self.spec, {})
+        self.maximums = {}
+        for tree_class in rogue_talents.RogueTalents.treeClasses():
+            self.maximums.update(tree_class.allowed_talents)
+        self.searched_talents = sorted([name for name in self.maximums if name in calculator.modeled_talents and name not in required])
+        self.cache = {}
+
+    def is_valid(self, build):
+        if sum(build.values()) > MAX_POINTS:
+            return False
+        for name, points in build.items():
+            if not 0 <= points <= self.maximums[name]:
+                return False
+        for name, points in REQUIRED_TALENTS.get(self.spec, {}).items():
+            if build[name] != points:
+                return False
+        return True
+
+    def get_dps(self, builds):
+        # Exact DPS for each of builds, None for those the model rejects.
+        strings_list = [talent_strings(build) for build in builds]
+        missing = []
+        for strings in strings_list:
+            if strings not in self.cache and strings not in missing:
+                missing.append(strings)
+        if missing:
+            chunk_count = min(len(missing), getattr(self.executor, 'processes', 1))
+            chunks = [missing[index::chunk_count] for index in xrange(chunk_count)]
+            tasks = [(self.calculator, self.spec, chunk) for chunk in chunks]
+            for chunk, dps_values in zip(chunks, self.executor.map(builds_dps, tasks)):
+                for strings, dps in zip(chunk, dps_values):
+                    self.cache[strings] = dps
+        return [self.cache[strings] for strings in strings_list]
+
+    def changed(self, build, changes):
+        candidate = dict(build)
+        for name, change in changes:
+            candidate[name] += change
+        return candidate
+
+    def best(self, build, dps, candidates):
+        # The best of candidates if it beats dps, else build.
+        candidates = [candidate for candidate in candidates if self.is_valid(candidate)]
+        for candidate, candidate_dps in zip(candidates, self.get_dps(candidates)):
+            if candidate_dps is not None and candidate_dps > dps:
+                build, dps = candidate, candidate_dps
+        return build, dps
+
+    def optimize(self, max_rounds=50):
+        # Returns (talent strings, DPS) for the best build found.
+        build = get_build(self.calculator.talents)
+        dps = self.get_dps([build])[0]
+        if dps is None:
+            raise Aldriana.InputNotModeledException(_('The starting talent build is not modeled.'))
+
+        for attempt in xrange(max_rounds):
+            # What removing a point from each talent costs...
+            removals = [(name, self.changed(build, [(name, -1)])) for name in self.searched_talents]
+            removals = [(name, removal) for name, removal in removals if self.is_valid(removal)]
+            losses = {}
+            for (name, removal), removal_dps in zip(removals, self.get_dps([removal for name, removal in removals])):
+                if removal_dps is not None:
+                    losses[name] = removal_dps - dps
+
+            # ...and what adding one to each gains: from this build if it has
+            # points to spare, else from the build with its cheapest point
+            # taken back.
+            base, base_dps = build, dps
+            if sum(build.values()) >= MAX_POINTS and losses:
+                cheapest = max([(loss, name) for name, loss in losses.items()])[1]
+                base, base_dps = self.changed(build, [(cheapest, -1)]), dps + losses[cheapest]
+            additions = [(name, self.changed(base, [(name, 1)])) for name in self.searched_talents]
+            additions = [(name, addition) for name, addition in additions if self.is_valid(addition)]
+            gains = {}
+            for (name, addition), addition_dps in zip(additions, self.get_dps([addition for name, addition in additions])):
+                if addition_dps is not None:
+                    gains[name] = addition_dps - base_dps
+
+            # With points to spare, the best single addition is a move too.
+            next_build, next_dps = build, dps
+            if base is build:
+                next_build, next_dps = self.best(build, dps, [addition for name, addition in additions])
+
+            swaps = []
+            for added, gain in gains.items():
+                for removed, loss in losses.items():
+                    if added != removed:
+                        swaps.append((gain + loss, added, removed))
+            swaps.sort(reverse=True)
+            candidates = [self.changed(build, [(added, 1), (removed, -1)]) for estimate, added, removed in swaps[:self.candidates_per_round]]
+            next_build, next_dps = self.best(next_build, next_dps, candidates)
+
+            if next_dps <= dps:
+                # Marginal values can mislead where a talent only pays off
+                # with its second point, or a finisher's size flips; try
+                # every swap before giving up.
+                candidates = []
+                for added in gains:
+                    for removed in losses:
+                        if added != removed:
+                            candidates.append(self.changed(build, [(added, 1), (removed, -1)]))
+                next_build, next_dps = self.best(build, dps, candidates)
+                if next_dps <= dps:
+                    break
+            build, dps = next_build, next_dps
+
+        return talent_strings(build), dps
+
+
+def builds_dps(task):
+    # Worker for TalentSearch.get_dps: task is (calculator, spec, talent
+    # string triples).  Lives at module level so process pools can pickle
+    # it.  Builds that change the spec or that the model rejects get None.
+    calculator, spec, strings_list = task
+    dps_values = []
+    for strings in strings_list:
+        try:
+            talents = rogue_talents.RogueTalents(*strings)
+            if get_spec(talents) != spec:
+                dps_values.append(None)
+            else:
+                dps_values.append(calculator.with_(talents=talents).get_dps())
+        except exceptions.InvalidInputException:
+            dps_values.append(None)
+    return dps_values
@@ -0,0 +1,143 @@
+# A long-running local HTTP service around the engine, so that callers (a
+# web front end, say) don't pay for Python's startup and imports on every
+# request.  Evaluations run in a pool of worker processes, forked once at
+# startup, and identical requests in flight at the same time - the same
+# gear set arriving from many users at once - share one evaluation.
+#
+#     POST /evaluate   one JSON profile, as described in
+#                      calcs/rogue/Aldriana/profiles.py, optionally with an
+#                      "id" and a "what" ("dps", "ep" or "breakdown");
+#                      answers with one JSON object like batch.py's output
+#                      lines, or status 400 and {"error": ...}.
+#     POST /batch      one profile per line (NDJSON); answers with one
+#                      result per line, in the same order.
+#     GET /status      {"in_flight": <evaluations running>}
+#
+# Both POSTs take ?what=... as the default for requests without their own.
+#
+# Usage: python server.py [--host HOST] [--port PORT] [--processes N]
+
+import BaseHTTPServer
+import cgi
+import json
+import optparse
+import SocketServer
+import sys
+import urlparse
+
+from calcs.rogue.Aldriana import profiles
+from core import executors
+from core import i18n
+
+class CalculationServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    # One thread per connection, each of which mostly waits on the pool.
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, executor, default_what='dps'):
+        BaseHTTPServer.HTTPServer.__init__(self, address, CalculationRequestHandler)
+        self.executor = executor
+        self.coalescer = executors.Coalescer(executor)
+        self.default_what = default_what
+
+    def submit(self, line, default_what):
+        # Returns (request_id, what, pending result) for one request line.
+        request_id, profile, what = profiles.parse_request(line, default_what)
+        profiles.check_evaluation(what)
+        pending = self.coalescer.submit(profiles.evaluate_profile, (profile, what), profiles.request_key(profile, what))
+        return request_id, what, pending
+
+
+class CalculationRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if urlparse.urlparse(self.path).path != '/status':
+            return self.send_json(404, {'error': _('Not found')})
+        self.send_json(200, {'in_flight': len(self.server.coalescer.in_flight)})
+
+    def do_POST(self):
+        url = urlparse.urlparse(self.path)
+        query = cgi.parse_qs(url.query)
+        default_what = query.get('what', [self.server.default_what])[0]
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        if url.path == '/evaluate':
+            result = self.evaluate([body], default_what)[0]
+            if 'error' in result:
+                return self.send_json(400, result)
+            self.send_json(200, result)
+        elif url.path == '/batch':
+            lines = [line for line in body.splitlines() if line.strip()]
+            results = self.evaluate(lines, default_what)
+            self.send_body(200, 'application/x-ndjson', ''.join([json.dumps(result, sort_keys=True) + '\n' for result in results]))
+        else:
+            self.send_json(404, {'error': _('Not found')})
+
+    def evaluate(self, lines, default_what):
+        # Submits every line before waiting on any, so a batch's evaluations
+        # run side by side in the pool.
+        submitted = []
+        for line in lines:
+            try:
+                submitted.append(self.server.submit(line, default_what))
+            except Exception as e:
+                submitted.append(e)
+
+        results = []
+        for submission in submitted:
+            if isinstance(submission, Exception):
+                results.append({'error': profiles.describe_error(submission)})
+                continue
+            request_id, what, pending = submission
+            result = {}
+            if request_id is not None:
+                result['id'] = request_id
+            try:
+                result[what] = pending.result()
+            except Exception as e:
+                result['error'] = profiles.describe_error(e)
+            results.append(result)
+        return results
+
+    def send_json(self, status, value):
+        self.send_body(status, 'application/json', json.dumps(value, sort_keys=True) + '\n')
+
+    def send_body(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main(argv=None):
+    i18n.set_language('local')
+
+    parser = optparse.OptionParser(usage='python server.py [options]')
+    parser.add_option('-H', '--host', default='127.0.0.1',
+                      help=_('address to listen on [default: %default]'))
+    parser.add_option('-p', '--port', type='int', default=8085,
+                      help=_('port to listen on [default: %default]'))
+    parser.add_option('-j', '--processes', type='int',
+                      help=_('worker processes [default: one per CPU]'))
+    parser.add_option('-w', '--what', default='dps', choices=list(profiles.EVALUATIONS),
+                      help=_('what to compute when a request doesn\'t say: dps, ep or breakdown [default: %default]'))
+    options, args = parser.parse_args(argv)
+
+    executor = executors.ProcessPoolExecutor(options.processes)
+    executor.start()
+    server = CalculationServer((options.host, options.port), executor, options.what)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        executor.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+import unittest
+from benchmarks import runner
+
+class TestComparison(unittest.TestCase):
+    def results(self, dps, times):
+        # Minimal results as run returns them: fixture -> (dps, operation ->
+        # best time).
+        fixtures = {}
+        for fixture_name, operations in times.items():
+            fixtures[fixture_name] = {
+                'dps': dps[fixture_name],
+                'operations': dict([(name, {'best': best}) for name, best in operations.items()])
+            }
+        return {'results': fixtures}
+
+    def setUp(self):
+        self.baseline = self.results({'assassination': 22728.7370707, 'combat': 23800.8055522, 'retired': 1.}, {
+            'assassination': {'get_dps': .010, 'get_ep': .100, 'assassination_dps_breakdown': .010},
+            'combat': {'get_dps': .005, 'get_ep': .050},
+            'retired': {'get_dps': .001}
+        })
+        self.current = self.results({'assassination': 22728.7370707 + 1e-9, 'combat': 23151.2700000, 'added': 1.}, {
+            'assassination': {'get_dps': .0104, 'get_ep': .120, 'assassination_dps_breakdown': .008},
+            'combat': {'get_dps': .0052, 'get_ep': .0474, 'combat_dps_breakdown': .005},
+            'added': {'get_dps': .001}
+        })
+
+    def test_compare(self):
+        rows, changed_dps = runner.compare(self.current, self.baseline)
+        statuses = dict([((row[0], row[1]), row[5]) for row in rows])
+        self.assertEqual(statuses, {
+            ('assassination', 'assassination_dps_breakdown'): 'faster',
+            ('assassination', 'get_dps'): 'same',
+            ('assassination', 'get_ep'): 'slower',
+            ('combat', 'get_dps'): 'same',
+            ('combat', 'get_ep'): 'faster'
+        })
+        self.assertEqual(rows[0][:5], ('assassination', 'assassination_dps_breakdown', .010, .008, .8))
+        # A rounding-level DPS difference isn't a change.
+        self.assertEqual(changed_dps, ['combat'])
+
+    def test_threshold(self):
+        rows, changed_dps = runner.compare(self.current, self.baseline, threshold=.25)
+        self.assertEqual(set([row[5] for row in rows]), set(['same']))
+        rows, changed_dps = runner.compare(self.current, self.baseline, threshold=.01)
+        statuses = dict([((row[0], row[1]), row[5]) for row in rows])
+        self.assertEqual(statuses[('assassination', 'get_dps')], 'slower')
+        self.assertEqual(statuses[('combat', 'get_dps')], 'slower')
+
+    def test_format_comparison(self):
+        rows, changed_dps = runner.compare(self.current, self.baseline)
+        lines = runner.format_comparison(rows, changed_dps).splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertTrue(lines[0].startswith('assassination'))
+        self.assertTrue('10.000 ms ->      8.000 ms   0.800x  faster' in lines[0])
+        self.assertTrue(lines[2].endswith('slower'))
+        self.assertEqual(lines[5], 'DPS changed for combat')
+        self.assertEqual(runner.format_comparison([], []), '')
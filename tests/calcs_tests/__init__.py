@@ -16,6 +16,23 @@ class TestDamageCalculator(unittest.TestCase):
         test_race = race.Race('night_elf')
         self.calculator = calcs.DamageCalculator(test_stats, None, None, test_buffs, test_race)
 
+    def test_with_(self):
+        calculator = self.calculator.with_(hit=0, level=80)
+        self.assertEqual((calculator.stats.hit, calculator.level), (0, 80))
+        self.assertEqual((calculator.stats.level, calculator.buffs.level, calculator.race.level), (80, 80, 80))
+        self.assertTrue(calculator.stats.mh is self.calculator.stats.mh)
+        self.assertEqual((self.calculator.stats.hit, self.calculator.level), (1086, 85))
+        self.assertEqual((self.calculator.stats.level, self.calculator.buffs.level, self.calculator.race.level), (85, 85, 85))
+        self.assertNotEqual(calculator.armor_mitigation_parameter, self.calculator.armor_mitigation_parameter)
+        calculator = self.calculator.with_(crit=1000)
+        self.assertTrue(calculator.buffs is self.calculator.buffs)
+        self.assertEqual(calculator.armor_mitigation_parameter, self.calculator.armor_mitigation_parameter)
+
+    def test_read_only_inputs(self):
+        self.assertRaises(AttributeError, setattr, self.calculator, 'stats', None)
+        self.assertRaises(AttributeError, setattr, self.calculator, 'level', 80)
+        self.assertEqual(self.calculator.level, 85)
+
     def test_melee_hit_chance(self):
         pass
     
@@ -26,7 +43,7 @@ class TestDamageCalculator(unittest.TestCase):
         self.assertAlmostEqual(
             self.calculator.one_hand_melee_hit_chance(dodgeable=True, parryable=False),
             1.0 - (0.065 - (641 / (30.027200698852539 * 4)) * 0.01))
-        self.calculator.stats.exp = 0
+        self.calculator = self.calculator.with_(exp=0)
         self.assertAlmostEqual(
             self.calculator.one_hand_melee_hit_chance(dodgeable=True, parryable=False),
             1.0 - 0.065)
@@ -36,7 +53,7 @@ class TestDamageCalculator(unittest.TestCase):
         self.assertAlmostEqual(
             self.calculator.one_hand_melee_hit_chance(dodgeable=False, parryable=True),
             1.0 - 0.14)
-        self.calculator.stats.hit = 0
+        self.calculator = self.calculator.with_(hit=0)
         self.assertAlmostEqual(
             self.calculator.one_hand_melee_hit_chance(dodgeable=True, parryable=False),
             1.0 - 0.065 - 0.08)
@@ -45,8 +62,7 @@ class TestDamageCalculator(unittest.TestCase):
         self.assertAlmostEqual(
             self.calculator.dual_wield_mh_hit_chance(dodgeable=False, parryable=False),
             1.0 - (0.27 - 0.01 * (1086 / 120.109001159667969)))
-        self.calculator.stats.hit = 0
-        self.calculator.stats.exp = 0
+        self.calculator = self.calculator.with_(hit=0, exp=0)
         self.assertAlmostEqual(
             self.calculator.dual_wield_mh_hit_chance(dodgeable=False, parryable=False),
             1.0 - 0.27)
@@ -0,0 +1,24 @@
+import unittest
+from calcs import fixed_point
+
+class TestFixedPointSolvers(unittest.TestCase):
+    # A slowly converging linear map with its fixed point at (10, 20).
+    def make_step(self):
+        previous = []
+        def step(point):
+            x, y = point
+            converged = bool(previous) and max(abs(x - previous[0][0]), abs(y - previous[0][1])) < 10 ** -9
+            previous[:] = [point]
+            return [.9 * x + .05 * y, .02 * x + .8 * y + 3.8], converged
+        return step
+
+    def check_solver(self, solver):
+        point, iterations = solver.solve(self.make_step(), [0., 0.])
+        self.assertAlmostEqual(point[0], 10, places=6)
+        self.assertAlmostEqual(point[1], 20, places=6)
+        return iterations
+
+    def test_fixed_point_iteration(self):
+        self.assertTrue(self.check_solver(fixed_point.FixedPointIteration()) > 100)
+        point, iterations = fixed_point.FixedPointIteration().solve(lambda point: ([1.], point == [1.]), [0.])
+        self.assertEqual((point, iterations), ([1.], 2))
@@ -1,5 +1,152 @@
 import unittest
-from calcs.rogue.Aldriana import AldrianasRogueDamageCalculator
+from benchmarks import fixtures
+from core import exceptions
+from core import executors
+from core import timing
+from objects import procs
 
 class TestAldrianasRogueDamageCalculator(unittest.TestCase):
-    pass
+    def setUp(self):
+        self.calculator = fixtures.assassination()
+
+    def test_modifier_plans_kept(self):
+        self.calculator.get_dps()
+        plans = self.calculator.modifier_plans
+        self.assertTrue('mutilate' in plans)
+        self.calculator.get_dps()
+        self.assertTrue(self.calculator.modifier_plans is plans)
+        self.assertTrue(self.calculator.with_(agi=5000, haste=2000).modifier_plans is plans)
+        self.assertEqual(self.calculator.with_(buffs=self.calculator.buffs.with_(spell_damage_debuff=False)).modifier_plans, {})
+
+    def test_combat_killing_spree(self):
+        # Pins the killing spree cooldown: 120 / (1 + restless blades
+        # benefit), not 120 / benefit, which roughly halved its damage.
+        calculator = fixtures.combat()
+        self.assertAlmostEqual(calculator.combat_dps_breakdown()['killing_spree'], 966.542297761557, places=4)
+        self.assertAlmostEqual(calculator.get_dps(), 22616.294202637397, places=4)
+
+    def test_get_dps_batch(self):
+        rows = [(20, 4755, 190, 1034, 1333, 778, 1447, 936),
+                (20, 4755, 190, 1534, 1333, 778, 947, 936),
+                (0, 5000, 0, 800, 1000, 500, 1200, 1500)]
+        batch_dps = self.calculator.get_dps_batch(rows)
+        self.assertEqual(len(batch_dps), 3)
+        self.assertAlmostEqual(batch_dps[0], self.calculator.get_dps())
+        for row, dps in zip(rows, batch_dps):
+            calculator = self.calculator.with_(**dict(zip(self.calculator.BATCH_STAT_COLUMNS, row)))
+            self.assertAlmostEqual(dps, calculator.get_dps())
+
+    def test_get_dps_batch_shared_setup(self):
+        sink = timing.TimingAggregator()
+        calculator = fixtures.combat()
+        calculator.timing_sink = sink
+        calculator.get_dps_batch([(20, 4755 + agi, 190, 1034, 1333, 778, 1447, 936) for agi in range(4)])
+        self.assertEqual(sink.summary()['set_input_constants']['count'], 1)
+        self.assertEqual(sink.summary()['convergence']['count'], 4)
+        self.assertTrue('sinister_strike' in calculator.modifier_plans)
+
+    def test_get_dps_batch_restores_stats(self):
+        self.calculator.get_dps_batch([(0, 5000, 0, 800, 1000, 500, 1200, 1500)])
+        self.assertEqual(self.calculator.stats.agi, 4755)
+        self.assertEqual(self.calculator.stats.haste, 1447)
+        self.assertRaises(exceptions.InvalidInputException, self.calculator.get_dps_batch, [(1, 2, 3)])
+        self.assertEqual(self.calculator.stats.agi, 4755)
+
+    def test_get_exact_ep(self):
+        exact_ep = self.calculator.get_exact_ep()
+        ep = self.calculator.get_ep()
+        self.assertEqual(sorted(exact_ep.keys()), sorted(ep.keys()))
+        for stat in ep:
+            self.assertAlmostEqual(exact_ep[stat], ep[stat], places=3)
+        self.assertEqual(self.calculator.stats.agi, 4755)
+        self.assertFalse(self.calculator.calculating_ep)
+
+    def test_get_ep_parallel(self):
+        ep = self.calculator.get_ep()
+        with executors.ProcessPoolExecutor(processes=2) as executor:
+            parallel_ep = self.calculator.get_ep_parallel(executor)
+            pool = executor.pool
+            combat_ep = fixtures.combat().get_ep_parallel(executor)
+            self.assertTrue(executor.pool is pool)
+        self.assertEqual(sorted(parallel_ep.keys()), sorted(ep.keys()))
+        for stat in ep:
+            self.assertAlmostEqual(parallel_ep[stat], ep[stat])
+        self.assertEqual(combat_ep, fixtures.combat().get_ep_parallel(executors.SerialExecutor()))
+
+    def test_convergence(self):
+        # Fluid Death with Landslide on both weapons is as proc-driven as the
+        # fixed point gets, and plain iteration still needs only one step
+        # past the two that confirm convergence (see calcs.fixed_point).
+        calculator = self.calculator.with_(procs=procs.ProcsList('fluid_death'))
+        calculator.get_dps()
+        self.assertTrue(calculator.convergence_iterations <= 3)
+
+    def test_timing_sink(self):
+        sink = timing.TimingAggregator()
+        self.calculator.timing_sink = sink
+        self.calculator.get_dps()
+        summary = sink.summary()
+        for phase in ('set_constants', 'attack_counts', 'set_uptime', 'update_with_damaging_proc', 'convergence', 'damage_breakdown'):
+            self.assertTrue(phase in summary)
+        # One compute_damage call each for the Mutilate and Backstab phases.
+        self.assertEqual(summary['convergence']['count'], 2)
+        self.assertTrue(summary['attack_counts']['count'] > self.calculator.convergence_iterations + 2)
+
+    def test_setup_kept(self):
+        sink = timing.TimingAggregator()
+        self.calculator.timing_sink = sink
+        dps = self.calculator.get_dps()
+        self.assertEqual(sink.summary()['set_input_constants']['count'], 1)
+        self.calculator.with_(agi=5000, haste=2000).get_dps()
+        self.assertEqual(sink.summary()['set_input_constants']['count'], 1)
+        changed = self.calculator.with_(talents=self.calculator.talents.with_(vile_poisons=0))
+        self.assertTrue(changed.get_dps() < dps)
+        self.assertEqual(sink.summary()['set_input_constants']['count'], 2)
+        self.assertAlmostEqual(changed.with_(talents=self.calculator.talents).get_dps(), dps)
+        self.assertEqual(sink.summary()['set_input_constants']['count'], 3)
+
+    def test_converged_counts_reused(self):
+        # Without procs that have an ICD, the attack counts from the last
+        # solver step are the final ones; nothing gets counted again.
+        calculator = self.calculator.with_(procs=procs.ProcsList('fluid_death'))
+        calculator.init_assassination()
+        sink = timing.TimingAggregator()
+        calculator.timing_sink = sink
+        calculator.compute_damage(calculator.assassination_attack_counts_backstab)
+        self.assertEqual(sink.summary()['attack_counts']['count'], calculator.convergence_iterations)
+        sink.clear()
+        calculator = calculator.with_(procs=procs.ProcsList('heroic_prestors_talisman_of_machination'))
+        calculator.init_assassination()
+        calculator.compute_damage(calculator.assassination_attack_counts_backstab)
+        self.assertEqual(sink.summary()['attack_counts']['count'], calculator.convergence_iterations + 1)
+
+    def test_dps_curve(self):
+        curve = self.calculator.dps_curve('hit', 900, 1500, 150)
+        self.assertEqual([rating for rating, dps in curve], [900, 1050, 1200, 1350])
+        for rating, dps in curve:
+            self.assertAlmostEqual(dps / self.calculator.with_(hit=rating).get_dps(), 1)
+        self.assertEqual(self.calculator.stats.hit, 1333)
+        self.assertEqual(self.calculator.warm_starts, None)
+        self.assertRaises(exceptions.InvalidInputException, self.calculator.dps_curve, 'hit', 0, 100, 0)
+
+    def test_dps_curve_warm_starts(self):
+        # Once the procs' contribution can be extrapolated from the last
+        # two points, each solve converges in fewer steps than from cold.
+        # This follows the curve the way dps_curve does.
+        warm_starts = {}
+        for haste in (1000., 1010., 1020., 1030.):
+            warm = self.calculator.with_(haste=haste)
+            warm.warm_starts = warm_starts
+            warm_dps = warm.get_dps()
+        cold = self.calculator.with_(haste=1030.)
+        self.assertAlmostEqual(warm_dps / cold.get_dps(), 1)
+        self.assertTrue(warm.convergence_iterations < cold.convergence_iterations)
+        self.assertAlmostEqual(self.calculator.dps_curve('haste', 1000, 1040, 10)[-1][1], warm_dps)
+
+    def test_ep_curve(self):
+        curve = self.calculator.ep_curve('mastery', 900, 1000, 50)
+        self.assertEqual(len(curve), 2)
+        ep = self.calculator.with_(mastery=950).get_ep()
+        for stat in ep:
+            self.assertAlmostEqual(curve[1][1][stat], ep[stat], places=3)
+        self.assertEqual(self.calculator.warm_start_track, None)
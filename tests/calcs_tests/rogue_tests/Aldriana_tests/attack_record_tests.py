@@ -0,0 +1,29 @@
+import unittest
+from calcs.rogue.Aldriana import attack_record
+
+class TestAttackRecord(unittest.TestCase):
+    def setUp(self):
+        self.record = attack_record.AttackRecord()
+
+    def test_defaults(self):
+        self.assertEqual(self.record.mutilate, 0)
+        self.assertEqual(self.record.envenom, None)
+        self.assertEqual(self.record.damage_procs, {})
+        self.assertEqual(self.record.items(), [])
+
+    def test_fixed_layout(self):
+        self.assertRaises(AttributeError, setattr, self.record, 'not_an_ability', 1)
+
+    def test_values(self):
+        self.record.rupture = .5
+        self.record.envenom = [0, 0, 0, 0, .1, .2]
+        values = self.record.values()
+        self.assertEqual(len(values), len(self.record.ABILITIES))
+        self.assertEqual(values[self.record.ABILITIES.index('rupture')], .5)
+        self.assertEqual(self.record.items(), [('rupture', .5), ('envenom', [0, 0, 0, 0, .1, .2])])
+
+    def test_getters(self):
+        self.record.mutilate = 1
+        self.record.main_gauche = 2
+        self.assertEqual(attack_record.get_oh_strikes(self.record), (1, 2, 0))
+        self.assertEqual(attack_record.get_mh_finishers(self.record), (None, None))
@@ -0,0 +1,36 @@
+import unittest
+from calcs.rogue.Aldriana import cp_distribution_engine
+
+class TestCPDistributionEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = cp_distribution_engine.CPDistributionEngine(max_entries=16, grid_step=None)
+
+    def test_get_distribution(self):
+        # Two builders of 2 or 3 combo points each, finishing at 4+.
+        distribution = self.engine.get_distribution({2: .6, 3: .4}, 4, 0)
+        self.assertAlmostEqual(distribution[(4, 2)], .36)
+        self.assertAlmostEqual(distribution[(5, 2)], .64)
+        self.assertEqual(len(distribution), 2)
+
+    def test_ruthlessness(self):
+        distribution = self.engine.get_distribution({1: 1.}, 5, 3)
+        self.assertAlmostEqual(distribution[(5, 4)], .6)
+        self.assertAlmostEqual(distribution[(5, 5)], .4)
+
+    def test_caching(self):
+        first = self.engine.get_distribution({1: .8, 2: .2}, 5, 0)
+        first[(5, 3)] = 0
+        self.assertEqual(len(self.engine.cache), 1)
+        second = self.engine.get_distribution({1: .8, 2: .2}, 5, 0)
+        self.assertNotEqual(second[(5, 3)], 0)
+        self.assertEqual(len(self.engine.cache), 1)
+
+    def test_interpolation(self):
+        interpolating_engine = cp_distribution_engine.CPDistributionEngine(grid_step=.01)
+        exact = self.engine.get_distribution({2: .7234, 3: .2766}, 4, 1)
+        interpolated = interpolating_engine.get_distribution({2: .7234, 3: .2766}, 4, 1)
+        self.assertEqual(sorted(exact.keys()), sorted(interpolated.keys()))
+        for entry in exact:
+            self.assertAlmostEqual(exact[entry], interpolated[entry], places=3)
+        self.assertAlmostEqual(sum(interpolated.values()), 1)
+        self.assertEqual(len(interpolating_engine.cache), 2)
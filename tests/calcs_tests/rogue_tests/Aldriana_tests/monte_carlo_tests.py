@@ -0,0 +1,65 @@
+import unittest
+from benchmarks import fixtures
+from calcs.rogue.Aldriana import monte_carlo
+from core import exceptions
+from core import executors
+
+class TestRunningStats(unittest.TestCase):
+    def test_add(self):
+        running_stats = monte_carlo.RunningStats()
+        for value in (2, 4, 4, 4, 5, 5, 7, 9):
+            running_stats.add(value)
+        self.assertEqual(running_stats.count, 8)
+        self.assertAlmostEqual(running_stats.mean, 5)
+        self.assertAlmostEqual(running_stats.variance(), 32 / 7.)
+        self.assertAlmostEqual(running_stats.standard_error(), (32 / 7. / 8) ** .5)
+
+    def test_merge(self):
+        values = [1.5, 7, 3, 12, 8.25, 4, 4, 10]
+        whole = monte_carlo.RunningStats()
+        first = monte_carlo.RunningStats()
+        second = monte_carlo.RunningStats()
+        for index, value in enumerate(values):
+            whole.add(value)
+            if index < 3:
+                first.add(value)
+            else:
+                second.add(value)
+        first.merge(second)
+        first.merge(monte_carlo.RunningStats())
+        self.assertEqual(first.count, whole.count)
+        self.assertAlmostEqual(first.mean, whole.mean)
+        self.assertAlmostEqual(first.variance(), whole.variance())
+
+
+class TestMonteCarloRunner(unittest.TestCase):
+    def setUp(self):
+        self.calculator = fixtures.assassination()
+
+    def test_run(self):
+        runner = monte_carlo.MonteCarloRunner(self.calculator, batch_size=5)
+        result = runner.run(400, max_iterations=100)
+        self.assertTrue(result['converged'])
+        self.assertEqual(result['iterations'] % 5, 0)
+        low, high = result['interval']
+        self.assertTrue(low < result['dps'] < high)
+        self.assertTrue(high - low <= 400)
+        self.assertAlmostEqual(sum(result['breakdown'].values()), result['dps'])
+
+        result = runner.run(1, max_iterations=12)
+        self.assertFalse(result['converged'])
+        self.assertEqual(result['iterations'], 15)
+
+    def test_reproducible(self):
+        serial = monte_carlo.MonteCarloRunner(self.calculator, seed=7, batch_size=4).run(600, max_iterations=40)
+        with executors.ProcessPoolExecutor(processes=2) as executor:
+            pooled = monte_carlo.MonteCarloRunner(self.calculator, executor=executor, seed=7, batch_size=4).run(600, max_iterations=40)
+        self.assertEqual(serial, pooled)
+        other = monte_carlo.MonteCarloRunner(self.calculator, seed=8, batch_size=4).run(600, max_iterations=40)
+        self.assertNotEqual(serial['dps'], other['dps'])
+
+    def test_invalid_input(self):
+        self.assertRaises(exceptions.InvalidInputException, monte_carlo.MonteCarloRunner, self.calculator, confidence=.5)
+        self.assertRaises(exceptions.InvalidInputException, monte_carlo.MonteCarloRunner, self.calculator, batch_size=1)
+        runner = monte_carlo.MonteCarloRunner(self.calculator)
+        self.assertRaises(exceptions.InvalidInputException, runner.run, 0)
@@ -0,0 +1,114 @@
+import unittest
+from calcs.rogue.Aldriana import profiles
+from core import exceptions
+from core import executors
+
+class TestProfiles(unittest.TestCase):
+    def setUp(self):
+        self.profile = {
+            'stats': {'str': 20, 'agi': 4755, 'ap': 190, 'crit': 1034, 'hit': 1333, 'exp': 778, 'haste': 1447, 'mastery': 936},
+            'mh': {'damage': 939.5, 'speed': 1.8, 'type': 'dagger', 'enchant': 'landslide'},
+            'oh': {'damage': 730.5, 'speed': 1.4, 'type': 'dagger', 'enchant': 'landslide'},
+            'ranged': {'damage': 1371.5, 'speed': 2.2, 'type': 'thrown'},
+            'procs': ['heroic_prestors_talisman_of_machination', 'fluid_death'],
+            'gear_buffs': ['rogue_t11_2pc', 'leather_specialization', 'potion_of_the_tolvir'],
+            'talents': ['0333230113022110321', '0020000000000000000', '2030030000000000000'],
+            'glyphs': ['backstab', 'mutilate', 'rupture'],
+            'race': 'night_elf',
+            'buffs': ['short_term_haste_buff', 'stat_multiplier_buff', 'crit_chance_buff', 'all_damage_buff',
+                      'melee_haste_buff', 'attack_power_buff', 'str_and_agi_buff', 'armor_debuff',
+                      'physical_vulnerability_debuff', 'spell_damage_debuff', 'spell_crit_debuff',
+                      'bleed_damage_debuff', 'agi_flask', 'guild_feast'],
+            'settings': {'cycle': {'type': 'assassination'}, 'response_time': 1}
+        }
+
+    def test_build_calculator(self):
+        calculator = profiles.build_calculator(self.profile)
+        self.assertEqual(calculator.stats.agi, 4755)
+        self.assertTrue(calculator.stats.mh.landslide)
+        self.assertTrue(calculator.stats.procs.fluid_death)
+        self.assertTrue(calculator.glyphs.mutilate)
+        self.assertTrue(calculator.talents.is_assassination_rogue())
+        self.assertEqual(calculator.settings.response_time, 1)
+        self.assertAlmostEqual(calculator.get_dps(), 22728.7370707, places=4)
+
+    def test_unicode_profile(self):
+        self.profile['settings'] = {u'cycle': {u'type': u'combat', u'use_revealing_strike': u'never'}, u'mh_poison': u'ip'}
+        calculator = profiles.build_calculator(self.profile)
+        self.assertEqual(calculator.settings.cycle.use_revealing_strike, 'never')
+        self.assertEqual(calculator.settings.mh_poison, 'ip')
+
+    def test_invalid_profiles(self):
+        del self.profile['mh']
+        self.assertRaises(profiles.InvalidProfileException, profiles.build_calculator, self.profile)
+        self.setUp()
+        self.profile['stats']['spirit'] = 1
+        self.assertRaises(profiles.InvalidProfileException, profiles.build_calculator, self.profile)
+        self.setUp()
+        self.profile['glyphs'] = ['mutliate']
+        self.assertRaises(profiles.InvalidProfileException, profiles.build_calculator, self.profile)
+        self.setUp()
+        self.profile['settings'] = {'cycle': {'type': 'assassination', 'min_envenom_size_mutilate': 7}}
+        self.assertRaises(profiles.InvalidProfileException, profiles.build_calculator, self.profile)
+        self.setUp()
+        self.profile['procs'] = ['not_a_trinket']
+        self.assertRaises(exceptions.InvalidInputException, profiles.build_calculator, self.profile)
+
+    def test_evaluate(self):
+        calculator = profiles.build_calculator(self.profile)
+        dps = profiles.evaluate(calculator, 'dps')
+        breakdown = profiles.evaluate(calculator, 'breakdown')
+        self.assertAlmostEqual(sum(breakdown.values()), dps)
+        self.assertTrue('agi' in profiles.evaluate(calculator, 'ep'))
+        self.assertRaises(exceptions.InvalidInputException, profiles.evaluate, calculator, 'hps')
+
+    def test_evaluate_many(self):
+        combat = dict(self.profile)
+        combat['settings'] = {'cycle': {'type': 'combat'}}
+        combat['talents'] = ['0232000000000000000', '0332230310032012321', '0030000000000000000']
+        expected = [profiles.evaluate(profiles.build_calculator(profile)) for profile in (self.profile, combat)]
+        self.assertEqual(list(profiles.evaluate_many([self.profile, combat])), expected)
+        with executors.ProcessPoolExecutor(processes=2) as executor:
+            results = list(profiles.evaluate_many([self.profile, combat, self.profile], executor=executor))
+        self.assertAlmostEqual(results[0], expected[0])
+        self.assertAlmostEqual(results[1], expected[1])
+        self.assertAlmostEqual(results[2], expected[0])
+        self.assertRaises(exceptions.InvalidInputException, profiles.evaluate_many, [self.profile], 'hps')
+
+    def test_cache_key(self):
+        calculator = profiles.build_calculator(self.profile)
+        key = profiles.cache_key(calculator)
+        self.assertEqual(len(key), 40)
+        self.assertNotEqual(profiles.cache_key(calculator, 'ep'), key)
+
+        self.profile['buffs'] = list(reversed(self.profile['buffs']))
+        self.profile['stats']['agi'] = 4755.
+        self.profile['procs'] = ['fluid_death', 'heroic_prestors_talisman_of_machination']
+        self.assertEqual(profiles.cache_key(profiles.build_calculator(self.profile)), key)
+
+        self.assertNotEqual(profiles.cache_key(calculator.with_(agi=calculator.stats.agi + 1)), key)
+        calculator.settings.cycle.min_envenom_size_mutilate = 5
+        self.assertNotEqual(profiles.cache_key(calculator), key)
+
+    def test_describe_calculator(self):
+        description = profiles.describe_calculator(profiles.build_calculator(self.profile))
+        self.assertEqual(description['mh']['enchants'], ['landslide'])
+        self.assertEqual(description['ranged']['enchants'], [])
+        self.assertEqual(description['talents']['lethality'], 3)
+        self.assertEqual(description['talents']['opportunity'], 3)
+        self.assertEqual(description['talents']['blackjack'], 0)
+        self.assertEqual(description['settings']['cycle']['type'], 'assassination')
+        self.assertEqual(description['race'], 'night_elf')
+
+    def test_evaluate_cached(self):
+        cache = {}
+        class DictCache(object):
+            def get(self, key):
+                return cache.get(key)
+            def put(self, key, value):
+                cache[key] = value
+        calculator = profiles.build_calculator(self.profile)
+        dps = profiles.evaluate_cached(calculator, 'dps', DictCache())
+        self.assertEqual(cache.values(), [dps])
+        cache[cache.keys()[0]] = 1.
+        self.assertEqual(profiles.evaluate_cached(calculator, 'dps', DictCache()), 1.)
@@ -0,0 +1,73 @@
+import unittest
+from benchmarks import fixtures
+from calcs.rogue.Aldriana import InputNotModeledException
+from calcs.rogue.Aldriana import monte_carlo
+from calcs.rogue.Aldriana import settings
+from calcs.rogue.Aldriana import simulator
+from objects.rogue import rogue_talents
+
+class TestSimulator(unittest.TestCase):
+    def make_calculator(self, spec, proc_names=fixtures.DEFAULT_PROCS):
+        if spec == 'assassination':
+            return fixtures.assassination(proc_names=proc_names)
+        return fixtures.combat(proc_names=proc_names)
+
+    def test_run(self):
+        result = simulator.Simulator(self.make_calculator('assassination')).run(1)
+        self.assertAlmostEqual(result['dps'], sum(result['breakdown'].values()))
+        for source in ('autoattack', 'mutilate', 'backstab', 'envenom', 'rupture', 'venomous_wounds', 'instant_poison', 'deadly_poison'):
+            self.assertTrue(result['breakdown'][source] > 0)
+        self.assertTrue(0 < result['proc_stacks']['River of Death'] <= 10)
+        self.assertTrue(0 < result['proc_stacks']['mh_Landslide'] < 1)
+
+    def test_seeds(self):
+        fight_simulator = simulator.Simulator(self.make_calculator('combat'))
+        self.assertEqual(fight_simulator.run(3), fight_simulator.run(3))
+        self.assertNotEqual(fight_simulator.run(3)['dps'], fight_simulator.run(4)['dps'])
+
+    def test_costs_from_calculator(self):
+        fight_simulator = simulator.Simulator(self.make_calculator('assassination'))
+        self.assertEqual(fight_simulator.energy_costs['mutilate'], 55)
+        self.assertEqual(fight_simulator.miss_refunds['mutilate'], 43)
+        self.assertEqual(fight_simulator.miss_refunds['envenom'], 0)
+        self.assertAlmostEqual(fight_simulator.vendetta_duration, 30)
+        fight_simulator = simulator.Simulator(self.make_calculator('combat'))
+        self.assertEqual(fight_simulator.energy_costs['sinister_strike'], 39)
+        self.assertAlmostEqual(fight_simulator.killing_spree_damage_multiplier, 1.2)
+
+    def test_distribution(self):
+        calculator = self.make_calculator('assassination')
+        fight_simulator = simulator.Simulator(calculator)
+        dps_values = fight_simulator.distribution(4, seed=2)
+        self.assertEqual(len(dps_values), 4)
+        self.assertEqual(dps_values[1], fight_simulator.run(simulator.fight_seed(2, 1))['dps'])
+        self.assertTrue((0, 0, 0, 0) in fight_simulator.stat_states)
+        self.assertTrue(len(fight_simulator.stat_states) > 1)
+        # Sharing stat states between fights doesn't change any of them.
+        self.assertEqual(dps_values[3], simulator.Simulator(calculator).run(simulator.fight_seed(2, 3))['dps'])
+
+    def test_matches_analytic_model(self):
+        # Half hour fights, so that the start of the fight is worth little,
+        # and ruptures the size of envenoms; see simulator for why.
+        test_settings = {
+            'assassination': settings.Settings(settings.AssassinationCycle(prioritize_rupture_uptime_mutilate=False, prioritize_rupture_uptime_backstab=False), response_time=1, duration=1800),
+            'combat': settings.Settings(settings.CombatCycle(), response_time=1, duration=1800)
+        }
+        intervals = {}
+        for spec in ('assassination', 'combat'):
+            calculator = self.make_calculator(spec).with_(settings=test_settings[spec])
+            analytic_dps = calculator.get_dps()
+            result = monte_carlo.MonteCarloRunner(calculator, batch_size=10).run(.01 * analytic_dps)
+            self.assertTrue(result['converged'])
+            low, high = result['interval']
+            intervals[spec] = (low / analytic_dps, high / analytic_dps)
+        self.assertTrue(intervals['assassination'][0] <= 1 <= intervals['assassination'][1])
+        # Slice and dice drops now and then, which the analytic model leaves
+        # out.
+        self.assertTrue(.965 <= intervals['combat'][0] and intervals['combat'][1] <= .99)
+
+    def test_not_modeled(self):
+        calculator = self.make_calculator('assassination').with_(talents=rogue_talents.RogueTalents('0000000000000000000', '0000000000000000000', '2030030000000000000'))
+        self.assertRaises(InputNotModeledException, simulator.Simulator, calculator)
+        calculator = self.make_calculator('assassination', proc_names=('tias_grace',))
+        self.assertRaises(InputNotModeledException, simulator.Simulator, calculator)
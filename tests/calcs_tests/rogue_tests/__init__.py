@@ -31,12 +31,12 @@ class TestRogueDamageCalculator(unittest.TestCase):
     
     def test_get_spell_hit_from_talents(self):
         self.assertAlmostEqual(self.calculator.get_spell_hit_from_talents(), .04)
-        self.calculator.talents.precision = 0
+        self.calculator = self.calculator.with_(talents=self.calculator.talents.with_(precision=0))
         self.assertAlmostEqual(self.calculator.get_spell_hit_from_talents(), .0)
     
     def test_get_melee_hit_from_talents(self):
         self.assertAlmostEqual(self.calculator.get_melee_hit_from_talents(), .04)
-        self.calculator.talents.precision = 3
+        self.calculator = self.calculator.with_(talents=self.calculator.talents.with_(precision=3))
         self.assertAlmostEqual(self.calculator.get_melee_hit_from_talents(), .06)
     
     def test_oh_penalty(self):
@@ -54,8 +54,28 @@ class TestRogueDamageCalculator(unittest.TestCase):
     def test_crit_damage_modifiers(self):
         self.assertAlmostEqual(self.calculator.crit_damage_modifiers(), 1 + (2 * 1.03 - 1) * 1)
         self.assertAlmostEqual(self.calculator.crit_damage_modifiers(is_spell=True), 1 + (1.5 * 1.03 - 1) * 1)
-        self.assertAlmostEqual(self.calculator.crit_damage_modifiers(lethality=True), 1 + (2 * 1.03 - 1) * 1.3)        
-    
+        self.assertAlmostEqual(self.calculator.crit_damage_modifiers(lethality=True), 1 + (2 * 1.03 - 1) * 1.3)
+
+    def test_get_modifiers(self):
+        multiplier, crit_multiplier = self.calculator.get_modifiers('backstab')
+        expected = self.calculator.talents_modifiers(opportunity=True, aggression=True) * self.calculator.raid_settings_modifiers(is_physical=True)
+        self.assertAlmostEqual(multiplier, expected)
+        self.assertAlmostEqual(crit_multiplier, self.calculator.crit_damage_modifiers(lethality=True))
+        multiplier, crit_multiplier = self.calculator.get_modifiers('instant_poison', mastery=1000)
+        expected = self.calculator.talents_modifiers(potent_poisons=True, vile_poisons=True, assassins_resolve=False, mastery=1000) * self.calculator.raid_settings_modifiers(is_spell=True)
+        self.assertAlmostEqual(multiplier, expected)
+        multiplier, crit_multiplier = self.calculator.get_modifiers('backstab', armor=0)
+        self.assertAlmostEqual(multiplier, self.calculator.talents_modifiers(opportunity=True, aggression=True))
+
+    def test_modifier_plans_cleared(self):
+        multiplier = self.calculator.get_modifiers('mutilate')[0]
+        self.assertRaises(AttributeError, setattr, self.calculator.talents, 'opportunity', 0)
+        talents = self.calculator.talents
+        self.calculator = self.calculator.with_(talents=talents.with_(opportunity=0))
+        self.assertAlmostEqual(self.calculator.get_modifiers('mutilate')[0], multiplier / 1.3)
+        self.calculator = self.calculator.with_(talents=talents)
+        self.assertAlmostEqual(self.calculator.get_modifiers('mutilate')[0], multiplier)
+
     # Just do some basic checks for the individual abilities, increasing AP
     # should increase damage and similar for combo points.
     # The optional armor argument isn't tested for now.
@@ -150,7 +170,7 @@ class TestRogueDamageCalculator(unittest.TestCase):
 class TestRogueDamageCalculatorLevels(TestRogueDamageCalculator):
     def setUp(self):
         super(TestRogueDamageCalculatorLevels, self).setUp()
-        self.calculator.level = 80
+        self.calculator = self.calculator.with_(level=80)
     
     def test_set_constants_for_level(self):
-        self.assertRaises(exceptions.InvalidLevelException, self.calculator.__setattr__, 'level', 86)
+        self.assertRaises(exceptions.InvalidLevelException, self.calculator.with_, level=86)
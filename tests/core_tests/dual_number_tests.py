@@ -0,0 +1,36 @@
+import unittest
+from core import dual_number
+
+class TestDualNumber(unittest.TestCase):
+    def setUp(self):
+        self.x, self.y = dual_number.variables([3., 2.])
+
+    def test_variables(self):
+        self.assertEqual(self.x.value, 3.)
+        self.assertEqual(self.x.partials, (1., 0.))
+        self.assertEqual(self.y.partials, (0., 1.))
+
+    def test_arithmetic(self):
+        result = (self.x * self.y + 1) / self.y - self.x ** 2
+        self.assertAlmostEqual(result.value, 3.5 - 9)
+        # d/dx = 1 - 2x, d/dy = -1 / y ** 2
+        self.assertAlmostEqual(result.partials[0], 1 - 6)
+        self.assertAlmostEqual(result.partials[1], -.25)
+        result = 1 / self.x
+        self.assertAlmostEqual(result.partials[0], -1 / 9.)
+        result = 2 ** self.y
+        self.assertAlmostEqual(result.partials[1], 4 * 0.69314718055994529)
+
+    def test_comparisons(self):
+        self.assertTrue(self.x > self.y)
+        self.assertTrue(self.x == 3)
+        self.assertEqual(max(self.y, 0), self.y)
+        self.assertEqual(min(self.x, 1), 1)
+        self.assertEqual(abs(-self.x).partials, (1., 0.))
+        self.assertFalse(self.x - 3)
+
+    def test_get_partials(self):
+        self.assertEqual(dual_number.get_partials(5, 2), (0., 0.))
+        self.assertEqual(dual_number.get_partials(self.y, 2), (0., 1.))
+        self.assertEqual(dual_number.get_value(self.y), 2.)
+        self.assertEqual(dual_number.get_value(2.5), 2.5)
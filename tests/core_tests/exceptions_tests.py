@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from core.exceptions import InvalidInputException
 
@@ -8,3 +9,8 @@ class TestInvalidInputException(unittest.TestCase):
         except InvalidInputException as e:
             self.assertEqual(str(e), "test")
             self.assertEqual(e.error_msg, "test")
+
+    def test_pickle(self):
+        e = pickle.loads(pickle.dumps(InvalidInputException("test")))
+        self.assertEqual(str(e), "test")
+        self.assertEqual(e.error_msg, "test")
@@ -0,0 +1,50 @@
+import unittest
+from core import executors
+
+def square(x):
+    return x * x
+
+class TestExecutors(unittest.TestCase):
+    def test_serial_executor(self):
+        with executors.SerialExecutor() as executor:
+            self.assertEqual(list(executor.map(square, xrange(5))), [0, 1, 4, 9, 16])
+
+    def test_chunk_size(self):
+        executor = executors.ProcessPoolExecutor(processes=2)
+        self.assertEqual(executor.chunk_size(0), 1)
+        self.assertEqual(executor.chunk_size(5), 1)
+        self.assertEqual(executor.chunk_size(80), 10)
+        self.assertEqual(executor.chunk_size(81), 11)
+        self.assertEqual(executor.chunk_size(10000), 64)
+
+    def test_process_pool_executor(self):
+        with executors.ProcessPoolExecutor(processes=2) as executor:
+            self.assertEqual(list(executor.map(square, xrange(20))), [x * x for x in xrange(20)])
+            pool = executor.pool
+            self.assertEqual(list(executor.map(square, [3])), [9])
+            self.assertTrue(executor.pool is pool)
+        self.assertTrue(executor.pool is None)
+
+    def test_coalescer(self):
+        calls = []
+        def record(x):
+            calls.append(x)
+            if x < 0:
+                raise ValueError(x)
+            return x * 2
+        coalescer = executors.Coalescer(executors.SerialExecutor())
+        first = coalescer.submit(record, 3, 'three')
+        second = coalescer.submit(record, 3, 'three')
+        other = coalescer.submit(record, 4, 'four')
+        self.assertTrue(first is second)
+        self.assertEqual(second.result(), 6)
+        self.assertEqual(first.result(), 6)
+        self.assertEqual(other.result(), 8)
+        self.assertEqual(calls, [3, 4])
+        self.assertEqual(coalescer.in_flight, {})
+        self.assertEqual(coalescer.submit(record, 3, 'three').result(), 6)
+        self.assertEqual(calls, [3, 4, 3])
+        failed = coalescer.submit(record, -1, 'negative')
+        self.assertRaises(ValueError, failed.result)
+        self.assertRaises(ValueError, failed.result)
+        self.assertEqual(coalescer.in_flight, {})
@@ -0,0 +1,30 @@
+import unittest
+from core import lru_cache
+
+class TestLRUCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = lru_cache.LRUCache(2)
+
+    def test_get_and_put(self):
+        self.assertEqual(self.cache.get('a'), None)
+        self.assertEqual(self.cache.get('a', 0), 0)
+        self.cache.put('a', 1)
+        self.cache.put('a', 2)
+        self.assertEqual(self.cache.get('a'), 2)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_eviction(self):
+        self.cache.put('a', 1)
+        self.cache.put('b', 2)
+        self.cache.get('a')
+        self.cache.put('c', 3)
+        self.assertTrue('a' in self.cache)
+        self.assertFalse('b' in self.cache)
+        self.assertTrue('c' in self.cache)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_clear(self):
+        self.cache.put('a', 1)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertFalse('a' in self.cache)
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from core import result_cache
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'results.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_and_put(self):
+        cache = result_cache.ResultCache(self.path)
+        self.assertEqual(cache.get('a'), None)
+        self.assertEqual(cache.get('a', 0), 0)
+        cache.put('a', {'agi': 2.5, 'str': 1})
+        cache.put('b', 22728.737070701667)
+        self.assertEqual(cache.get('a'), {'agi': 2.5, 'str': 1})
+        self.assertEqual(cache.get('b'), 22728.737070701667)
+        self.assertEqual(len(cache), 2)
+        cache.close()
+        cache = result_cache.ResultCache(self.path)
+        self.assertEqual(cache.get('b'), 22728.737070701667)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        cache.close()
+
+    def test_eviction(self):
+        # Each entry takes up 1 + 3 bytes.
+        cache = result_cache.ResultCache(self.path, max_bytes=12)
+        cache.put('a', 100)
+        cache.put('b', 200)
+        cache.put('c', 300)
+        self.assertEqual(cache.get('a'), 100)
+        cache.put('d', 400)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 100)
+        self.assertEqual(cache.get('c'), 300)
+        self.assertEqual(cache.get('d'), 400)
+        self.assertEqual(cache.size(), 12)
+        cache.close()
+
+    def test_hits_only_read(self):
+        cache = result_cache.ResultCache(self.path, max_bytes=12, flush_every=2)
+        cache.put('a', 100)
+        cache.put('b', 200)
+        changes = cache.connection.total_changes
+        self.assertEqual(cache.get('a'), 100)
+        self.assertEqual(cache.get('a'), 100)
+        self.assertEqual(cache.connection.total_changes, changes)
+        # A hit on a second key writes both pending uses out.
+        self.assertEqual(cache.get('b'), 200)
+        self.assertEqual(cache.connection.total_changes, changes + 2)
+        self.assertEqual(cache.get('a'), 100)
+        cache.close()
+        # The size survives, and recency too: b is the oldest.
+        cache = result_cache.ResultCache(self.path, max_bytes=12)
+        self.assertEqual(cache.size(), 8)
+        cache.put('c', 300)
+        cache.put('d', 400)
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 100)
+        cache.put('a', 1000)
+        self.assertEqual(cache.get('c'), None)
+        self.assertEqual(cache.size(), cache.connection.execute('SELECT SUM(size) FROM results').fetchone()[0])
+        self.assertEqual(cache.size(), 9)
+        cache.close()
+
+    def test_concurrent_puts(self):
+        # Two connections rewriting the same keys with values of different
+        # sizes: the kept total must still match the entries.
+        caches = [result_cache.ResultCache(self.path), result_cache.ResultCache(self.path)]
+        def put_all(cache, width):
+            for index in range(500):
+                cache.put('key%d' % (index % 5), 'x' * (width + index % 7))
+        threads = [threading.Thread(target=put_all, args=(cache, width)) for cache, width in zip(caches, (10, 20))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for cache in caches:
+            self.assertEqual(cache.size(), cache.connection.execute('SELECT SUM(size) FROM results').fetchone()[0])
+            cache.close()
@@ -0,0 +1,31 @@
+import json
+import StringIO
+import unittest
+from core import timing
+
+class TestTimingSinks(unittest.TestCase):
+    def test_null_sink(self):
+        sink = timing.NullTimingSink()
+        self.assertEqual(sink.clock(), 0)
+        sink.record('phase', 1.)
+
+    def test_aggregator(self):
+        sink = timing.TimingAggregator()
+        self.assertTrue(sink.clock() > 0)
+        sink.record('phase', 1.)
+        sink.record('phase', 3.)
+        sink.record('other', .5)
+        summary = sink.summary()
+        self.assertEqual(summary['phase'], {'count': 2, 'total': 4., 'mean': 2., 'max': 3.})
+        self.assertEqual(summary['other']['count'], 1)
+        sink.clear()
+        self.assertEqual(sink.summary(), {})
+
+    def test_json_lines(self):
+        stream = StringIO.StringIO()
+        sink = timing.JSONLinesTimingSink(stream, context={'request': 7})
+        sink.record('phase', .25)
+        sink.record('other', .5)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(lines, [{'request': 7, 'phase': 'phase', 'seconds': .25},
+                                 {'request': 7, 'phase': 'other', 'seconds': .5}])
@@ -9,6 +9,14 @@ class TestBuffsTrue(unittest.TestCase):
     def test_exception(self):
         self.assertRaises(buffs.InvalidBuffException, buffs.Buffs, 'fake_buff')
     
+    def test_with_(self):
+        changed = self.buffs.with_(crit_chance_buff=False)
+        self.assertFalse(changed.crit_chance_buff)
+        self.assertTrue(changed.agi_flask)
+        self.assertTrue(self.buffs.crit_chance_buff)
+        self.assertRaises(AttributeError, setattr, self.buffs, 'crit_chance_buff', False)
+        self.assertRaises(buffs.InvalidBuffException, self.buffs.with_, fake_buff=True)
+
     def test__getattr__(self):
         self.assertRaises(AttributeError, self.buffs.__getattr__, 'fake_buff')
         self.assertTrue(self.buffs.crit_chance_buff)
@@ -101,9 +109,10 @@ class TestBuffsLevel(unittest.TestCase):
     def test(self):
         self.assertEqual(self.buffs.buff_agi(), 549)
         self.assertEqual(self.buffs.buff_str(), 549)
-        self.buffs.level = 80
-        self.assertEqual(self.buffs.buff_agi(), 155)
-        self.assertEqual(self.buffs.buff_str(), 155)
+        level_80_buffs = self.buffs.with_(level=80)
+        self.assertEqual(level_80_buffs.buff_agi(), 155)
+        self.assertEqual(level_80_buffs.buff_str(), 155)
+        self.assertEqual(self.buffs.buff_agi(), 549)
 
     def test_exception(self):
-        self.assertRaises(exceptions.InvalidLevelException, self.buffs.__setattr__, 'level', 86)
+        self.assertRaises(exceptions.InvalidLevelException, self.buffs.with_, level=86)
@@ -1,3 +1,5 @@
+import copy
+import pickle
 import unittest
 from objects import procs
     
@@ -25,6 +27,25 @@ class TestProcsList(unittest.TestCase):
         self.procsList = procs.ProcsList()
         self.assertEqual(len(self.procsList.get_all_damage_procs()), 0)
 
+    def test_indexes(self):
+        procs_list = procs.ProcsList('heroic_left_eye_of_rajh', 'darkmoon_card_hurricane', 'fluid_death', 'prestors_talisman_of_machination')
+        all_procs = procs_list.get_all_procs_for_stat()
+        self.assertEqual(len(all_procs), 4)
+        self.assertEqual(set(procs_list.get_all_procs_for_stat('agi')), set([procs_list.heroic_left_eye_of_rajh, procs_list.fluid_death]))
+        self.assertEqual(procs_list.get_all_procs_for_stat('mastery'), ())
+        self.assertEqual(procs_list.get_all_damage_procs(), (procs_list.darkmoon_card_hurricane,))
+        self.assertTrue(procs_list.fluid_death in procs_list.get_procs_for_trigger(procs.STRIKES))
+        self.assertFalse(procs_list.fluid_death in procs_list.get_procs_for_trigger(procs.HARMFUL_SPELLS))
+        self.assertEqual(procs_list.get_procs_for_trigger(procs.HEALS), ())
+        for proc in all_procs:
+            self.assertNotEqual(proc in procs_list.get_procs_with_icd(), proc in procs_list.get_procs_without_icd())
+        self.assertTrue(procs_list.prestors_talisman_of_machination in procs_list.get_procs_with_icd())
+
+    def test_shared_specs(self):
+        other = procs.ProcsList('heroic_left_eye_of_rajh', 'darkmoon_card_hurricane')
+        self.assertTrue(other.darkmoon_card_hurricane is self.procsList.darkmoon_card_hurricane)
+        self.assertEqual(other.get_all_procs_for_stat(), self.procsList.get_all_procs_for_stat())
+
 
 class TestProc(unittest.TestCase):
     def setUp(self):
@@ -71,6 +92,23 @@ class TestProc(unittest.TestCase):
     def test_is_ppm(self):
         self.assertFalse(self.proc.is_ppm())
 
+    def test_trigger_mask(self):
+        self.assertEqual(self.proc.trigger_mask, procs.AUTO_ATTACKS | procs.STRIKES | procs.APPLY_DEBUFF)
+        self.assertEqual(procs.Proc('agi', 1, 1, .1, 'bleeds', None, 1, False, 'Test').trigger_mask, procs.BLEEDS)
+        self.assertEqual(procs.Proc('agi', 1, 1, .1, 'unknown', None, 1, False, 'Test').trigger_mask, 0)
+
+    def test_immutable(self):
+        self.assertRaises(AttributeError, setattr, self.proc, 'uptime', .5)
+        self.assertRaises(AttributeError, setattr, self.proc, 'icd', 10)
+        self.assertRaises(AttributeError, delattr, self.proc, 'icd')
+        self.assertEqual(self.proc.icd, 75)
+
+    def test_copies(self):
+        for proc in (copy.deepcopy(self.proc), pickle.loads(pickle.dumps(self.proc, 2))):
+            self.assertEqual(proc.stat, 'haste')
+            self.assertEqual(proc.proc_name, 'Nefarious Plot')
+            self.assertEqual(proc.trigger_mask, self.proc.trigger_mask)
+
 
 class TestPPMProc(unittest.TestCase):
     def setUp(self):
@@ -89,3 +127,12 @@ class TestPPMProc(unittest.TestCase):
 
     def test_is_ppm(self):
         self.assertTrue(self.proc.is_ppm())
+
+    def test_proc_chance(self):
+        self.assertEqual(self.proc.proc_chance, None)
+        proc = procs.PPMProc('haste', 450, 12, 1, 'all_spells_and_attacks', 0, 1, False, 'Hurricane', speed=1.8)
+        self.assertAlmostEqual(proc.proc_chance, 1.8 / 60)
+        copied = pickle.loads(pickle.dumps(proc, 2))
+        self.assertEqual(copied.speed, 1.8)
+        self.assertAlmostEqual(copied.proc_chance, proc.proc_chance)
+        self.assertRaises(AttributeError, setattr, proc, 'proc_chance', .5)
@@ -1,4 +1,5 @@
 import unittest
+from objects import glyphs
 from objects.rogue import rogue_glyphs
     
 class TestRogueGlyphs(unittest.TestCase):
@@ -9,3 +10,12 @@ class TestRogueGlyphs(unittest.TestCase):
         self.assertRaises(AttributeError, self.glyphs.__getattr__, 'fake_glyph')
         self.assertTrue(self.glyphs.backstab)
         self.assertFalse(self.glyphs.slice_and_dice)
+
+    def test_with_(self):
+        changed = self.glyphs.with_(rupture=False, slice_and_dice=True)
+        self.assertFalse(changed.rupture)
+        self.assertTrue(changed.slice_and_dice)
+        self.assertTrue(changed.backstab)
+        self.assertTrue(self.glyphs.rupture)
+        self.assertRaises(AttributeError, setattr, self.glyphs, 'rupture', False)
+        self.assertRaises(glyphs.InvalidGlyphException, self.glyphs.with_, fake_glyph=True)
@@ -1,3 +1,4 @@
+import pickle
 import unittest
 from objects import talents
 from objects.rogue import rogue_talents
@@ -57,3 +58,20 @@ class TestRogueTalents(unittest.TestCase):
     def test_exceptions(self):
         self.assertRaises(talents.InvalidTalentException, rogue_talents.RogueTalents, 
             '1333230113022110321', '0020000000000000000', '2030030000000000000')
+
+    def test_pickle(self):
+        copied_talents = pickle.loads(pickle.dumps(self.talents, 2))
+        self.assertEqual(copied_talents.precision, 2)
+        self.assertTrue(copied_talents.is_assassination_rogue())
+
+    def test_with_(self):
+        changed = self.talents.with_(vile_poisons=0, killing_spree=0)
+        self.assertEqual(changed.vile_poisons, 0)
+        self.assertEqual(changed.precision, 2)
+        self.assertEqual(self.talents.vile_poisons, 3)
+        self.assertTrue(changed.is_assassination_rogue())
+        self.assertRaises(AttributeError, setattr, self.talents, 'vile_poisons', 0)
+        self.assertRaises(AttributeError, setattr, self.talents.trees[0], 'vile_poisons', 0)
+        self.assertRaises(talents.InvalidTalentException, self.talents.with_, fake_talent=1)
+        self.assertRaises(talents.InvalidTalentException, self.talents.with_, vile_poisons=4)
+        self.assertRaises(talents.InvalidTalentException, self.talents.with_, killing_spree=1)
@@ -8,16 +8,32 @@ class TestStats(unittest.TestCase):
 
     def test_stats(self):
         self.assertEqual(self.stats.agi, 3485)
+
+    def test_with_(self):
+        gear_buffs = stats.GearBuffs('leather_specialization')
+        base = stats.Stats(20, 3485, 190, 1517, 1086, 641, 899, 666, None, None, None, None, gear_buffs)
+        changed = base.with_(haste=1500, crit=1200)
+        self.assertEqual((changed.haste, changed.crit, changed.agi), (1500, 1200, 3485))
+        self.assertEqual((base.haste, base.crit), (899, 1517))
+        self.assertTrue(changed.gear_buffs is gear_buffs)
+        self.assertEqual(changed.haste_rating_conversion, base.haste_rating_conversion)
+        self.assertRaises(exceptions.InvalidInputException, base.with_, dodge=10)
+
+    def test_read_only(self):
+        self.assertRaises(AttributeError, setattr, self.stats, 'agi', 4000)
+        self.assertRaises(AttributeError, delattr, self.stats, 'agi')
+        self.assertEqual(self.stats.agi, 3485)
     
     def test_set_constants_for_level(self):
-        self.assertRaises(exceptions.InvalidLevelException, self.stats.__setattr__, 'level', 86)
+        self.assertRaises(exceptions.InvalidLevelException, self.stats.with_, level=86)
     
     def test_get_mastery_from_rating(self):
         self.assertAlmostEqual(self.stats.get_mastery_from_rating(), 8 + 666 / 179.279998779296875)
         self.assertAlmostEqual(self.stats.get_mastery_from_rating(100),  8 + 100 / 179.279998779296875)
-        self.stats.level = 80
-        self.assertAlmostEqual(self.stats.get_mastery_from_rating(), 8 + 666 / 45.906)
-        self.assertAlmostEqual(self.stats.get_mastery_from_rating(100),  8 + 100 / 45.906)
+        level_80_stats = self.stats.with_(level=80)
+        self.assertAlmostEqual(level_80_stats.get_mastery_from_rating(), 8 + 666 / 45.906)
+        self.assertAlmostEqual(level_80_stats.get_mastery_from_rating(100),  8 + 100 / 45.906)
+        self.assertAlmostEqual(self.stats.get_mastery_from_rating(), 8 + 666 / 179.279998779296875)
     
     def test_get_melee_hit_from_rating(self):
         self.assertAlmostEqual(self.stats.get_melee_hit_from_rating(), .01 * 1086 / 120.109001159667969)
@@ -85,6 +101,15 @@ class TestGearBuffs(unittest.TestCase):
         self.assertFalse(self.gear.unsolvable_riddle)
         self.assertRaises(AttributeError, self.gear.__getattr__, 'fake_gear_buff')
 
+    def test_with_(self):
+        gear = self.gear.with_(chaotic_metagem=False, unsolvable_riddle=True)
+        self.assertFalse(gear.chaotic_metagem)
+        self.assertTrue(gear.unsolvable_riddle)
+        self.assertTrue(gear.leather_specialization)
+        self.assertTrue(self.gear.chaotic_metagem)
+        self.assertRaises(AttributeError, setattr, self.gear, 'chaotic_metagem', False)
+        self.assertRaises(exceptions.InvalidInputException, self.gear.with_, fake_gear_buff=True)
+
     def test_metagem_crit_multiplier(self):
         self.assertAlmostEqual(self.gear.metagem_crit_multiplier(), 1.03)
         self.assertAlmostEqual(self.gear_none.metagem_crit_multiplier(), 1.0)
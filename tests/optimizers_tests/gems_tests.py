@@ -0,0 +1,67 @@
+import unittest
+from benchmarks import fixtures
+from core import exceptions
+from optimizers import gems
+
+class TestGemOptimizer(unittest.TestCase):
+    def setUp(self):
+        # No enchants, and a meta gem in place of the potion.
+        self.calculator = fixtures.assassination(enchant=None, gear_buff_names=('rogue_t11_2pc', 'leather_specialization', 'chaotic_metagem'))
+        self.items = [{'sockets': ['meta', 'red'], 'bonus': {'agi': 10}},
+                      {'sockets': ['yellow', 'blue'], 'bonus': {'hit': 20}},
+                      {'sockets': ['prismatic']}]
+        self.optimizer = gems.GemOptimizer(self.calculator, self.items)
+
+    def test_configure(self):
+        calculator = self.optimizer.configure(('chaotic_shadowspirit_diamond', 'landslide', None))
+        self.assertTrue(calculator.stats.mh.landslide)
+        self.assertFalse(calculator.stats.oh.landslide)
+        self.assertTrue(calculator.stats.gear_buffs.chaotic_metagem)
+        self.assertTrue(calculator.stats.gear_buffs.leather_specialization)
+        self.assertFalse(self.calculator.stats.mh.landslide)
+        calculator = gems.GemOptimizer(self.calculator, self.items[1:]).configure((None, None, None))
+        self.assertFalse(calculator.stats.gear_buffs.chaotic_metagem)
+        self.assertEqual(len(self.optimizer.get_configurations()), 2 * 3 * 3)
+
+    def test_item_plans(self):
+        weights = {'agi': 2., 'crit': 1., 'hit': 1.4, 'exp': 0, 'haste': .9, 'mastery': .8}
+        plans = self.optimizer.get_item_plans(self.items[1], weights)
+        self.assertEqual(len(plans), 2)
+        self.assertEqual(plans[0][1], ['delicate_inferno_ruby', 'delicate_inferno_ruby'])
+        self.assertEqual(plans[1][1], ['deadly_ember_topaz', 'glinting_demonseye'])
+        self.assertEqual(plans[1][2], {'agi': 40, 'crit': 20, 'hit': 40})
+        weights['hit'] = 3.2
+        plans = self.optimizer.get_item_plans(self.items[1], weights)
+        self.assertEqual(plans[0][1], ['piercing_dream_emerald', 'rigid_ocean_sapphire'])
+        plans = self.optimizer.get_item_plans(self.items[0], weights)
+        self.assertEqual([plan[1] for plan in plans], [[None, 'rigid_ocean_sapphire'], [None, 'glinting_demonseye']])
+        self.assertAlmostEqual(plans[1][0], 124.)
+        self.assertEqual(plans[1][2], {'agi': 30, 'hit': 20})
+        plans = self.optimizer.get_item_plans(self.items[2], weights)
+        self.assertEqual([plan[1] for plan in plans], [['rigid_ocean_sapphire']])
+
+    def test_invalid_input(self):
+        self.assertRaises(exceptions.InvalidInputException, gems.GemOptimizer, self.calculator, [{'sockets': ['green']}])
+
+    def test_optimize(self):
+        configuration, item_gems, dps = self.optimizer.optimize()
+        self.assertEqual(item_gems[0][0], configuration['meta_gem'])
+        calculator = self.optimizer.configure((configuration['meta_gem'], configuration['mh_enchant'], configuration['oh_enchant']))
+        gem_ratings = {}
+        for item, socket_gems in zip(self.items, item_gems):
+            matched = True
+            for color, gem in zip(item['sockets'], socket_gems):
+                if color == 'meta':
+                    ratings = gems.META_GEMS[gem][0]
+                else:
+                    matched = matched and (color == 'prismatic' or color in gems.GEMS[gem][0])
+                    ratings = gems.GEMS[gem][1]
+                for stat, rating in ratings.items():
+                    gem_ratings[stat] = gem_ratings.get(stat, getattr(calculator.stats, stat)) + rating
+            if matched:
+                for stat, rating in item.get('bonus', {}).items():
+                    gem_ratings[stat] = gem_ratings.get(stat, getattr(calculator.stats, stat)) + rating
+        self.assertAlmostEqual(calculator.with_(**gem_ratings).get_dps(), dps)
+        for enchant in (None, 'hurricane'):
+            calculator = self.optimizer.configure((configuration['meta_gem'], enchant, enchant))
+            self.assertTrue(calculator.get_dps() < dps)
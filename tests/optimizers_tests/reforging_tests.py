@@ -0,0 +1,46 @@
+import itertools
+import unittest
+from benchmarks import fixtures
+from core import exceptions
+from core import executors
+from optimizers import reforging
+
+class TestReforgeOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.calculator = fixtures.assassination()
+        self.items = [{'crit': 168, 'haste': 112}, {'hit': 200, 'mastery': 150}, {'exp': 180, 'crit': 120}, {'haste': 250, 'hit': 140}]
+        self.optimizer = reforging.ReforgeOptimizer(self.calculator, self.items)
+
+    def test_reforge_options(self):
+        options = self.optimizer.reforge_options({'crit': 168, 'haste': 112})
+        self.assertEqual(len(options), 7)
+        self.assertTrue(None in options)
+        self.assertTrue(('crit', 'mastery') in options)
+        self.assertFalse(('crit', 'haste') in options)
+        self.assertEqual(self.optimizer.reforge_amount({'crit': 168}, ('crit', 'hit')), 67)
+
+    def test_get_row(self):
+        row = self.optimizer.get_row([('crit', 'mastery'), None, None, ('hit', 'exp')])
+        self.assertEqual(row, (20, 4755, 190, 1034 - 67, 1333 - 56, 778 + 56, 1447, 936 + 67))
+        self.assertAlmostEqual(self.optimizer.get_dps([None] * 4), self.calculator.get_dps())
+
+    def test_invalid_input(self):
+        self.assertRaises(exceptions.InvalidInputException, reforging.ReforgeOptimizer, self.calculator, [{'spirit': 100}])
+        self.assertRaises(exceptions.InvalidInputException, self.optimizer.optimize, [None])
+        self.assertRaises(exceptions.InvalidInputException, self.optimizer.optimize, [('crit', 'haste'), None, None, None])
+
+    def test_optimize(self):
+        # Few enough items to check against every combination.
+        optimizer = reforging.ReforgeOptimizer(self.calculator, self.items[1:])
+        reforges, dps = optimizer.optimize()
+        options = [optimizer.reforge_options(item) for item in self.items[1:]]
+        best_dps = max([optimizer.get_dps(list(combination)) for combination in itertools.product(*options)])
+        self.assertAlmostEqual(dps, best_dps)
+        self.assertAlmostEqual(optimizer.get_dps(reforges), dps)
+        self.assertEqual(self.calculator.stats.crit, 1034)
+
+    def test_process_pool(self):
+        reforges, dps = self.optimizer.optimize()
+        with executors.ProcessPoolExecutor(processes=2) as executor:
+            optimizer = reforging.ReforgeOptimizer(self.calculator, self.items, executor)
+            self.assertEqual(optimizer.optimize(), (reforges, dps))
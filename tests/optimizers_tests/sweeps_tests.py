@@ -0,0 +1,64 @@
+import unittest
+from benchmarks import fixtures
+from calcs.rogue.Aldriana import AldrianasRogueDamageCalculator
+from calcs.rogue.Aldriana import simulator
+from core import exceptions
+from objects.rogue import rogue_glyphs
+from optimizers import sweeps
+
+class TestCategoricalSweep(unittest.TestCase):
+    def setUp(self):
+        # A meta gem in place of the potion.
+        self.calculator = fixtures.assassination(gear_buff_names=('rogue_t11_2pc', 'leather_specialization', 'chaotic_metagem'))
+
+    def test_modeled_glyphs(self):
+        # Glyphs outside the calculator's table get no quantity of their
+        # own, so sweeps take them for DPS-neutral; none may change DPS.
+        modeled = AldrianasRogueDamageCalculator.modeled_glyphs
+        self.assertEqual(modeled - rogue_glyphs.RogueGlyphs.allowed_glyphs, set())
+        self.assertEqual(set(simulator.SIMULATED_GLYPHS) - modeled, set())
+        for fixture in ('assassination_default', 'combat_default'):
+            calculator = fixtures.get_fixture(fixture)[1]()
+            dps = calculator.get_dps()
+            names = [name for name in rogue_glyphs.RogueGlyphs.allowed_glyphs if getattr(calculator.glyphs, name)]
+            for name in rogue_glyphs.RogueGlyphs.allowed_glyphs - modeled:
+                if name in names:
+                    glyphs = rogue_glyphs.RogueGlyphs(*[other for other in names if other != name])
+                else:
+                    glyphs = rogue_glyphs.RogueGlyphs(*(names + [name]))
+                self.assertEqual(calculator.with_(glyphs=glyphs).get_dps(), dps, name)
+
+    def test_affected_quantities(self):
+        sweep = sweeps.CategoricalSweep(self.calculator, buffs=['spell_damage_debuff', 'agi_flask'], glyphs=['vendetta', 'sprint'], races=['human', 'gnome'])
+        affected = sweep.affected_quantities()
+        self.assertEqual(affected[('buffs', 'spell_damage_debuff')], ['spell_damage'])
+        self.assertEqual(affected[('buffs', 'agi_flask')], ['buff_agi'])
+        self.assertEqual(affected[('glyphs', 'vendetta')], ['vendetta_glyph'])
+        self.assertEqual(affected[('glyphs', 'sprint')], [])
+        self.assertEqual(affected[('race', None)], ['racial_str', 'racial_agi', 'mh_racial_expertise', 'oh_racial_expertise'])
+
+    def test_run(self):
+        sweep = sweeps.CategoricalSweep(self.calculator, buffs=['armor_debuff', 'bleed_damage_debuff', 'short_term_haste_buff'],
+                                        glyphs=['sprint'], races=['night_elf', 'blood_elf', 'goblin'], oh_poisons=['dp', 'ip'])
+        results = sweep.run()
+        self.assertEqual(len(results), 2 ** 4 * 3 * 2)
+        # Sprint, goblins (who are blood elves as far as the model cares)
+        # and the two damage-only debuffs don't need evaluations of their
+        # own; neither does the rejected instant poison on both hands.
+        self.assertEqual(sweep.evaluations, 2 * 2 * 2)
+        self.assertEqual(results[0][1]['buffs'], sweeps.describe_point(self.calculator)['buffs'])
+        for dps, point in results:
+            if point['oh_poison'] == 'ip':
+                self.assertEqual(dps, None)
+                continue
+            calculator = sweeps.apply_point(self.calculator, point)
+            self.assertAlmostEqual(dps, calculator.get_dps(), 6)
+        dps_values = [dps for dps, point in results if dps is not None]
+        self.assertEqual(dps_values, sorted(dps_values, reverse=True))
+        self.assertEqual(results[-1][0], None)
+        self.assertEqual(sweeps.describe_point(self.calculator)['oh_poison'], 'dp')
+        self.assertTrue(self.calculator.stats.gear_buffs.chaotic_metagem)
+
+    def test_invalid_axes(self):
+        self.assertRaises(exceptions.InvalidInputException, sweeps.CategoricalSweep, self.calculator, buffs=['ambush'])
+        self.assertRaises(exceptions.InvalidInputException, sweeps.CategoricalSweep, self.calculator, mh_poisons=['crippling'])
@@ -0,0 +1,71 @@
+import unittest
+from benchmarks import fixtures
+from calcs.rogue.Aldriana import AldrianasRogueDamageCalculator
+from calcs.rogue.Aldriana import simulator
+from objects.rogue import rogue_talents
+from optimizers import talent_builds
+
+class TestTalentSearch(unittest.TestCase):
+    def setUp(self):
+        self.calculator = fixtures.assassination()
+        self.talents = self.calculator.talents
+
+    def test_talent_strings(self):
+        build = talent_builds.get_build(self.talents)
+        self.assertEqual(build['lethality'], 3)
+        self.assertEqual(build['precision'], 2)
+        self.assertEqual(talent_builds.talent_strings(build), ('0333230113022110321', '0020000000000000000', '2030030000000000000'))
+
+    def test_modeled_talents(self):
+        # The search leaves alone the talents outside the calculator's table,
+        # so none of them may change DPS.
+        modeled = AldrianasRogueDamageCalculator.modeled_talents
+        self.assertEqual(modeled - set(self.talents.treeForTalent), set())
+        self.assertEqual(set(simulator.SIMULATED_TALENTS) - modeled, set())
+        for fixture in ('assassination_default', 'combat_default'):
+            calculator = fixtures.get_fixture(fixture)[1]()
+            dps = calculator.get_dps()
+            build = talent_builds.get_build(calculator.talents)
+            unmodeled = [name for name in sorted(build) if name not in modeled]
+            # Free a point from the filler so that every talent can take one.
+            filler = [name for name in unmodeled if build[name]][0]
+            build[filler] -= 1
+            for name in unmodeled:
+                changed = dict(build)
+                changed[name] = int(not build[name])
+                talents = rogue_talents.RogueTalents(*talent_builds.talent_strings(changed))
+                self.assertEqual(calculator.with_(talents=talents).get_dps(), dps, name)
+        search = talent_builds.TalentSearch(self.calculator)
+        self.assertFalse('master_poisoner' in search.searched_talents)
+        self.assertFalse('deadened_nerves' in search.searched_talents)
+
+    def test_is_valid(self):
+        search = talent_builds.TalentSearch(self.calculator)
+        build = talent_builds.get_build(self.talents)
+        self.assertTrue(search.is_valid(build))
+        self.assertFalse(search.is_valid(search.changed(build, [('lethality', 1)])))
+        self.assertFalse(search.is_valid(search.changed(build, [('master_poisoner', -1), ('precision', 1)])))
+        self.assertFalse(search.is_valid(search.changed(build, [('precision', 1)])))
+        self.assertTrue(search.is_valid(search.changed(build, [('precision', 1), ('lethality', -1)])))
+
+    def test_builds_dps(self):
+        dps_values = talent_builds.builds_dps((self.calculator, 'assassination', [('0333230113022110321', '0020000000000000000', '2030030000000000000'),
+                                                                                  ('0000000000000000000', '2332230310032012321', '0000000000000000000')]))
+        self.assertAlmostEqual(dps_values[0], self.calculator.get_dps())
+        self.assertEqual(dps_values[1], None)
+        self.assertTrue(self.calculator.talents is self.talents)
+
+    def test_optimize(self):
+        # Take a point out of Lethality; the search should put the spare
+        # point to use.
+        self.calculator = self.calculator.with_(talents=rogue_talents.RogueTalents('0323230113022110321', '0020000000000000000', '2030030000000000000'))
+        start_dps = self.calculator.get_dps()
+        search = talent_builds.TalentSearch(self.calculator)
+        strings, dps = search.optimize()
+        self.assertTrue(dps > start_dps)
+        build = talent_builds.get_build(rogue_talents.RogueTalents(*strings))
+        self.assertTrue(search.is_valid(build))
+        self.assertEqual(sum(build.values()), talent_builds.MAX_POINTS)
+        self.assertEqual(build['master_poisoner'], 1)
+        self.assertEqual(build['cut_to_the_chase'], 3)
+        self.assertAlmostEqual(dps, talent_builds.builds_dps((self.calculator, 'assassination', [strings]))[0])
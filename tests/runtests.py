@@ -3,12 +3,24 @@ import sys
 
 sys.path.append(".")
 
+from benchmarks_tests.runner_tests import TestComparison
 from calcs_tests import TestDamageCalculator
 from calcs_tests.armor_mitigation_tests import TestArmorMitigation
+from calcs_tests.fixed_point_tests import TestFixedPointSolvers
 from calcs_tests.rogue_tests import TestRogueDamageCalculator
 from calcs_tests.rogue_tests import TestRogueDamageCalculatorLevels
 from calcs_tests.rogue_tests.Aldriana_tests import TestAldrianasRogueDamageCalculator
+from calcs_tests.rogue_tests.Aldriana_tests.attack_record_tests import TestAttackRecord
+from calcs_tests.rogue_tests.Aldriana_tests.cp_distribution_engine_tests import TestCPDistributionEngine
+from calcs_tests.rogue_tests.Aldriana_tests.monte_carlo_tests import TestMonteCarloRunner, TestRunningStats
+from calcs_tests.rogue_tests.Aldriana_tests.profiles_tests import TestProfiles
+from calcs_tests.rogue_tests.Aldriana_tests.simulator_tests import TestSimulator
+from core_tests.dual_number_tests import TestDualNumber
 from core_tests.exceptions_tests import TestInvalidInputException
+from core_tests.executors_tests import TestExecutors
+from core_tests.lru_cache_tests import TestLRUCache
+from core_tests.result_cache_tests import TestResultCache
+from core_tests.timing_tests import TestTimingSinks
 from objects_tests.buffs_tests import TestBuffsTrue, TestBuffsFalse, TestBuffsLevel
 from objects_tests.stats_tests import TestStats, TestWeapon, TestGearBuffs
 from objects_tests.procs_tests import TestProcsList, TestProc, TestPPMProc
@@ -18,6 +30,11 @@ from objects_tests.rogue_tests.rogue_talents_tests import TestAssassinationTalen
 from objects_tests.rogue_tests.rogue_talents_tests import TestCombatTalents
 from objects_tests.rogue_tests.rogue_talents_tests import TestSubtletyTalents
 from objects_tests.rogue_tests.rogue_talents_tests import TestRogueTalents
+from optimizers_tests.gems_tests import TestGemOptimizer
+from optimizers_tests.reforging_tests import TestReforgeOptimizer
+from optimizers_tests.sweeps_tests import TestCategoricalSweep
+from optimizers_tests.talent_builds_tests import TestTalentSearch
+from server_tests import TestCalculationServer
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,137 @@
+import httplib
+import json
+import threading
+import time
+import unittest
+import server
+from core import executors
+
+class GatedExecutor(executors.SerialExecutor):
+    # Counts the evaluations started, and holds each one back until gate is
+    # set, so that requests can pile up behind it.
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+        self.maps = 0
+
+    def map(self, function, tasks):
+        self.maps += 1
+        for task in tasks:
+            self.gate.wait()
+            yield function(task)
+
+
+class QuietRequestHandler(server.CalculationRequestHandler):
+    def log_message(self, format, *arguments):
+        pass
+
+
+class CountingServer(server.CalculationServer):
+    def __init__(self, *arguments):
+        server.CalculationServer.__init__(self, *arguments)
+        self.RequestHandlerClass = QuietRequestHandler
+        self.submissions = 0
+        self.submissions_lock = threading.Lock()
+
+    def submit(self, line, default_what):
+        self.submissions_lock.acquire()
+        try:
+            self.submissions += 1
+        finally:
+            self.submissions_lock.release()
+        return server.CalculationServer.submit(self, line, default_what)
+
+
+class TestCalculationServer(unittest.TestCase):
+    def setUp(self):
+        self.profile = {
+            'stats': {'str': 20, 'agi': 4755, 'ap': 190, 'crit': 1034, 'hit': 1333, 'exp': 778, 'haste': 1447, 'mastery': 936},
+            'mh': {'damage': 939.5, 'speed': 1.8, 'type': 'dagger', 'enchant': 'landslide'},
+            'oh': {'damage': 730.5, 'speed': 1.4, 'type': 'dagger', 'enchant': 'landslide'},
+            'ranged': {'damage': 1371.5, 'speed': 2.2, 'type': 'thrown'},
+            'procs': ['heroic_prestors_talisman_of_machination', 'fluid_death'],
+            'gear_buffs': ['rogue_t11_2pc', 'leather_specialization', 'potion_of_the_tolvir'],
+            'talents': ['0333230113022110321', '0020000000000000000', '2030030000000000000'],
+            'glyphs': ['backstab', 'mutilate', 'rupture'],
+            'race': 'night_elf',
+            'buffs': ['short_term_haste_buff', 'stat_multiplier_buff', 'crit_chance_buff', 'all_damage_buff',
+                      'melee_haste_buff', 'attack_power_buff', 'str_and_agi_buff', 'armor_debuff',
+                      'physical_vulnerability_debuff', 'spell_damage_debuff', 'spell_crit_debuff',
+                      'bleed_damage_debuff', 'agi_flask', 'guild_feast'],
+            'settings': {'cycle': {'type': 'assassination'}, 'response_time': 1}
+        }
+        # Port 0 picks a free port.
+        self.executor = GatedExecutor()
+        self.server = CountingServer(('127.0.0.1', 0), self.executor)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def request(self, method, path, body=None):
+        # Returns (status, body).
+        connection = httplib.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+        try:
+            connection.request(method, path, body)
+            response = connection.getresponse()
+            return response.status, response.read()
+        finally:
+            connection.close()
+
+    def test_evaluate(self):
+        request = dict(self.profile, id='gear-1')
+        status, body = self.request('POST', '/evaluate', json.dumps(request))
+        self.assertEqual(status, 200)
+        result = json.loads(body)
+        self.assertEqual(result['id'], 'gear-1')
+        self.assertAlmostEqual(result['dps'], 22728.7370707, places=4)
+
+        status, body = self.request('POST', '/evaluate', json.dumps(dict(self.profile, race='murloc')))
+        self.assertEqual(status, 400)
+        self.assertTrue('error' in json.loads(body))
+
+    def test_batch(self):
+        lines = [json.dumps(dict(self.profile, id=1)), '{"stats": ', json.dumps(dict(self.profile, id=3, what='breakdown'))]
+        status, body = self.request('POST', '/batch?what=dps', '\n'.join(lines) + '\n')
+        self.assertEqual(status, 200)
+        results = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['id'], 1)
+        self.assertAlmostEqual(results[0]['dps'], 22728.7370707, places=4)
+        self.assertEqual(results[1].keys(), ['error'])
+        self.assertTrue(results[1]['error'].startswith('ValueError'))
+        self.assertEqual(results[2]['id'], 3)
+        self.assertAlmostEqual(sum(results[2]['breakdown'].values()), results[0]['dps'], places=4)
+
+    def test_status(self):
+        status, body = self.request('GET', '/status')
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {'in_flight': 0})
+        self.assertEqual(self.request('GET', '/elsewhere')[0], 404)
+
+    def test_coalescing(self):
+        # Identical requests arriving while the first is being evaluated
+        # all get its result.
+        self.executor.gate.clear()
+        results = []
+        def post():
+            results.append(self.request('POST', '/evaluate', json.dumps(self.profile)))
+        threads = [threading.Thread(target=post) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        deadline = time.time() + 30
+        while self.server.submissions < 4 and time.time() < deadline:
+            time.sleep(.01)
+        self.assertEqual(json.loads(self.request('GET', '/status')[1]), {'in_flight': 1})
+        self.executor.gate.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.executor.maps, 1)
+        self.assertEqual(len(results), 4)
+        for status, body in results:
+            self.assertEqual(status, 200)
+            self.assertAlmostEqual(json.loads(body)['dps'], 22728.7370707, places=4)